@@ -1,12 +1,51 @@
-from flask import Flask, render_template, request, Response, session, redirect, url_for, flash
+from flask import Flask, render_template, request, Response, session, redirect, url_for, flash, g, jsonify
 from functools import wraps
-import base64
-import secrets
+from cache import ProgressCache
+from challenges import ChallengeRegistry
+from config import Config
+from hashing import HasherBusy, PasswordHasher
+from http_cache import HttpCache
+from instrumentation import Instrumentation
 from models import Database
+from tokens import ProgressTokens
+from writer import ProgressWriter
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
-db = Database()
+app.config.from_object(Config)
+http_cache = HttpCache(app)
+instrumentation = Instrumentation(app, enabled=app.config['INSTRUMENTATION'])
+registry = ChallengeRegistry.load(app.config['CHALLENGES_PATH'])
+progress_cache = ProgressCache(maxsize=app.config['PROGRESS_CACHE_SIZE'],
+                               ttl=app.config['PROGRESS_CACHE_TTL'])
+# Spawned hashing workers re-import this file as __mp_main__. They only run
+# werkzeug's hash functions, so skip the pool, writer thread and Database
+# (whose init_db would race the parent's) there.
+hasher = writer = db = None
+if __name__ != '__mp_main__':
+    hasher = instrumentation.instrument_hasher(
+        PasswordHasher(method=app.config['PASSWORD_HASH_METHOD'],
+                       workers=app.config['PASSWORD_HASH_WORKERS'],
+                       max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+                       retry_after=app.config['PASSWORD_HASH_RETRY_AFTER']).start())
+    if app.config['PROGRESS_GROUP_COMMIT']:
+        writer = instrumentation.instrument_writer(
+            ProgressWriter(app.config['DATABASE_PATH'],
+                           flush_interval=app.config['PROGRESS_FLUSH_INTERVAL'],
+                           max_batch=app.config['PROGRESS_FLUSH_MAX_BATCH'],
+                           connection_factory=instrumentation.connection_factory))
+    db = Database(app.config['DATABASE_PATH'],
+                  pool_size=app.config['DATABASE_POOL_SIZE'],
+                  progress_cache=progress_cache,
+                  hasher=hasher,
+                  challenge_ids=registry.ids(),
+                  connection_factory=instrumentation.connection_factory,
+                  writer=writer)
+
+PROGRESS_COOKIE = 'progress'
+progress_tokens = None
+if app.config['STATELESS_PROGRESS']:
+    progress_tokens = ProgressTokens(app.config['SECRET_KEY'],
+                                     max_age=app.config['PROGRESS_TOKEN_MAX_AGE'])
 
 # Authentication decorator
 def login_required(f):
@@ -18,6 +57,14 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+@app.errorhandler(HasherBusy)
+def hasher_busy(e):
+    flash('The server is busy, please try again in a moment', 'error')
+    template = 'register.html' if request.endpoint == 'register' else 'login.html'
+    response = Response(render_template(template), status=503)
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
 @app.route("/register", methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
@@ -58,125 +105,128 @@ def login():
 
 @app.route("/logout")
 def logout():
+    if 'user_id' in session:
+        db.forget_user(session['user_id'])
     session.clear()
     flash('You have been logged out', 'success')
-    return redirect(url_for('login'))
+    response = redirect(url_for('login'))
+    response.delete_cookie(PROGRESS_COOKIE)
+    return response
 
 @app.route("/")
 @login_required
 def home():
     user = db.get_user_by_id(session['user_id'])
-    return render_template('home.html', 
+    return http_cache.render('home.html',
                          progress=get_progress_data(),
                          user=user)
 
-# Update all other routes to include @login_required
-@app.route("/challenge1", methods=['GET', 'POST'])
-@login_required
-def challenge1():
-    if request.method == 'POST':
-        if request.form.get('code') == 'PYTHON_EXPLORER_2024':
-            progress = db.get_user_progress(session['user_id'])
-            progress['challenge1'] = True
-            db.save_user_progress(session['user_id'], progress)
-            session['progress'] = progress
-            return render_template('success.html', 
+def make_challenge_view(challenge):
+    def challenge_view():
+        if request.method == 'POST':
+            if registry.verify(challenge.id, request.form.get('code')):
+                complete_challenge(challenge)
+                return render_template('success.html',
+                                    progress=get_progress_data(),
+                                    challenge_num=challenge.id,
+                                    next_challenge=challenge.next_url)
+            return render_template('error.html',
                                 progress=get_progress_data(),
-                                challenge_num=1,
-                                next_challenge='/challenge2')
-        return render_template('error.html', 
-                            progress=get_progress_data(),
-                            challenge_num=1)
-
-    return render_template('challenge1.html', progress=get_progress_data())
+                                challenge_num=challenge.id)
 
-@app.route("/challenge2", methods=['GET', 'POST'])
-@login_required
-def challenge2():
-    if request.method == 'POST':
-        if request.form.get('code') == 'HEADER_HUNTER_42':
-            progress = db.get_user_progress(session['user_id'])
-            progress['challenge2'] = True
-            db.save_user_progress(session['user_id'], progress)
-            session['progress'] = progress
-            return render_template('success.html', 
-                                progress=get_progress_data(),
-                                challenge_num=2,
-                                next_challenge='/challenge3')
-        return render_template('error.html', 
-                            progress=get_progress_data(),
-                            challenge_num=2)
-
-    response = Response(render_template('challenge2.html', progress=get_progress_data()))
-    response.headers['X-Secret-Code'] = 'HEADER_HUNTER_42'
-    return response
-
-@app.route("/challenge3", methods=['GET', 'POST'])
-@login_required
-def challenge3():
-    if request.method == 'POST':
-        if request.form.get('code') == 'MASTER_SCRAPER_99':
-            progress = db.get_user_progress(session['user_id'])
-            progress['challenge3'] = True
-            db.save_user_progress(session['user_id'], progress)
-            session['progress'] = progress
-            return render_template('success.html', 
-                                progress=get_progress_data(),
-                                challenge_num=3,
-                                next_challenge='/victory')
-        return render_template('error.html', 
-                            progress=get_progress_data(),
-                            challenge_num=3)
+        response = http_cache.render(challenge.template,
+                                     progress=get_progress_data(),
+                                     **challenge.context)
+        response.headers.update(challenge.headers)
+        return response
+    return challenge_view
 
-    secret_message = base64.b64encode("MASTER_SCRAPER_99".encode()).decode()
-    return render_template('challenge3.html', 
-                         progress=get_progress_data(),
-                         secret_message=secret_message)
+# One /challenge<id> route per registered challenge
+for challenge in registry:
+    app.add_url_rule(f'/challenge{challenge.id}',
+                     endpoint=f'challenge{challenge.id}',
+                     view_func=login_required(make_challenge_view(challenge)),
+                     methods=['GET', 'POST'])
 
 @app.route("/victory")
 @login_required
 def victory():
     progress_data = get_progress_data()
-    if progress_data['completed'] < progress_data['total']:
+    mask = load_progress_mask()
+    if not registry.is_complete(mask):
         return render_template('error.html', 
                             progress=progress_data,
                             message="🚫 Complete all challenges first!",
-                            challenge_num=progress_data['completed'] + 1)
+                            challenge_num=registry.first_incomplete(mask))
     
-    return render_template('victory.html', progress=progress_data)
+    return http_cache.render('victory.html', progress=progress_data)
 
-def get_progress_data():
-    if 'user_id' not in session:
-        return {
-            'completed': 0,
-            'total': 3,
-            'percent': 0,
-            'challenges': [
-                {'number': i, 'complete': False, 'icon': '⏳'} 
-                for i in range(1, 4)
-            ]
-        }
-    
-    progress = db.get_user_progress(session['user_id'])
-    completed = sum(1 for value in progress.values() if value)
-    total = len(progress)
-    progress_percent = (completed / total) * 100 if total > 0 else 0
-    
-    challenges_status = []
-    for i in range(1, total + 1):
-        challenge_key = f'challenge{i}'
-        challenges_status.append({
-            'number': i,
-            'complete': progress.get(challenge_key, False),
-            'icon': '✅' if progress.get(challenge_key, False) else '⏳'
-        })
-    
+def leaderboard_data():
+    # Every query reads a materialized aggregate or walks an index for a few
+    # rows, so this costs the same with ten users or ten thousand
+    challenges = db.get_challenge_stats()
+    for stats in challenges:
+        stats['first_solvers'] = [row['username'] for row in db.get_challenge_completions(
+            stats['challenge_id'], limit=app.config['LEADERBOARD_FIRST_SOLVERS'])]
+    histogram = db.get_completion_histogram()
     return {
-        'completed': completed,
-        'total': total,
-        'percent': progress_percent,
-        'challenges': challenges_status
+        'leaders': db.get_leaderboard(app.config['LEADERBOARD_SIZE']),
+        'challenges': challenges,
+        'histogram': histogram,
+        'participants': sum(histogram.values()),
+        'finishers': histogram.get(len(registry), 0),
     }
 
+@app.route("/leaderboard")
+@login_required
+def leaderboard():
+    return http_cache.render('leaderboard.html',
+                             progress=get_progress_data(),
+                             board=leaderboard_data())
+
+@app.route("/stats/leaderboard")
+@login_required
+def leaderboard_stats():
+    return jsonify(leaderboard_data())
+
+@app.route("/stats/cache")
+@login_required
+def cache_stats():
+    return jsonify(progress_cache.stats())
+
+def load_progress_mask():
+    # Read the user's progress at most once per request, from the signed
+    # progress token when it is valid and from the database otherwise. A valid
+    # token never reaches db.get_progress_mask, so the ProgressCache only sees
+    # requests without one.
+    if 'progress_mask' not in g:
+        mask = None
+        if progress_tokens is not None:
+            mask = progress_tokens.loads(request.cookies.get(PROGRESS_COOKIE), session['user_id'])
+        if mask is None:
+            mask = db.get_progress_mask(session['user_id'])
+            g.progress_changed = True
+        g.progress_mask = mask
+    return g.progress_mask
+
+def complete_challenge(challenge):
+    db.complete_challenge(session['user_id'], challenge.id)
+    g.progress_mask = load_progress_mask() | challenge.bit
+    g.progress_changed = True
+    return g.progress_mask
+
+@app.after_request
+def issue_progress_token(response):
+    if progress_tokens is not None and g.get('progress_changed') and 'user_id' in session:
+        response.set_cookie(PROGRESS_COOKIE,
+                            progress_tokens.dumps(session['user_id'], g.progress_mask),
+                            max_age=progress_tokens.max_age, httponly=True, samesite='Lax')
+    return response
+
+def get_progress_data():
+    if 'user_id' not in session:
+        return registry.summary(0)
+    return registry.summary(load_progress_mask())
+
 if __name__ == "__main__":
     app.run(debug=True) 
\ No newline at end of file
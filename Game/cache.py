@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import threading
+import time
+
+class ProgressCache:
+    """In-memory LRU cache of user progress bitmasks with a time-to-live.
+
+    Entries are evicted once they are older than ``ttl`` seconds or when
+    more than ``maxsize`` users are cached.
+
+    A read-through takes ``version(user_id)`` before querying the database
+    and passes it to ``set``. ``add_bits`` and ``invalidate`` bump the
+    version once a write has committed, so a mask read before a concurrent
+    write is dropped instead of being cached for the whole TTL. Versions
+    live in a fixed number of stripes shared between users; a collision
+    only costs a skipped ``set``.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300.0, stripes=1024):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = [0] * stripes
+        self._lock = threading.Lock()
+
+    def _stripe(self, user_id):
+        return hash(user_id) % len(self._versions)
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions[self._stripe(user_id)]
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, progress = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return progress
+
+    def set(self, user_id, progress, version=None):
+        with self._lock:
+            if version is not None and version != self._versions[self._stripe(user_id)]:
+                # Written since this mask was read; the next read fetches it again
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, progress)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def add_bits(self, user_id, bits):
+        # Patch a cached mask in place; absent entries are left for the next read
+        with self._lock:
+            self._versions[self._stripe(user_id)] += 1
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0], entry[1] | bits)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[self._stripe(user_id)] += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+            }
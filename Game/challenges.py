@@ -0,0 +1,90 @@
+from functools import lru_cache
+import hashlib
+import hmac
+import json
+
+class Challenge:
+    def __init__(self, id, title, template, answer_sha256, headers=None, context=None):
+        self.id = id
+        self.title = title
+        self.template = template
+        self.answer_sha256 = answer_sha256
+        self.headers = headers or {}
+        self.context = context or {}
+        self.bit = 1 << (id - 1)
+        self.next_url = '/victory'
+
+class ChallengeRegistry:
+    """The set of challenges, loaded once from a declarative JSON file.
+
+    A user's progress is a bitmask with bit ``id - 1`` set for every
+    completed challenge, so completing, checking and counting challenges
+    are integer operations whatever the number of challenges. Submitted
+    answers are checked against SHA-256 digests, so the file holds no
+    answer field to copy. It isn't secret, though: the ``headers`` and
+    ``context`` a challenge serves are its clues (challenge 2's answer is
+    the X-Secret-Code header, challenge 3's is the base64 in
+    ``secret_message``), just as challenge 1's sits in its template.
+    """
+
+    def __init__(self, challenges):
+        self.challenges = sorted(challenges, key=lambda challenge: challenge.id)
+        self.by_id = {challenge.id: challenge for challenge in self.challenges}
+        if len(self.by_id) != len(self.challenges):
+            raise ValueError('Duplicate challenge id')
+
+        for current, following in zip(self.challenges, self.challenges[1:]):
+            current.next_url = f'/challenge{following.id}'
+
+        self.full_mask = 0
+        for challenge in self.challenges:
+            self.full_mask |= challenge.bit
+
+        # Bound the summary cache; with many challenges there are far more
+        # possible masks than users actually in flight
+        self.summary = lru_cache(maxsize=4096)(self._summary)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls([Challenge(**entry) for entry in json.load(f)])
+
+    def __iter__(self):
+        return iter(self.challenges)
+
+    def __len__(self):
+        return len(self.challenges)
+
+    def ids(self):
+        return tuple(self.by_id)
+
+    def verify(self, challenge_id, code):
+        challenge = self.by_id.get(challenge_id)
+        if challenge is None or not code:
+            return False
+        digest = hashlib.sha256(code.encode()).hexdigest()
+        return hmac.compare_digest(digest, challenge.answer_sha256)
+
+    def is_complete(self, mask):
+        return mask & self.full_mask == self.full_mask
+
+    def first_incomplete(self, mask):
+        # Lowest unset bit of the mask, as a challenge id
+        return ((~mask) & (mask + 1)).bit_length()
+
+    def _summary(self, mask):
+        completed = (mask & self.full_mask).bit_count()
+        total = len(self.challenges)
+        return {
+            'completed': completed,
+            'total': total,
+            'percent': (completed / total) * 100 if total > 0 else 0,
+            'challenges': [
+                {
+                    'number': challenge.id,
+                    'complete': bool(mask & challenge.bit),
+                    'icon': '✅' if mask & challenge.bit else '⏳'
+                }
+                for challenge in self.challenges
+            ]
+        }
@@ -0,0 +1,54 @@
+import os
+import secrets
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Config:
+    # Signs sessions and progress tokens. Every worker process and node must
+    # share it; the random fallback only works for a single process
+    SECRET_KEY = os.environ.get('GAME_SECRET_KEY') or secrets.token_hex(32)
+
+    # Keep each user's progress in a signed cookie so page views don't need a
+    # database read; the token is re-read from the database after PROGRESS_TOKEN_MAX_AGE.
+    # game.py reads the same variable with the same default.
+    STATELESS_PROGRESS = os.environ.get('GAME_STATELESS_PROGRESS', '1').lower() in ('1', 'true', 'yes')
+    PROGRESS_TOKEN_MAX_AGE = int(os.environ.get('GAME_PROGRESS_TOKEN_MAX_AGE', 7 * 24 * 3600))
+
+    # Path to the SQLite database file
+    DATABASE_PATH = os.environ.get('GAME_DATABASE_PATH', 'game.db')
+
+    # Number of pooled SQLite connections (0 opens a new connection per call)
+    DATABASE_POOL_SIZE = int(os.environ.get('GAME_DATABASE_POOL_SIZE', 8))
+
+    # Size and time-to-live (seconds) of the in-memory progress cache. With
+    # STATELESS_PROGRESS a valid token answers first, so the cache only serves
+    # logins, expired tokens and other cookie-less requests, and its hit rate
+    # in /stats/cache stays low
+    PROGRESS_CACHE_SIZE = int(os.environ.get('GAME_PROGRESS_CACHE_SIZE', 4096))
+    PROGRESS_CACHE_TTL = float(os.environ.get('GAME_PROGRESS_CACHE_TTL', 300))
+
+    # werkzeug hash method, e.g. 'scrypt:16384:8:1' or 'pbkdf2:sha256:600000'.
+    # Existing hashes are upgraded on the next successful login when this changes.
+    PASSWORD_HASH_METHOD = os.environ.get('GAME_PASSWORD_HASH_METHOD', 'scrypt')
+
+    # Worker processes used for hashing (0 hashes on the request thread) and how
+    # many hashes may be queued before requests are turned away with a 503
+    PASSWORD_HASH_WORKERS = int(os.environ.get('GAME_PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('GAME_PASSWORD_HASH_MAX_PENDING', 64))
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('GAME_PASSWORD_HASH_RETRY_AFTER', 1))
+
+    # Group-commit challenge completions: collect writes for this many seconds
+    # (up to the batch size) and commit them in one transaction
+    PROGRESS_GROUP_COMMIT = os.environ.get('GAME_PROGRESS_GROUP_COMMIT', '1').lower() in ('1', 'true', 'yes')
+    PROGRESS_FLUSH_INTERVAL = float(os.environ.get('GAME_PROGRESS_FLUSH_INTERVAL', 0.002))
+    PROGRESS_FLUSH_MAX_BATCH = int(os.environ.get('GAME_PROGRESS_FLUSH_MAX_BATCH', 512))
+
+    # Rows on the leaderboard and first finishers listed per challenge
+    LEADERBOARD_SIZE = int(os.environ.get('GAME_LEADERBOARD_SIZE', 10))
+    LEADERBOARD_FIRST_SOLVERS = int(os.environ.get('GAME_LEADERBOARD_FIRST_SOLVERS', 3))
+
+    # Declarative list of challenges the app serves routes for
+    CHALLENGES_PATH = os.environ.get('GAME_CHALLENGES_PATH', os.path.join(BASE_DIR, 'challenges.json'))
+
+    # Per-request timing: Server-Timing headers and a Prometheus /metrics endpoint
+    INSTRUMENTATION = os.environ.get('GAME_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full and the caller should retry later."""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing queue is full')
+        self.retry_after = retry_after
+
+def method_prefix(method):
+    # werkzeug expands defaults ('scrypt' -> 'scrypt:32768:8:1'), so take the
+    # prefix of a hash actually produced with the method
+    return generate_password_hash('', method).split('$', 1)[0]
+
+class PasswordHasher:
+    """Runs password hashing off the request thread in a bounded process pool.
+
+    ``method`` is passed straight to werkzeug's ``generate_password_hash``,
+    e.g. ``'scrypt:16384:8:1'`` or ``'pbkdf2:sha256:600000'``, so the cost can
+    be tuned per deployment. At most ``max_pending`` hashes may be queued or
+    running at once; beyond that ``HasherBusy`` is raised immediately instead
+    of letting requests pile up behind the CPU. ``workers=0`` hashes inline.
+
+    Workers are spawned rather than forked: forking a threaded server can
+    copy a lock some other thread holds and deadlock the child. Call
+    ``start`` at startup so the first login doesn't wait for them.
+    """
+
+    def __init__(self, method='scrypt', workers=None, max_pending=64, retry_after=1):
+        self.method = method
+        self.workers = workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._method_prefix = None
+        self._prefix_future = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def start(self):
+        """Start the worker processes and work out the method's hash prefix."""
+        # Spawned workers re-import the main module; they mustn't start pools too
+        if multiprocessing.parent_process() is not None:
+            return self
+        if self.workers != 0 and self._prefix_future is None:
+            self._prefix_future = self._get_executor().submit(method_prefix, self.method)
+        return self
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(self.retry_after)
+
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # The prefix costs a full hash, so with a pool it is worked out in the
+        # background and nothing needs rehashing until it is known
+        if self._method_prefix is None:
+            if self.workers == 0:
+                self._method_prefix = method_prefix(self.method)
+            else:
+                self.start()
+                future = self._prefix_future
+                if future is None or not future.done():
+                    return False
+                self._method_prefix = future.result()
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._prefix_future = None
@@ -0,0 +1,90 @@
+import hashlib
+import os
+from flask import Response, render_template, request
+
+class HttpCache:
+    """ETags for rendered pages and fingerprinted URLs for static assets.
+
+    Page ETags are derived from the template set, the static files and the
+    render context (the user's progress, their profile, ...), so a repeat
+    GET with a matching ``If-None-Match`` gets a 304 without rendering
+    anything. The static files count because pages embed their ``v=``
+    fingerprints; otherwise a changed stylesheet would keep being answered
+    with a 304 for a page that still links the old, immutable URL.
+    Static URLs built with ``url_for('static', ...)`` get a ``v=<hash>``
+    query parameter and are served with a long-lived immutable
+    ``Cache-Control`` header.
+    """
+
+    def __init__(self, app=None):
+        self._static_hashes = {}
+        self.templates_version = ''
+        self.static_version = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.templates_version = self._hash_tree(os.path.join(app.root_path, app.template_folder))
+        if app.static_folder:
+            self.static_version = self._hash_tree(app.static_folder)
+        app.url_defaults(self._add_static_version)
+        app.after_request(self._cache_static)
+        app.extensions['http_cache'] = self
+
+    def _hash_tree(self, folder):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, folder).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def static_hash(self, filename):
+        if filename not in self._static_hashes:
+            path = os.path.join(self.app.static_folder, filename)
+            try:
+                with open(path, 'rb') as f:
+                    self._static_hashes[filename] = hashlib.sha256(f.read()).hexdigest()[:12]
+            except OSError:
+                self._static_hashes[filename] = None
+        return self._static_hashes[filename]
+
+    def _add_static_version(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = self.static_hash(values['filename'])
+            if version:
+                values['v'] = version
+
+    def _cache_static(self, response):
+        if request.endpoint == 'static' and request.args.get('v'):
+            # The URL changes whenever the file does, so it never needs revalidating
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        return response
+
+    def page_etag(self, template_name, context):
+        digest = hashlib.sha256()
+        digest.update(self.templates_version.encode())
+        digest.update(self.static_version.encode())
+        digest.update(template_name.encode())
+        digest.update(repr(sorted(context.items())).encode())
+        return digest.hexdigest()[:32]
+
+    def render(self, template_name, **context):
+        # Only for templates whose output depends on nothing but their context;
+        # pages showing flashed messages must keep using render_template
+        etag = self.page_etag(template_name, context)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(render_template(template_name, **context))
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
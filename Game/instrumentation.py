@@ -0,0 +1,207 @@
+from collections import defaultdict
+import sqlite3
+import threading
+import time
+from flask import before_render_template, g, has_request_context, request, Response, template_rendered
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phases timed inside a request, in Server-Timing order
+PHASES = ('sql', 'render', 'hash')
+
+def _add_timing(phase, seconds, count=1):
+    if has_request_context() and 'timings' in g:
+        timing = g.timings[phase]
+        timing[0] += seconds
+        timing[1] += count
+
+def timed_connection_class():
+    """sqlite3.Connection subclass that adds every query's duration to the
+    current request's 'sql' timing."""
+
+    class TimedCursor(sqlite3.Cursor):
+        def execute(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().execute(*args)
+            finally:
+                _add_timing('sql', time.perf_counter() - start)
+
+        def executemany(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().executemany(*args)
+            finally:
+                _add_timing('sql', time.perf_counter() - start)
+
+    class TimedConnection(sqlite3.Connection):
+        def cursor(self, factory=TimedCursor):
+            return super().cursor(factory)
+
+        # Connection.execute doesn't go through cursor(), so time it separately
+        def execute(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().execute(*args)
+            finally:
+                _add_timing('sql', time.perf_counter() - start)
+
+        def executemany(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().executemany(*args)
+            finally:
+                _add_timing('sql', time.perf_counter() - start)
+
+    return TimedConnection
+
+class Metrics:
+    """Process-wide request metrics, rendered in the Prometheus text format."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Optional ProgressWriter whose group-commit counters are exported too
+        self.writer = None
+        self._lock = threading.Lock()
+        # (endpoint, method, status) -> [bucket counts..., +Inf count, sum]
+        self._latency = {}
+        # (phase, endpoint) -> [seconds, count]
+        self._phases = defaultdict(lambda: [0.0, 0])
+
+    def observe(self, endpoint, method, status, seconds, timings):
+        key = (endpoint, method, str(status))
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+            for phase, (phase_seconds, count) in timings.items():
+                total = self._phases[(phase, endpoint)]
+                total[0] += phase_seconds
+                total[1] += count
+
+    def render(self):
+        lines = [
+            '# HELP game_request_duration_seconds Wall time per request.',
+            '# TYPE game_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            latency = sorted(self._latency.items())
+            phases = sorted(self._phases.items())
+        for (endpoint, method, status), histogram in latency:
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            for bound, count in zip(self.buckets, histogram):
+                lines.append(f'game_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'game_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+            lines.append(f'game_request_duration_seconds_count{{{labels}}} {histogram[-2]}')
+            lines.append(f'game_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+
+        for phase in PHASES:
+            rows = [(endpoint, total) for (name, endpoint), total in phases if name == phase]
+            noun = 'queries' if phase == 'sql' else 'calls'
+            lines.append(f'# HELP game_{phase}_seconds_total Time spent in {phase} per endpoint.')
+            lines.append(f'# TYPE game_{phase}_seconds_total counter')
+            lines.extend(f'game_{phase}_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}'
+                         for endpoint, (seconds, _) in rows)
+            lines.append(f'# HELP game_{phase}_{noun}_total Number of {phase} {noun} per endpoint.')
+            lines.append(f'# TYPE game_{phase}_{noun}_total counter')
+            lines.extend(f'game_{phase}_{noun}_total{{endpoint="{endpoint}"}} {count}'
+                         for endpoint, (_, count) in rows)
+
+        if self.writer is not None:
+            for name, value, help_text in (
+                    ('commits', self.writer.commits, 'Group commits made by the progress writer.'),
+                    ('writes', self.writer.writes, 'Writes committed by the progress writer.'),
+                    ('flush_seconds', self.writer.flush_seconds, 'Time the progress writer spent committing.')):
+                lines.append(f'# HELP game_progress_writer_{name}_total {help_text}')
+                lines.append(f'# TYPE game_progress_writer_{name}_total counter')
+                lines.append(f'game_progress_writer_{name}_total {value:g}')
+        return '\n'.join(lines) + '\n'
+
+class Instrumentation:
+    """Opt-in timing of requests, SQL, template rendering and password hashing.
+
+    When enabled, every response carries a ``Server-Timing`` header with the
+    time spent in each phase and ``/metrics`` serves the totals. SQL is timed
+    by handing ``connection_factory`` to ``Database`` and hashing by wrapping
+    the hasher with ``instrument_hasher``. Group-committed writes run on the
+    writer's own thread, so ``instrument_writer`` times each request's wait
+    for its commit as SQL instead. When disabled nothing is hooked up
+    and ``connection_factory`` is None, so requests run exactly as before.
+    """
+
+    def __init__(self, app=None, enabled=False):
+        self.enabled = enabled
+        self.metrics = Metrics()
+        self.connection_factory = timed_connection_class() if enabled else None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.add_url_rule('/metrics', endpoint='metrics', view_func=self._metrics_view)
+
+    def instrument_hasher(self, hasher):
+        if not self.enabled:
+            return hasher
+        for name in ('hash', 'verify'):
+            setattr(hasher, name, self._timed('hash', getattr(hasher, name)))
+        return hasher
+
+    def instrument_writer(self, writer):
+        if not self.enabled or writer is None:
+            return writer
+        writer.execute = self._timed('sql', writer.execute)
+        self.metrics.writer = writer
+        return writer
+
+    def _timed(self, phase, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _add_timing(phase, time.perf_counter() - start)
+        return wrapper
+
+    def _start(self):
+        g.request_started = time.perf_counter()
+        g.timings = defaultdict(lambda: [0.0, 0])
+
+    def _render_started(self, sender, template, context, **extra):
+        g.render_started = time.perf_counter()
+
+    def _render_finished(self, sender, template, context, **extra):
+        started = g.pop('render_started', None)
+        if started is not None:
+            _add_timing('render', time.perf_counter() - started)
+
+    def _finish(self, response):
+        if 'request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        timings = g.timings
+        self.metrics.observe(request.endpoint or 'unknown', request.method, response.status_code,
+                             elapsed, timings)
+
+        entries = []
+        for phase in PHASES:
+            if phase in timings:
+                seconds, count = timings[phase]
+                entries.append(f'{phase};dur={seconds * 1000:.2f};desc="{count}x"')
+        entries.append(f'total;dur={elapsed * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+        return response
+
+    def _metrics_view(self):
+        return Response(self.metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,54 +1,353 @@
+from contextlib import contextmanager
 from datetime import datetime
+import queue
 import sqlite3
 import json
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+from hashing import HasherBusy, PasswordHasher
+
+class ConnectionPool:
+    """Hands out reusable SQLite connections to request threads.
+
+    Connections are opened lazily up to ``size`` and returned to the pool
+    after use, so a request no longer pays for ``sqlite3.connect`` and the
+    PRAGMA setup on every query. Each connection keeps its own prepared
+    statement cache (``cached_statements``), which is what makes reusing
+    connections pay off for the handful of queries the game issues.
+
+    A ``size`` of 0 disables pooling and opens a fresh connection per call,
+    which is only useful for comparing against the pooled behaviour.
+    """
+
+    def __init__(self, db_path, size=8, timeout=10.0, cached_statements=128,
+                 factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path,
+                               timeout=self.timeout,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements,
+                               factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+
+        # Pool is exhausted, wait for another request to give one back
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError('Timed out waiting for a pooled connection')
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        if self.size <= 0:
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        conn = self._acquire()
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            # Constraint violations and lock timeouts leave the connection fine;
+            # only a connection that can't run a query any more is thrown away
+            if self._usable(conn, e):
+                self._release(conn)
+            else:
+                self._discard(conn)
+            raise
+        except BaseException:
+            self._release(conn)
+            raise
+        else:
+            self._release(conn)
+
+    def _usable(self, conn, error):
+        if getattr(error, 'sqlite_errorname', None) in ('SQLITE_CORRUPT', 'SQLITE_NOTADB'):
+            return False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute('SELECT 1')
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        conn.close()
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+# Bumped whenever init_db learns a new migration
+SCHEMA_VERSION = 3
+
+CHALLENGE_IDS = (1, 2, 3)
 
 class Database:
-    def __init__(self, db_path='game.db'):
+    def __init__(self, db_path='game.db', pool_size=8, progress_cache=None,
+                 challenge_ids=CHALLENGE_IDS, hasher=None, connection_factory=None,
+                 writer=None):
         self.db_path = db_path
+        self.hasher = hasher if hasher is not None else PasswordHasher(workers=0)
+        self.challenge_ids = tuple(challenge_ids)
+        self.pool = ConnectionPool(db_path, size=pool_size,
+                                   factory=connection_factory or sqlite3.Connection)
+        self.progress_cache = progress_cache
+        # Optional ProgressWriter that group-commits challenge completions
+        self.writer = writer
         self.init_db()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return self.pool.connection()
 
     def init_db(self):
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        # Create users table with authentication fields
+        with self.get_connection() as conn:
+            c = conn.cursor()
+
+            # Create users table with authentication fields
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                progress TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            # One row per completed challenge, replacing the JSON blob in users.progress
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS challenge_progress (
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                challenge_id INTEGER NOT NULL,
+                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, challenge_id)
+            ) WITHOUT ROWID
+            ''')
+            c.execute('''
+            CREATE INDEX IF NOT EXISTS idx_challenge_progress_challenge
+            ON challenge_progress (challenge_id, completed_at)
+            ''')
+
+            self._create_stats(c)
+
+            version = c.execute('PRAGMA user_version').fetchone()[0]
+            if version < 1:
+                self._migrate_progress_json(c)
+            if version < 3:
+                # Version 3 changed how solve_seconds treats same-second completions
+                c.execute('DROP TRIGGER IF EXISTS trg_challenge_progress_stats')
+                self._create_stats(c)
+                self._rebuild_stats(c)
+            if version < SCHEMA_VERSION:
+                c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+            conn.commit()
+
+    def _migrate_progress_json(self, c):
+        # Copy completions out of the legacy users.progress JSON column. The
+        # blob has no per-challenge timestamps, so updated_at is the best guess.
+        rows = c.execute('''
+        SELECT id, progress, updated_at FROM users WHERE progress IS NOT NULL
+        ''').fetchall()
+
+        keys = {f'challenge{i}': i for i in self.challenge_ids}
+        completions = []
+        for row in rows:
+            try:
+                progress = json.loads(row['progress'])
+            except ValueError:
+                continue
+            if not isinstance(progress, dict):
+                continue
+            # Keys for challenges that no longer exist are dropped
+            for key, complete in progress.items():
+                if complete and key in keys:
+                    completions.append((row['id'], keys[key], row['updated_at']))
+
+        c.executemany('''
+        INSERT OR IGNORE INTO challenge_progress (user_id, challenge_id, completed_at)
+        VALUES (?, ?, ?)
+        ''', completions)
+
+    def _create_stats(self, c):
+        # Aggregates for the leaderboard, kept current by triggers so every
+        # write path (pooled connections, the group-commit writer, the JSON
+        # migration) updates them in the same transaction as the completion
         c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            progress TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+            completed INTEGER NOT NULL,
+            last_completed_at TIMESTAMP NOT NULL
         )
         ''')
-        
-        conn.commit()
-        conn.close()
+        c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_stats_rank
+        ON user_stats (completed DESC, last_completed_at, user_id)
+        ''')
+
+        # solve_seconds sums the time from each user's latest strictly earlier
+        # completion (or registration) to this one. Completions in the same
+        # second all count from the same starting point, so the trigger and
+        # _rebuild_stats agree however ties were inserted.
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS challenge_stats (
+            challenge_id INTEGER PRIMARY KEY,
+            completions INTEGER NOT NULL,
+            solve_seconds REAL NOT NULL,
+            first_completed_at TIMESTAMP NOT NULL
+        )
+        ''')
+
+        # Number of users who have completed exactly ``completed`` challenges
+        c.execute('''
+        CREATE TABLE IF NOT EXISTS completion_histogram (
+            completed INTEGER PRIMARY KEY,
+            users INTEGER NOT NULL
+        )
+        ''')
+
+        c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_stats_insert AFTER INSERT ON users
+        BEGIN
+            INSERT INTO completion_histogram (completed, users) VALUES (0, 1)
+            ON CONFLICT (completed) DO UPDATE SET users = users + 1;
+        END
+        ''')
+        # Solve times of deleted users stay in the totals; rebuild_stats() drops them
+        c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_stats_delete BEFORE DELETE ON users
+        BEGIN
+            UPDATE completion_histogram SET users = users - 1
+            WHERE completed = COALESCE((SELECT completed FROM user_stats WHERE user_id = OLD.id), 0);
+            UPDATE challenge_stats SET completions = completions - 1
+            WHERE challenge_id IN (SELECT challenge_id FROM challenge_progress WHERE user_id = OLD.id);
+        END
+        ''')
+        c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_challenge_progress_stats AFTER INSERT ON challenge_progress
+        BEGIN
+            INSERT INTO challenge_stats (challenge_id, completions, solve_seconds, first_completed_at)
+            VALUES (NEW.challenge_id, 1,
+                    MAX(0, 86400 * (julianday(NEW.completed_at) - julianday(COALESCE(
+                        (SELECT MAX(completed_at) FROM challenge_progress
+                         WHERE user_id = NEW.user_id AND completed_at < NEW.completed_at),
+                        (SELECT created_at FROM users WHERE id = NEW.user_id),
+                        NEW.completed_at)))),
+                    NEW.completed_at)
+            ON CONFLICT (challenge_id) DO UPDATE SET
+                completions = completions + 1,
+                solve_seconds = solve_seconds + excluded.solve_seconds,
+                first_completed_at = MIN(first_completed_at, excluded.first_completed_at);
+
+            UPDATE completion_histogram SET users = users - 1
+            WHERE completed = COALESCE((SELECT completed FROM user_stats WHERE user_id = NEW.user_id), 0);
+            INSERT INTO completion_histogram (completed, users)
+            VALUES (COALESCE((SELECT completed FROM user_stats WHERE user_id = NEW.user_id), 0) + 1, 1)
+            ON CONFLICT (completed) DO UPDATE SET users = users + 1;
+
+            INSERT INTO user_stats (user_id, completed, last_completed_at)
+            VALUES (NEW.user_id, 1, NEW.completed_at)
+            ON CONFLICT (user_id) DO UPDATE SET
+                completed = completed + 1,
+                last_completed_at = MAX(last_completed_at, excluded.last_completed_at);
+        END
+        ''')
+
+    def _rebuild_stats(self, c):
+        # Recompute every aggregate from challenge_progress, e.g. for rows
+        # written before the triggers existed
+        c.execute('DELETE FROM user_stats')
+        c.execute('DELETE FROM challenge_stats')
+        c.execute('DELETE FROM completion_histogram')
+        c.execute('''
+        INSERT INTO user_stats (user_id, completed, last_completed_at)
+        SELECT user_id, COUNT(*), MAX(completed_at) FROM challenge_progress GROUP BY user_id
+        ''')
+        c.execute('''
+        INSERT INTO completion_histogram (completed, users)
+        SELECT COALESCE(user_stats.completed, 0), COUNT(*)
+        FROM users LEFT JOIN user_stats ON user_stats.user_id = users.id
+        GROUP BY 1
+        ''')
+        c.execute('''
+        INSERT INTO challenge_stats (challenge_id, completions, solve_seconds, first_completed_at)
+        SELECT challenge_id, COUNT(*),
+               SUM(MAX(0, 86400 * (julianday(completed_at) - julianday(previous_at)))),
+               MIN(completed_at)
+        FROM (
+            SELECT challenge_progress.challenge_id, challenge_progress.completed_at,
+                   COALESCE((SELECT MAX(earlier.completed_at) FROM challenge_progress AS earlier
+                             WHERE earlier.user_id = challenge_progress.user_id
+                               AND earlier.completed_at < challenge_progress.completed_at),
+                            users.created_at, challenge_progress.completed_at) AS previous_at
+            FROM challenge_progress JOIN users ON users.id = challenge_progress.user_id
+        )
+        GROUP BY challenge_id
+        ''')
+
+    def rebuild_stats(self):
+        with self.get_connection() as conn:
+            self._rebuild_stats(conn.cursor())
+            conn.commit()
 
     def register_user(self, username, password, email):
+        # Hash the password before storing
+        password_hash = self.hasher.hash(password)
+
         try:
-            conn = self.get_connection()
-            c = conn.cursor()
-            
-            # Hash the password before storing
-            password_hash = generate_password_hash(password)
-            initial_progress = json.dumps({'challenge1': False, 'challenge2': False, 'challenge3': False})
-            
-            c.execute('''
-            INSERT INTO users (username, password_hash, email, progress)
-            VALUES (?, ?, ?, ?)
-            ''', (username, password_hash, email, initial_progress))
-            
-            conn.commit()
-            conn.close()
+            with self.get_connection() as conn:
+                conn.execute('''
+                INSERT INTO users (username, password_hash, email)
+                VALUES (?, ?, ?)
+                ''', (username, password_hash, email))
+
+                conn.commit()
             return True, "Registration successful"
         except sqlite3.IntegrityError as e:
             if "username" in str(e):
@@ -58,50 +357,153 @@ class Database:
             return False, "Registration failed"
 
     def login_user(self, username, password):
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        c.execute('SELECT id, password_hash FROM users WHERE username = ?', (username,))
-        user = c.fetchone()
-        conn.close()
-        
-        if user and check_password_hash(user['password_hash'], password):
+        with self.get_connection() as conn:
+            user = conn.execute('SELECT id, password_hash FROM users WHERE username = ?',
+                                (username,)).fetchone()
+
+        if user and self.hasher.verify(user['password_hash'], password):
+            # Upgrade hashes made with an older cost setting while we know the
+            # password. Best effort: the login has already succeeded, so a busy
+            # hasher just leaves it for next time.
+            if self.hasher.needs_rehash(user['password_hash']):
+                try:
+                    self.update_password_hash(user['id'], self.hasher.hash(password))
+                except HasherBusy:
+                    pass
             return True, user['id']
         return False, "Invalid username or password"
 
+    def update_password_hash(self, user_id, password_hash):
+        with self.get_connection() as conn:
+            conn.execute('''
+            UPDATE users
+            SET password_hash = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''', (password_hash, user_id))
+
+            conn.commit()
+
+    def get_progress_mask(self, user_id):
+        # Bit (challenge_id - 1) is set for every completed challenge
+        if self.progress_cache is not None:
+            mask = self.progress_cache.get(user_id)
+            if mask is not None:
+                return mask
+            version = self.progress_cache.version(user_id)
+
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT challenge_id FROM challenge_progress WHERE user_id = ?',
+                                (user_id,)).fetchall()
+
+        mask = 0
+        for row in rows:
+            mask |= 1 << (row['challenge_id'] - 1)
+        if self.progress_cache is not None:
+            self.progress_cache.set(user_id, mask, version)
+        return mask
+
     def get_user_progress(self, user_id):
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        c.execute('SELECT progress FROM users WHERE id = ?', (user_id,))
-        result = c.fetchone()
-        
-        conn.close()
-        
-        if result:
-            return json.loads(result['progress'])
-        return {'challenge1': False, 'challenge2': False, 'challenge3': False}
+        mask = self.get_progress_mask(user_id)
+        return {f'challenge{i}': bool(mask & (1 << (i - 1))) for i in self.challenge_ids}
+
+    def complete_challenge(self, user_id, challenge_id):
+        # Idempotent: completing a challenge twice keeps the first timestamp
+        sql = '''
+        INSERT OR IGNORE INTO challenge_progress (user_id, challenge_id)
+        VALUES (?, ?)
+        '''
+        if self.writer is not None:
+            rowcount = self.writer.execute(sql, (user_id, challenge_id))
+        else:
+            with self.get_connection() as conn:
+                rowcount = conn.execute(sql, (user_id, challenge_id)).rowcount
+                conn.commit()
+
+        if self.progress_cache is not None:
+            self.progress_cache.add_bits(user_id, 1 << (challenge_id - 1))
+        return rowcount > 0
 
     def save_user_progress(self, user_id, progress):
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        progress_json = json.dumps(progress)
-        c.execute('''
-        UPDATE users 
-        SET progress = ?, updated_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-        ''', (progress_json, user_id))
-        
-        conn.commit()
-        conn.close()
+        # Same {'challenge1': True, ...} shape as get_user_progress returns
+        keys = {f'challenge{i}': i for i in self.challenge_ids}
+        unknown = sorted(set(progress) - set(keys))
+        if unknown:
+            raise ValueError(f'Unknown challenge keys: {", ".join(map(str, unknown))}')
+        completions = [(user_id, keys[key]) for key, complete in progress.items() if complete]
+
+        with self.get_connection() as conn:
+            conn.executemany('''
+            INSERT OR IGNORE INTO challenge_progress (user_id, challenge_id)
+            VALUES (?, ?)
+            ''', completions)
+
+            conn.commit()
+
+        if self.progress_cache is not None:
+            self.progress_cache.invalidate(user_id)
+
+    def get_challenge_completions(self, challenge_id, limit=None):
+        # In completion order; a limit reads only that many index entries
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+            SELECT users.id, users.username, challenge_progress.completed_at
+            FROM challenge_progress
+            JOIN users ON users.id = challenge_progress.user_id
+            WHERE challenge_progress.challenge_id = ?
+            ORDER BY challenge_progress.completed_at
+            LIMIT ?
+            ''', (challenge_id, -1 if limit is None else limit)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def get_leaderboard(self, limit=10):
+        # Most challenges first, then whoever got there first; walks the
+        # idx_user_stats_rank index, so the cost is the limit, not the user count
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+            SELECT users.username, user_stats.completed, user_stats.last_completed_at
+            FROM user_stats
+            JOIN users ON users.id = user_stats.user_id
+            ORDER BY user_stats.completed DESC, user_stats.last_completed_at, user_stats.user_id
+            LIMIT ?
+            ''', (limit,)).fetchall()
+
+        return [dict(row, rank=rank) for rank, row in enumerate(rows, 1)]
+
+    def get_challenge_stats(self):
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+            SELECT challenge_id, completions, solve_seconds, first_completed_at
+            FROM challenge_stats ORDER BY challenge_id
+            ''').fetchall()
+
+        stats = {challenge_id: {'challenge_id': challenge_id, 'completions': 0,
+                                'avg_solve_seconds': None, 'first_completed_at': None}
+                 for challenge_id in self.challenge_ids}
+        for row in rows:
+            stats[row['challenge_id']] = {
+                'challenge_id': row['challenge_id'],
+                'completions': row['completions'],
+                'avg_solve_seconds': row['solve_seconds'] / row['completions'] if row['completions'] else None,
+                'first_completed_at': row['first_completed_at'],
+            }
+        return list(stats.values())
+
+    def get_completion_histogram(self):
+        # {challenges completed: number of users}, registered users included
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT completed, users FROM completion_histogram ORDER BY completed').fetchall()
+
+        return {row['completed']: row['users'] for row in rows if row['users']}
+
+    def forget_user(self, user_id):
+        # Drop anything cached for the user, e.g. when they log out
+        if self.progress_cache is not None:
+            self.progress_cache.invalidate(user_id)
 
     def get_user_by_id(self, user_id):
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        c.execute('SELECT username, email FROM users WHERE id = ?', (user_id,))
-        user = c.fetchone()
-        
-        conn.close()
-        return dict(user) if user else None 
\ No newline at end of file
+        with self.get_connection() as conn:
+            user = conn.execute('SELECT username, email FROM users WHERE id = ?',
+                                (user_id,)).fetchone()
+
+        return dict(user) if user else None
@@ -0,0 +1,33 @@
+from itsdangerous import BadSignature, TimestampSigner
+
+class ProgressTokens:
+    """Compact signed tokens carrying a user's completion bitmask.
+
+    A token looks like ``<user id>-<mask>.<timestamp>.<signature>`` (about
+    40 bytes) and is checked with the shared ``SECRET_KEY`` alone, so any
+    worker process or node can trust it without asking the database.
+    Tokens are bound to the user they were issued for and expire after
+    ``max_age`` seconds, after which progress is read from the database
+    again.
+    """
+
+    def __init__(self, secret_key, max_age=7 * 24 * 3600, salt='game.progress'):
+        self.max_age = max_age
+        self._signer = TimestampSigner(secret_key, salt=salt)
+
+    def dumps(self, user_id, mask):
+        return self._signer.sign(f'{user_id:x}-{mask:x}').decode()
+
+    def loads(self, token, user_id):
+        """Return the mask in ``token``, or None if it's invalid, expired or
+        issued for another user."""
+        if not token:
+            return None
+        try:
+            value = self._signer.unsign(token, max_age=self.max_age).decode()
+            token_user, mask = (int(part, 16) for part in value.split('-'))
+        except (BadSignature, ValueError):
+            return None
+        if token_user != user_id:
+            return None
+        return mask
@@ -0,0 +1,126 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import queue
+import sqlite3
+import threading
+import time
+
+class ProgressWriter:
+    """Group-commits small writes from many request threads.
+
+    SQLite has a single writer lock, so when a whole class submits the same
+    answer at once, one commit per request means a queue of lock handoffs
+    and fsyncs, and eventually "database is locked". Requests instead hand
+    their statement to ``execute``, which blocks until a background thread
+    has committed it. The thread collects whatever arrives within
+    ``flush_interval`` seconds (up to ``max_batch`` writes) and commits
+    them in one transaction, so the ack a request gets is durable.
+    ``flush_interval=0`` commits as soon as the previous batch is done,
+    batching only what queued up in the meantime.
+
+    Each write runs inside its own savepoint, so one failing statement
+    raises in its own request without rolling back the rest of the batch.
+    ``connection_factory`` is the connection class, as for ``Database``;
+    ``commits``, ``writes`` and ``flush_seconds`` count the work done so far.
+    """
+
+    def __init__(self, db_path, flush_interval=0.002, max_batch=512, timeout=10.0,
+                 synchronous='FULL', connection_factory=None):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.connection_factory = connection_factory
+        self.commits = 0
+        self.writes = 0
+        self.flush_seconds = 0.0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='progress-writer', daemon=True)
+        self._thread.start()
+
+    def execute(self, sql, params=()):
+        """Run one write statement and return its rowcount once it is committed."""
+        if self._closed:
+            raise RuntimeError('ProgressWriter is closed')
+        future = Future()
+        self._queue.put((sql, params, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise sqlite3.OperationalError('Timed out waiting for the progress writer')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None,
+                               factory=self.connection_factory or sqlite3.Connection)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(conn, batch)
+        conn.close()
+
+    def _flush(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            self._commit(conn, batch)
+        finally:
+            self.flush_seconds += time.perf_counter() - start
+
+    def _commit(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for sql, params, future in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    rowcount = conn.execute(sql, params).rowcount
+                except sqlite3.Error as e:
+                    conn.execute('ROLLBACK TO write')
+                    results.append((future, None, e))
+                else:
+                    results.append((future, rowcount, None))
+                conn.execute('RELEASE write')
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.commits += 1
+        self.writes += len(batch)
+        # Only acknowledge once the transaction is on disk
+        for future, rowcount, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rowcount)
+
+    def close(self):
+        """Commit everything already queued and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
@@ -0,0 +1,124 @@
+"""Loose per-fetch HTML files vs scraping.archive's deduplicated zstd archive.
+
+Simulates ``--crawls`` repeated crawls of the books fixture site
+(catalogue pages plus ``--pages`` product pages); between crawls
+``--churn`` of the product pages change price. Each crawl is saved three
+ways: one raw ``.html`` file per fetch, which is what the notebook does but
+keeping history; one gzip'd file per fetch; and a ``PageArchive``. It then
+times reading random single pages and re-reading every latest page, as an
+offline parser re-run would.
+
+Usage: python benchmarks/archive.py [--pages 1000] [--crawls 5] [--churn 0.1]
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import book_page, catalogue_page
+from scraping.archive import PageArchive
+
+BASE = 'https://books.toscrape.com'
+
+
+def crawl(n_pages, crawl_no, churn, rng):
+    """``(url, body)`` for one crawl of the site, with some prices changed."""
+    for page in range(1, n_pages // 20 + 2):
+        yield f'{BASE}/catalogue/page-{page}.html', catalogue_page(page, n_pages)
+    for i in range(n_pages):
+        body = book_page(i)
+        if crawl_no and rng.random() < churn:
+            body = re.sub(rb'\xc2\xa3\d+\.\d\d', f'£{rng.randint(1000, 6000) / 100:.2f}'.encode(), body)
+        yield f'{BASE}/catalogue/book-{i}/index.html', body
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--crawls', type=int, default=5)
+    parser.add_argument('--churn', type=float, default=0.1)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = os.path.join(tmp, 'raw')
+        gzip_dir = os.path.join(tmp, 'gzip')
+        os.makedirs(raw_dir)
+        os.makedirs(gzip_dir)
+        timings = {'raw files': 0.0, 'gzip files': 0.0, 'archive': 0.0}
+        fetched = 0
+        latest = {}
+        rng = random.Random(0)
+
+        archive_path = os.path.join(tmp, 'books.archive')
+        with PageArchive(archive_path) as archive:
+            for crawl_no in range(args.crawls):
+                for url, body in crawl(args.pages, crawl_no, args.churn, rng):
+                    fetched += len(body)
+                    name = f'{hashlib.sha1(url.encode()).hexdigest()}-{crawl_no}.html'
+                    latest[url] = name
+
+                    start = time.perf_counter()
+                    with open(os.path.join(raw_dir, name), 'wb') as f:
+                        f.write(body)
+                    timings['raw files'] += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    with gzip.open(os.path.join(gzip_dir, name + '.gz'), 'wb') as f:
+                        f.write(body)
+                    timings['gzip files'] += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    archive.put(url, body)
+                    timings['archive'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            archive.checkpoint()
+            timings['archive'] += time.perf_counter() - start
+
+        # Reopened so the index's write-ahead log has been folded in
+        with PageArchive(archive_path) as archive:
+            print(f'fetched {fetched / 1e6:.1f} MB over {args.crawls} crawls')
+            sizes = {'raw files': directory_size(raw_dir), 'gzip files': directory_size(gzip_dir),
+                     'archive': directory_size(archive.path)}
+            for name, size in sizes.items():
+                print(f'{name:>10}: {size / 1e6:7.2f} MB on disk ({fetched / size:5.1f}x), '
+                      f'write {timings[name]:.2f}s')
+            print(f'   archive: {archive.stats()}')
+
+            urls = list(latest)
+            sample = [rng.choice(urls) for _ in range(args.reads)]
+            readers = {
+                'raw files': lambda url: open(os.path.join(raw_dir, latest[url]), 'rb').read(),
+                'gzip files': lambda url: gzip.open(os.path.join(gzip_dir, latest[url] + '.gz')).read(),
+                'archive': archive.read,
+            }
+            for name, read in readers.items():
+                start = time.perf_counter()
+                for url in sample:
+                    read(url)
+                random_ms = (time.perf_counter() - start) / len(sample) * 1000
+                start = time.perf_counter()
+                if name == 'archive':
+                    total = sum(len(body) for _, body in archive.scan())
+                else:
+                    total = sum(len(read(url)) for url in urls)
+                elapsed = time.perf_counter() - start
+                print(f'{name:>10}: random read {random_ms:.3f} ms/page, '
+                      f'full re-read {total / 1e6 / elapsed:.0f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
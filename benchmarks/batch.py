@@ -0,0 +1,70 @@
+"""Autocomplete batch client against a local stub API.
+
+Compares the notebook's approach (a fresh requests.get per name, results
+collected in memory) with scraping.batch.BatchClient in unordered and
+ordered modes.
+
+Usage: python benchmarks/batch.py [--names 5000] [--workers 32] [--latency 0.02]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+from fixtures import FixtureServer, autocomplete_api
+from scraping.batch import BatchClient, fetch_autocomplete
+from scraping.sinks import JsonlSink
+
+
+def notebook_style(api_url, names, workers):
+    responses = []
+
+    def fetch_data(name):
+        response = requests.get(api_url, params={'term': name}, timeout=10)
+        if response.ok:
+            responses.append(response.json()['suggestions'][0])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        executor.map(fetch_data, names)
+    return len(responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    names = [f'Name{i}' for i in range(args.names)]
+    out_dir = tempfile.mkdtemp()
+
+    with FixtureServer(autocomplete_api(args.latency)) as server:
+        api_url = server.url + '/api/autocomplete'
+
+        start = time.perf_counter()
+        count = notebook_style(api_url, names, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f'{"notebook":>10}: {count / elapsed:8.1f} names/s')
+
+        def fetch(session, name):
+            return fetch_autocomplete(session, name, api_url=api_url)
+
+        for ordered in (False, True):
+            label = 'ordered' if ordered else 'unordered'
+            out = os.path.join(out_dir, f'{label}.jsonl')
+            client = BatchClient(fetch, workers=args.workers, ordered=ordered,
+                                 checkpoint=out + '.ckpt')
+            with JsonlSink(out) as sink:
+                stats = client.run(iter(names), sink)
+            print(f'{label:>10}: {stats.as_dict()["items_per_second"]:8.1f} names/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Pages per minute from a browser launched per page vs scraping.browser's pool.
+
+Serves JavaScript-rendered pages from the local fixture server. The
+per-call mode mirrors the notebook's ``google_search()``: start Chrome,
+load the page, sleep, quit. The pool mode reuses warm drivers and waits
+only until the results are in the DOM. Needs selenium and Chrome.
+
+Usage: python benchmarks/browser.py [--pages 40] [--size 4] [--sleep 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import FixtureServer, dynamic_site
+from scraping.browser import BrowserPool, By, launch_chrome, wait_for
+
+
+def scrape_results(driver, url):
+    driver.get(url)
+    wait_for(driver, '#results.loaded')
+    return [element.text for element in driver.find_elements(By.CSS_SELECTOR, '#results h3')]
+
+
+def per_call(urls, sleep):
+    for url in urls:
+        driver = launch_chrome()
+        try:
+            driver.get(url)
+            time.sleep(sleep)
+            driver.find_elements(By.CSS_SELECTOR, '#results h3')
+        finally:
+            driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--max-pages', type=int, default=50)
+    parser.add_argument('--sleep', type=float, default=5.0,
+                        help='fixed sleep per page in per-call mode, as in the notebook')
+    parser.add_argument('--per-call-pages', type=int, default=5,
+                        help='pages for the (slow) per-call mode')
+    parser.add_argument('--delay-ms', type=int, default=200, help='JS render delay of each page')
+    args = parser.parse_args()
+
+    with FixtureServer(dynamic_site(args.delay_ms)) as server:
+        urls = [f'{server.url}/dynamic/{i}' for i in range(args.pages)]
+
+        start = time.perf_counter()
+        per_call(urls[:args.per_call_pages], args.sleep)
+        elapsed = time.perf_counter() - start
+        print(f'per-call launch: {args.per_call_pages * 60 / elapsed:8.1f} pages/min')
+
+        start = time.perf_counter()
+        with BrowserPool(size=args.size, max_pages=args.max_pages) as pool:
+            results = list(pool.map(scrape_results, urls))
+            stats = pool.stats.as_dict()
+        elapsed = time.perf_counter() - start
+        assert all(len(r) == 10 for r in results), 'pages rendered incompletely'
+        print(f'pool (incl. warm-up): {args.pages * 60 / elapsed:8.1f} pages/min')
+        print(f'pool (steady state):  {stats["pages_per_minute"]:8.1f} pages/min  {stats}')
+
+
+if __name__ == '__main__':
+    main()
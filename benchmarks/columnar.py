@@ -0,0 +1,88 @@
+"""Row-by-row string parsing vs scraping.columnar's vectorized parsers.
+
+Generates synthetic books and heights CSVs (a million rows each by
+default) and times converting them to typed columns both ways.
+
+Usage: python benchmarks/columnar.py [--rows 1000000]
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scraping.columnar import RATING_WORDS, books_table, heights_table, read_csv
+
+
+def generate(directory, rows):
+    rng = random.Random(0)
+    books = os.path.join(directory, 'books.csv')
+    with open(books, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Title', 'Price', 'Rating', 'Description'])
+        for i in range(rows):
+            writer.writerow([f'Book {i}', f'£{rng.randint(100, 9999) / 100:.2f}',
+                             rng.choice(RATING_WORDS), 'A short description.'])
+
+    heights = os.path.join(directory, 'heights.csv')
+    with open(heights, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Height'])
+        for i in range(rows):
+            cm = rng.randint(150, 210)
+            writer.writerow([f' Person {i}', f'{cm // 30}ft {cm % 12} ½ ({cm}cm)'])
+    return books, heights
+
+
+def rowwise_books(path):
+    ratings = {word: i for i, word in enumerate(RATING_WORDS, start=1)}
+    prices, stars = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            prices.append(float(re.sub(r'[^0-9.]', '', row['Price']) or 'nan'))
+            stars.append(ratings.get(row['Rating']))
+    return prices, stars
+
+
+def rowwise_heights(path):
+    heights = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            match = re.search(r'\((\d+(?:\.\d+)?)\s*cm\)', row['Height'])
+            heights.append(float(match.group(1)) if match else None)
+    return heights
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    books, heights = generate(tempfile.mkdtemp(), args.rows)
+
+    seconds, _ = timed(rowwise_books, books)
+    print(f'books   row-by-row: {seconds:6.2f}s')
+    seconds, table = timed(lambda: books_table(read_csv(books)))
+    print(f'books   vectorized: {seconds:6.2f}s')
+    seconds, mean = timed(lambda: table['price'].to_numpy().mean())
+    print(f'books   mean price over typed column: {seconds * 1000:.1f}ms ({mean:.2f})')
+
+    seconds, _ = timed(rowwise_heights, heights)
+    print(f'heights row-by-row: {seconds:6.2f}s')
+    seconds, table = timed(lambda: heights_table(read_csv(heights)))
+    print(f'heights vectorized: {seconds:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
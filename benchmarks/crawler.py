@@ -0,0 +1,38 @@
+"""Throughput of scraping.crawler against the local books fixture site.
+
+Usage: python benchmarks/crawler.py [--pages 1000 10000 100000] [--concurrency 64]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import FixtureServer, book_urls, books_site, static_file
+from scraping.books import BOOK_FIELDS, parse_book
+from scraping.crawler import Crawler
+from scraping.sinks import CsvSink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--per-host', type=int, default=16)
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp()
+    for pages in args.pages:
+        with FixtureServer(books_site(pages), static_file('/enroz.html', 'enroz.html')) as server:
+            urls = book_urls(server.url, pages) + [server.url + '/enroz.html']
+            out = os.path.join(out_dir, f'books_{pages}.csv')
+            with CsvSink(out, BOOK_FIELDS) as sink:
+                crawler = Crawler(parse_book, sink=sink, concurrency=args.concurrency,
+                                  per_host=args.per_host)
+                stats = crawler.run(urls)
+        print(f'{pages:>7} pages: {stats.as_dict()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Requests/sec for the Game app with and without SQLite connection pooling.
+
+Progress tokens are turned off so progress comes from the database, and the
+requests go to a page that queries it (the home page by default), so the
+numbers reflect SQLite access rather than cookie checks.
+
+Usage: python benchmarks/db_pool.py [--requests 2000] [--threads 8] [--path /]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Game')
+sys.path.insert(0, GAME_DIR)
+
+
+def run(app_module, pool_size, total_requests, threads, path):
+    from models import Database
+    from writer import ProgressWriter
+
+    config = app_module.app.config
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app_module.progress_cache.clear()
+    # Built the way app.py builds its Database, with only the pool size changed
+    writer = None
+    if config['PROGRESS_GROUP_COMMIT']:
+        writer = ProgressWriter(db_path,
+                                flush_interval=config['PROGRESS_FLUSH_INTERVAL'],
+                                max_batch=config['PROGRESS_FLUSH_MAX_BATCH'],
+                                connection_factory=app_module.instrumentation.connection_factory)
+    app_module.db = Database(db_path,
+                             pool_size=pool_size,
+                             progress_cache=app_module.progress_cache,
+                             hasher=app_module.hasher,
+                             challenge_ids=app_module.registry.ids(),
+                             connection_factory=app_module.instrumentation.connection_factory,
+                             writer=writer)
+    for i in range(threads):
+        app_module.db.register_user(f'user{i}', 'password', f'user{i}@example.com')
+
+    per_thread = total_requests // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(i):
+        client = app_module.app.test_client()
+        client.post('/login', data={'username': f'user{i}', 'password': 'password'})
+        barrier.wait()
+        for _ in range(per_thread):
+            client.get(path)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    app_module.db.pool.close()
+    if writer is not None:
+        writer.close()
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--path', default='/', help='page to request; should read the database')
+    args = parser.parse_args()
+
+    os.environ.setdefault('GAME_DATABASE_PATH', os.path.join(tempfile.mkdtemp(), 'import.db'))
+    # With signed progress tokens most pages never reach SQLite
+    os.environ['GAME_STATELESS_PROGRESS'] = '0'
+    os.chdir(GAME_DIR)
+    import app as app_module
+
+    for label, pool_size in (('connect per call', 0), ('pooled', 8)):
+        rps = run(app_module, pool_size, args.requests, args.threads, args.path)
+        print(f'{label:>16}: {rps:8.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""Local stand-ins for the sites the workshop scrapes.
+
+Benchmarks start a ``FixtureServer`` on a free localhost port and point the
+scraping modules at it, so runs are repeatable and never touch the real
+sites. Routes are plain functions ``route(handler) -> (status, headers, body)``
+or ``None`` to fall through to the next route.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import parse_qs, urlsplit
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+RATINGS = ['One', 'Two', 'Three', 'Four', 'Five']
+CATEGORIES = ['Travel', 'Mystery', 'Historical Fiction', 'Sequential Art', 'Classics',
+              'Philosophy', 'Romance', 'Womens Fiction', 'Fiction', 'Childrens',
+              'Religion', 'Nonfiction', 'Music', 'Default', 'Science Fiction',
+              'Sports and Games', 'Add a comment', 'Fantasy', 'New Adult', 'Young Adult']
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that vanish mid-request (killed crawls, timeouts) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """Threaded HTTP/1.1 server on 127.0.0.1 serving the given routes."""
+
+    def __init__(self, *routes):
+        self.routes = list(routes)
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this,
+            # delayed ACKs stall every keep-alive response by ~40ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                for route in server.routes:
+                    result = route(self)
+                    if result is not None:
+                        break
+                else:
+                    result = (404, {}, b'not found')
+                status, headers, body = result
+                if body is None:
+                    # The route already wrote its own response
+                    return
+                self.send_response(status)
+                headers.setdefault('Content-Type', 'text/html; charset=utf-8')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _QuietServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def static_file(url_path, file_path):
+    """Serve a file from the repo, e.g. the saved enroz.html page."""
+    with open(os.path.join(REPO_DIR, file_path), 'rb') as f:
+        body = f.read()
+
+    def route(handler):
+        if handler.path.split('?')[0] == url_path:
+            return 200, {}, body
+        return None
+    return route
+
+
+def book_page(i):
+    rng = random.Random(i)
+    price = rng.randint(1000, 6000) / 100
+    rating = RATINGS[rng.randrange(5)]
+    categories = ''.join(f'<li><a href="../category/books/{name.lower()}/index.html">{name}</a></li>\n'
+                         for name in CATEGORIES)
+    description = ' '.join(rng.choice(['poetry', 'drawings', 'classic', 'readers', 'verse',
+                                       'adults', 'kids', 'rhythmic', 'words', 'laugh'])
+                           for _ in range(120))
+    return f"""<!DOCTYPE html>
+<html lang="en-us">
+<head><title>
+    Book {i} | Books to Scrape - Sandbox
+</title></head>
+<body id="default" class="default">
+<div class="container-fluid page"><div class="page_inner">
+<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li><li class="active">Book {i}</li></ul>
+<div class="side_categories"><ul class="nav nav-list">{categories}</ul></div>
+<article class="product_page">
+<div class="row">
+    <div class="col-sm-6 product_main">
+        <h1>Book {i}</h1>
+        <p class="price_color">£{price:.2f}</p>
+        <p class="instock availability"><i class="icon-ok"></i> In stock (22 available)</p>
+        <p class="star-rating {rating}">
+            <i class="icon-star"></i><i class="icon-star"></i><i class="icon-star"></i>
+        </p>
+    </div>
+</div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>{description}</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+    <tr><th>UPC</th><td>{i:016x}</td></tr>
+    <tr><th>Price (excl. tax)</th><td>£{price:.2f}</td></tr>
+    <tr><th>Number of reviews</th><td>0</td></tr>
+</table>
+</article>
+</div></div>
+</body>
+</html>
+""".encode()
+
+
+def catalogue_page(page, n_books, per_page=20):
+    start = (page - 1) * per_page
+    items = ''.join(f"""<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3">
+<article class="product_pod">
+    <h3><a href="catalogue/book-{i}/index.html" title="Book {i}">Book {i}</a></h3>
+</article>
+</li>
+""" for i in range(start, min(start + per_page, n_books)))
+    next_link = (f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+                 if start + per_page < n_books else '')
+    return f"""<!DOCTYPE html>
+<html><head><title>All products | Books to Scrape - Sandbox</title></head>
+<body><section><ol class="row">
+{items}</ol>
+<ul class="pager">{next_link}</ul></section></body></html>
+""".encode()
+
+
+def books_site(n_books=1000):
+    """A books.toscrape.com lookalike with ``n_books`` deterministic book pages."""
+    def route(handler):
+        path = handler.path.split('?')[0]
+        if path in ('/', '/index.html'):
+            return 200, {}, catalogue_page(1, n_books)
+        if path.startswith('/page-') and path.endswith('.html'):
+            return 200, {}, catalogue_page(int(path[len('/page-'):-len('.html')]), n_books)
+        if path.startswith('/catalogue/book-') and path.endswith('/index.html'):
+            i = int(path[len('/catalogue/book-'):-len('/index.html')])
+            if 0 <= i < n_books:
+                return 200, {}, book_page(i)
+        return None
+    return route
+
+
+def book_urls(base_url, n_books):
+    return [f'{base_url}/catalogue/book-{i}/index.html' for i in range(n_books)]
+
+
+def autocomplete_api(latency=0.02):
+    """Mimics famousbirthdays' /api/autocomplete with a fixed response delay."""
+    def route(handler):
+        parts = urlsplit(handler.path)
+        if parts.path != '/api/autocomplete':
+            return None
+        term = parse_qs(parts.query).get('term', [''])[0]
+        time.sleep(latency)
+        body = json.dumps({'suggestions': [{'value': f'{term} Person',
+                                            'data': f'{term.lower()}-person'}]})
+        return 200, {'Content-Type': 'application/json'}, body.encode()
+    return route
+
+
+def with_etags(route):
+    """Wrap a route so it sends ETags and answers matching If-None-Match with 304."""
+    def wrapped(handler):
+        result = route(handler)
+        if result is None or result[0] != 200:
+            return result
+        status, headers, body = result
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        headers = dict(headers, ETag=etag)
+        if handler.headers.get('If-None-Match') == etag:
+            return 304, headers, b''
+        return status, headers, body
+    return wrapped
+
+
+def dynamic_page(i, delay_ms):
+    return f"""<!DOCTYPE html>
+<html><head><title>Dynamic {i}</title></head>
+<body><div id="results"></div>
+<script>
+setTimeout(function () {{
+    var results = document.getElementById('results');
+    for (var n = 0; n < 10; n++) {{
+        var h3 = document.createElement('h3');
+        h3.textContent = 'Result {i}.' + n;
+        results.appendChild(h3);
+    }}
+    results.className = 'loaded';
+}}, {delay_ms});
+</script></body></html>
+""".encode()
+
+
+def dynamic_site(delay_ms=200):
+    """Pages at ``/dynamic/<i>`` whose results only appear ``delay_ms`` after
+    load, like a search page filled in by JavaScript."""
+    def route(handler):
+        path = handler.path.split('?')[0]
+        if path.startswith('/dynamic/'):
+            return 200, {}, dynamic_page(int(path[len('/dynamic/'):]), delay_ms)
+        return None
+    return route
+
+
+def forward_proxy(latency=0.0, failure_rate=0.0, block_rate=0.0, seed=0):
+    """A plain-HTTP forward proxy that adds ``latency`` seconds per request,
+    answers ``failure_rate`` of requests with 502 and ``block_rate`` with 403,
+    like a free proxy or a site blocking it. Serve it on its own
+    ``FixtureServer`` and use ``server.url`` as the proxy URL."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    # Ignore any proxy set in the environment when going upstream
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def route(handler):
+        if not handler.path.startswith('http://'):
+            return None
+        with lock:
+            roll = rng.random()
+        time.sleep(latency)
+        if roll < failure_rate:
+            return 502, {}, b'bad gateway'
+        if roll < failure_rate + block_rate:
+            return 403, {}, b'blocked'
+        try:
+            with opener.open(handler.path, timeout=10) as upstream:
+                return upstream.status, {'Content-Type': upstream.headers.get('Content-Type', 'text/html')}, upstream.read()
+        except urllib.error.HTTPError as e:
+            return e.code, {}, e.read()
+    return route
+
+
+def site_graph(n_pages, links=8, hosts=(), per_page=50, seed=0):
+    """A generated site of ``n_pages`` pages at ``/p/<i>``, each linking to
+    ``links`` random pages (with duplicate, fragment and reordered-query
+    variants) plus a paginated listing at ``/list?page=N`` like enroz's.
+    ``hosts`` may hold other servers' base URLs, filled in after they start,
+    to add cross-host links."""
+    def page(i):
+        rng = random.Random(seed * 1_000_003 + i)
+        anchors = []
+        for _ in range(links):
+            j = rng.randrange(n_pages)
+            base = rng.choice(hosts) if hosts and rng.random() < 0.2 else ''
+            anchors.append(f'<a href="{base}/p/{j}">page {j}</a>')
+            anchors.append(f'<a href="{base}/p/{j}#top">page {j} again</a>')
+        anchors.append('<a href="/list?sort=name&amp;page=1">all pages</a>')
+        return f'<html><body><h1>Page {i}</h1>{"".join(anchors)}</body></html>'.encode()
+
+    def listing(number):
+        start = (number - 1) * per_page
+        items = ''.join(f'<li><a href="/p/{i}">page {i}</a></li>'
+                        for i in range(start, min(start + per_page, n_pages)))
+        next_link = (f'<a class="next" href="/list?page={number + 1}&amp;sort=name">next</a>'
+                     if start + per_page < n_pages else '')
+        return f'<html><body><ul>{items}</ul>{next_link}</body></html>'.encode()
+
+    def route(handler):
+        parts = urlsplit(handler.path)
+        if parts.path.startswith('/p/'):
+            i = int(parts.path[len('/p/'):])
+            if 0 <= i < n_pages:
+                return 200, {}, page(i)
+        if parts.path == '/list':
+            return 200, {}, listing(int(parse_qs(parts.query).get('page', ['1'])[0]))
+        return None
+    return route
+
+
+def celeb_heights_page(n_people, seed=0):
+    """A celebheights ``allA.html`` lookalike with ``n_people`` entries."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_people):
+        cm = rng.randint(150, 210)
+        inches = round(cm / 2.54)
+        rows.append(f'<div class="sAZ2"><span class="n">{i + 1}.</span>'
+                    f'<a href="/s/person-{i}.html"> Person {i} Aaronson</a>'
+                    f'<span class="h">{inches // 12}ft {inches % 12} ({cm}cm)</span></div>\n')
+    return ('<!DOCTYPE html><html><head><title>Celebrity Heights A</title></head>'
+            '<body><div id="content"><h1>Celebs beginning with A</h1>\n'
+            + ''.join(rows) + '</div></body></html>').encode()
+
+
+def trickle(route, chunk_size=16 * 1024, delay=0.005):
+    """Send a route's body in ``chunk_size`` pieces ``delay`` seconds apart,
+    like a large page coming in over a slow link."""
+    def wrapped(handler):
+        result = route(handler)
+        if result is None:
+            return None
+        status, headers, body = result
+        handler.send_response(status)
+        handler.send_header('Content-Type', headers.get('Content-Type', 'text/html; charset=utf-8'))
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        for start in range(0, len(body), chunk_size):
+            handler.wfile.write(body[start:start + chunk_size])
+            handler.wfile.flush()
+            time.sleep(delay)
+        return status, headers, None
+    return wrapped
+
+
+def throttled(route, capacity=8, service_time=0.02, retry_after=1, rate=None):
+    """Put a route behind a server that slows down and throttles under load.
+
+    Latency stays at ``service_time`` up to ``capacity // 2`` concurrent
+    requests and then grows with concurrency, as if requests were queueing.
+    Past ``capacity`` in flight, or past ``rate`` requests per second, it
+    answers 429 with ``Retry-After: retry_after``. Counts end up in
+    ``wrapped.stats``.
+    """
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'window': 0.0, 'window_requests': 0}
+    stats = {'served': 0, 'throttled': 0, 'peak_in_flight': 0}
+    knee = max(1, capacity // 2)
+
+    def wrapped(handler):
+        now = time.monotonic()
+        with lock:
+            if now - state['window'] >= 1.0:
+                state['window'], state['window_requests'] = now, 0
+            state['window_requests'] += 1
+            over_rate = rate is not None and state['window_requests'] > rate
+            if state['in_flight'] >= capacity or over_rate:
+                stats['throttled'] += 1
+                return 429, {'Retry-After': str(retry_after)}, b'slow down'
+            state['in_flight'] += 1
+            in_flight = state['in_flight']
+            stats['peak_in_flight'] = max(stats['peak_in_flight'], in_flight)
+        try:
+            time.sleep(service_time * max(1.0, in_flight / knee))
+            result = route(handler)
+        finally:
+            with lock:
+                state['in_flight'] -= 1
+        if result is not None:
+            with lock:
+                stats['served'] += 1
+        return result
+    wrapped.stats = stats
+    return wrapped
@@ -0,0 +1,113 @@
+"""Crash-and-resume crawl of a generated site graph through scraping.frontier.
+
+Serves a linked site graph from two local hosts. A child process crawls it
+through a Frontier and is killed with SIGKILL partway through. A fresh
+Frontier on the same file then finishes the crawl. The report shows how
+many pages were fetched more than once and whether every page was reached.
+With ``--seen`` it also times adding that many synthetic URLs, to show
+add rate and peak memory as the seen-set grows.
+
+Usage: python benchmarks/frontier.py [--pages 5000] [--crash-after 2] [--seen 1000000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from urllib.parse import urljoin
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import FixtureServer, site_graph
+from scraping.frontier import Frontier, crawl
+from scraping.parsers import Field, Schema, compile_schema
+
+LINKS = Schema(item='a[href]', fields={'href': Field(attr='href')})
+
+
+def make_process(allowed_hosts):
+    extract = compile_schema(LINKS)
+    session = requests.Session()
+    session.trust_env = False
+
+    def process(url, depth):
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        links = (urljoin(url, record['href']) for record in extract(response.content))
+        # Listing pages first: they fan out to the most new pages
+        return [(link, 1 if '/list' in link else 0) for link in links
+                if link.startswith(allowed_hosts)]
+    return process
+
+
+def crawl_child(path, seeds, allowed_hosts, workers):
+    with Frontier(path, capacity=1_000_000) as frontier:
+        for seed in seeds:
+            frontier.add(seed)
+        crawl(frontier, make_process(allowed_hosts), workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--crash-after', type=float, default=2.0, help='seconds before killing the first run')
+    parser.add_argument('--seen', type=int, default=0, help='also time adding this many synthetic URLs')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'crawl.frontier')
+    hosts = []
+    with FixtureServer(site_graph(args.pages, hosts=hosts)) as a, \
+            FixtureServer(site_graph(args.pages, hosts=hosts, seed=1)) as b:
+        hosts.extend([a.url, b.url])
+        seeds = [a.url + '/list?sort=name&page=1', b.url + '/list?sort=name&page=1']
+        allowed = tuple(hosts)
+
+        start = time.perf_counter()
+        child = multiprocessing.Process(target=crawl_child, args=(path, seeds, allowed, args.workers))
+        child.start()
+        child.join(args.crash_after)
+        if child.is_alive():
+            child.kill()
+            child.join()
+            print(f'killed first run after {args.crash_after}s, '
+                  f'{a.requests + b.requests} requests made')
+        fetched_before = a.requests + b.requests
+
+        with Frontier(path, capacity=1_000_000) as frontier:
+            print(f'resuming with {frontier.stats()}')
+            crawl(frontier, make_process(allowed), workers=args.workers)
+            stats = frontier.stats()
+        elapsed = time.perf_counter() - start
+
+    # Each host serves n pages plus its listing pages
+    expected = 2 * (args.pages + -(-args.pages // 50))
+    requests_made = a.requests + b.requests
+    print(f'final: {stats}')
+    print(f'pages: {stats["done"]} of {expected} expected, {requests_made} requests '
+          f'({requests_made - stats["done"]} refetched after the crash, '
+          f'{fetched_before} before it), {requests_made / elapsed:.0f} pages/s')
+
+    if args.seen:
+        seen_path = os.path.join(tempfile.mkdtemp(), 'seen.frontier')
+        with Frontier(seen_path, capacity=max(args.seen, 1_000_000), commit_every=50_000) as frontier:
+            start = time.perf_counter()
+            for i in range(args.seen):
+                frontier.add(f'http://host{i % 97}.example/item/{i}?ref={i % 13}')
+            duplicates = sum(not frontier.add(f'http://host{i % 97}.example/item/{i}?ref={i % 13}')
+                             for i in range(0, args.seen, 100))
+            elapsed = time.perf_counter() - start
+            stats = frontier.stats()
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f'seen-set: {args.seen} URLs in {elapsed:.1f}s ({args.seen / elapsed:.0f} adds/s), '
+              f'bloom {stats["bloom_bytes"] / 2**20:.1f} MB, '
+              f'{stats["bloom_false_positives"]} false positives, '
+              f'{duplicates} re-adds rejected, peak RSS {peak_mb:.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
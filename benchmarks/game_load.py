@@ -0,0 +1,219 @@
+"""Concurrent load test for the Game app (or the standalone game.py).
+
+Seeds a temporary game.db with ``--users`` accounts, serves the app with
+Werkzeug's threaded WSGI server on a free port and runs ``--clients``
+simulated students at once. For Game/app.py each student registers,
+logs in, solves challenge 1..3 and opens the victory page. For game.py,
+which has no accounts, the flow starts at ``/``. Redirects are not followed,
+so every request is timed on its own.
+
+Prints JSON with p50/p95/p99 latency per route, status counts and how
+many requests failed with SQLite's "database is locked". Pass ``--url``
+to load an app already running under another WSGI server (gunicorn,
+waitress); seeding and lock counting then only see what the HTTP
+responses show.
+
+Usage: python benchmarks/game_load.py [--target app|game.py] [--clients 32]
+           [--flows 4] [--users 1000] [--out results.json]
+"""
+import argparse
+from collections import defaultdict
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+GAME_DIR = os.path.join(REPO_DIR, 'Game')
+
+ANSWERS = {1: 'PYTHON_EXPLORER_2024', 2: 'HEADER_HUNTER_42', 3: 'MASTER_SCRAPER_99'}
+LOCKED = 'database is locked'
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.locked = 0
+        self._lock = threading.Lock()
+
+    def add(self, route, seconds, status):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+
+    def error(self, route, error):
+        with self._lock:
+            self.errors[f'{route}: {type(error).__name__}'] += 1
+
+    def database_locked(self):
+        with self._lock:
+            self.locked += 1
+
+    def server_exception(self, sender, exception, **extra):
+        if LOCKED in str(exception):
+            self.database_locked()
+
+    def summary(self):
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+            routes[route] = {
+                'requests': len(samples),
+                'p50_ms': round(cuts[49] * 1000, 2),
+                'p95_ms': round(cuts[94] * 1000, 2),
+                'p99_ms': round(cuts[98] * 1000, 2),
+                'max_ms': round(samples[-1] * 1000, 2),
+                'statuses': dict(self.statuses[route]),
+            }
+        return routes
+
+
+class Client:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.session.trust_env = False
+
+    def request(self, method, path, expect, **kwargs):
+        route = f'{method} {path}'
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, allow_redirects=False,
+                                            timeout=60, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.error(route, e)
+            return None
+        self.recorder.add(route, time.perf_counter() - start, response.status_code)
+        if response.status_code >= 500 and LOCKED in response.text:
+            self.recorder.database_locked()
+        if response.status_code not in expect:
+            self.recorder.error(route, RuntimeError(response.status_code))
+        return response
+
+
+def app_flow(client, name):
+    client.request('POST', '/register', (302,),
+                   data={'username': name, 'password': 'password', 'email': f'{name}@example.com'})
+    client.request('POST', '/login', (302,), data={'username': name, 'password': 'password'})
+    client.request('GET', '/', (200,))
+    challenge_flow(client)
+    client.request('GET', '/logout', (302,))
+
+
+def game_py_flow(client, name):
+    client.request('GET', '/', (200,))
+    challenge_flow(client)
+
+
+def challenge_flow(client):
+    for n, answer in ANSWERS.items():
+        client.request('GET', f'/challenge{n}', (200,))
+        client.request('POST', f'/challenge{n}', (200,), data={'code': answer})
+    client.request('GET', '/victory', (200,))
+
+
+def seed_users(db, count):
+    # One hash shared by every seeded account; hashing each would dominate setup
+    password_hash = db.hasher.hash('password')
+    with db.get_connection() as conn:
+        conn.executemany('INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)',
+                         ((f'seed{i}', password_hash, f'seed{i}@example.com') for i in range(count)))
+        conn.execute('''
+        INSERT INTO challenge_progress (user_id, challenge_id)
+        SELECT id, 1 FROM users WHERE id % 2 = 0
+        ''')
+        conn.commit()
+
+
+def load_target(target, users, recorder):
+    """Import the app under test against a fresh database; returns the WSGI app."""
+    from flask import got_request_exception
+
+    if target == 'game.py':
+        sys.path.insert(0, REPO_DIR)
+        import game
+        app = game.app
+    else:
+        os.environ['GAME_DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'game.db')
+        sys.path.insert(0, GAME_DIR)
+        os.chdir(GAME_DIR)
+        import app as app_module
+        seed_users(app_module.db, users)
+        app = app_module.app
+    got_request_exception.connect(recorder.server_exception, app, weak=False)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=('app', 'game.py'), default='app')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent simulated students')
+    parser.add_argument('--flows', type=int, default=4, help='full flows per client')
+    parser.add_argument('--users', type=int, default=1000, help='accounts seeded before the run')
+    parser.add_argument('--url', help='load an already running server instead')
+    parser.add_argument('--out', help='write the JSON results here as well')
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, load_target(args.target, args.users, recorder), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+    flow = game_py_flow if args.target == 'game.py' else app_flow
+    run_id = os.urandom(3).hex()
+    barrier = threading.Barrier(args.clients + 1)
+
+    def student(i):
+        barrier.wait()
+        for n in range(args.flows):
+            flow(Client(base_url, recorder), f'load{run_id}_{i}_{n}')
+
+    threads = [threading.Thread(target=student, args=(i,)) for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    results = {
+        'target': args.url or args.target,
+        'clients': args.clients,
+        'flows': args.clients * args.flows,
+        'seeded_users': 0 if args.url or args.target == 'game.py' else args.users,
+        'requests': total,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_second': round(total / elapsed, 1),
+        'database_locked': recorder.locked,
+        'unexpected': dict(recorder.errors),
+        'routes': recorder.summary(),
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
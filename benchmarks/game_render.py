@@ -0,0 +1,40 @@
+"""Response size and CPU cost of rendering game.py pages.
+
+Drives every GET route through Flask's test client and reports requests/sec
+and bytes per response. The inline-stylesheet figure is what each response
+used to carry before the stylesheet moved to /styles.css.
+
+Usage: python benchmarks/game_render.py [--requests 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import game
+
+ROUTES = ('/', '/challenge1', '/challenge2', '/challenge3', '/victory')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    client = game.app.test_client()
+    client.get('/')
+
+    print(f'inline stylesheet: {len(game.STYLESHEET_BYTES) + len("<style></style>")} bytes/response')
+    for route in ROUTES:
+        size = len(client.get(route).data)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.get(route)
+        elapsed = time.perf_counter() - start
+        print(f'{route:>12}: {args.requests / elapsed:8.1f} req/s, {size} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Challenge-completion commits/sec with and without the group-commit writer.
+
+Registers ``--users`` students, then has ``--threads`` threads complete
+every challenge for them at once through ``Database.complete_challenge``.
+Compared: one commit per request (synchronous=NORMAL, not durable on
+power loss), with and without the connection pool, and ProgressWriter at
+a few flush intervals with synchronous=FULL.
+
+Usage: python benchmarks/group_commit.py [--users 2000] [--threads 200]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Game')
+sys.path.insert(0, GAME_DIR)
+
+from models import CHALLENGE_IDS, Database
+from writer import ProgressWriter
+
+
+def run(users, threads, writer_options=None, pool_size=8):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    writer = ProgressWriter(db_path, **writer_options) if writer_options is not None else None
+    db = Database(db_path, pool_size=pool_size, writer=writer)
+    password_hash = db.hasher.hash('password')
+    with db.get_connection() as conn:
+        conn.executemany('INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)',
+                         ((f'user{i}', password_hash, f'user{i}@example.com') for i in range(users)))
+        conn.commit()
+
+    jobs = [(user_id, challenge_id) for challenge_id in CHALLENGE_IDS for user_id in range(1, users + 1)]
+    locked = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(i):
+        barrier.wait()
+        for user_id, challenge_id in jobs[i::threads]:
+            try:
+                db.complete_challenge(user_id, challenge_id)
+            except sqlite3.OperationalError:
+                with lock:
+                    locked[0] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with db.get_connection() as conn:
+        stored = conn.execute('SELECT COUNT(*) FROM challenge_progress').fetchone()[0]
+    transactions = len(jobs) - locked[0]
+    if writer is not None:
+        writer.close()
+        transactions = writer.commits
+    db.pool.close()
+    return {
+        'completions_per_s': round(stored / elapsed, 1),
+        'transactions': transactions,
+        'stored': stored,
+        'failed': locked[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=200)
+    args = parser.parse_args()
+
+    configs = [
+        ('commit per request, unpooled', None, 0),
+        ('commit per request', None, 8),
+        ('group commit, 0ms', {'flush_interval': 0}, 8),
+        ('group commit, 2ms', {'flush_interval': 0.002}, 8),
+        ('group commit, 5ms', {'flush_interval': 0.005}, 8),
+    ]
+    for label, options, pool_size in configs:
+        print(f'{label:>28}: {run(args.users, args.threads, options, pool_size)}')
+
+
+if __name__ == '__main__':
+    main()
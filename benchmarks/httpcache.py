@@ -0,0 +1,47 @@
+"""Cold fetch vs revalidation vs offline replay with scraping.httpcache.
+
+Usage: python benchmarks/httpcache.py [--pages 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import FixtureServer, book_urls, books_site, with_etags
+from scraping.httpcache import CachedSession
+
+
+def timed_pass(session, urls):
+    start = time.perf_counter()
+    size = sum(len(session.get(url).content) for url in urls)
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    with FixtureServer(with_etags(books_site(args.pages))) as server:
+        urls = book_urls(server.url, args.pages)
+        with CachedSession(cache_dir) as session:
+            for label in ('cold', 'revalidate'):
+                before = server.requests
+                seconds, size = timed_pass(session, urls)
+                print(f'{label:>10}: {args.pages / seconds:8.1f} pages/s, '
+                      f'{server.requests - before} origin requests, {size} bytes served')
+            print(f'{"cache":>10}: {session.cache.stats()}')
+
+        with CachedSession(cache_dir, offline=True) as session:
+            before = server.requests
+            seconds, size = timed_pass(session, urls)
+            print(f'{"offline":>10}: {args.pages / seconds:8.1f} pages/s, '
+                  f'{server.requests - before} origin requests, {size} bytes served')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Per-backend extraction time for scraping.parsers.
+
+Runs the enroz product-card schema over the checked-in enroz.html and the
+books schema over a generated corpus of book pages.
+
+Usage: python benchmarks/parsers.py [--repeat 200] [--books 2000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import REPO_DIR, book_page
+from scraping.parsers import BOOK, ENROZ_PRODUCT, available_backends, extract_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='passes over enroz.html')
+    parser.add_argument('--books', type=int, default=2000, help='generated book pages')
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_DIR, 'enroz.html'), 'rb') as f:
+        enroz = f.read()
+    books = [book_page(i) for i in range(args.books)]
+
+    for backend in available_backends():
+        records, seconds = extract_many([enroz] * args.repeat, ENROZ_PRODUCT, backend)
+        print(f'{backend:>10} enroz.html: {args.repeat / seconds:8.1f} pages/s '
+              f'({len(records) // args.repeat} products/page)')
+        records, seconds = extract_many(books, BOOK, backend)
+        print(f'{backend:>10} books:      {len(books) / seconds:8.1f} pages/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Concurrent login benchmark for the Game app's password hashing.
+
+Fires N simultaneous logins at the Flask app and reports latency, 503
+rejections and total time, once with hashing on the request threads and
+once with the bounded process pool.
+
+Usage: python benchmarks/password_hashing.py [--logins 500] [--method scrypt]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Game')
+sys.path.insert(0, GAME_DIR)
+
+
+def run(app_module, hasher, users, logins):
+    from models import Database
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app_module.db = Database(db_path, hasher=hasher)
+    for i in range(users):
+        app_module.db.register_user(f'user{i}', 'password', f'user{i}@example.com')
+
+    latencies = []
+    statuses = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(logins + 1)
+
+    def worker(i):
+        client = app_module.app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.post('/login', data={'username': f'user{i % users}', 'password': 'password'})
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses.append(response.status_code)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(logins)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    total = time.perf_counter() - start
+    hasher.shutdown()
+
+    latencies.sort()
+    return {
+        'total_s': total,
+        'ok': statuses.count(302),
+        'busy': statuses.count(503),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=500)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--method', default='scrypt')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--max-pending', type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.setdefault('GAME_DATABASE_PATH', os.path.join(tempfile.mkdtemp(), 'import.db'))
+    os.chdir(GAME_DIR)
+    import app as app_module
+    from hashing import PasswordHasher
+
+    configs = (
+        ('inline', PasswordHasher(args.method, workers=0, max_pending=args.logins)),
+        ('process pool', PasswordHasher(args.method, workers=args.workers,
+                                        max_pending=args.max_pending)),
+    )
+    for label, hasher in configs:
+        result = run(app_module, hasher, args.users, args.logins)
+        print(f'{label:>12}: {result["total_s"]:6.2f}s total, {result["ok"]} ok, '
+              f'{result["busy"]} busy (503), p50 {result["p50_ms"]:.0f}ms, '
+              f'p99 {result["p99_ms"]:.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
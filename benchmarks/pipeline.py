@@ -0,0 +1,88 @@
+"""Pages/sec of scraping.pipeline against the number of parser processes.
+
+Serves the books fixture corpus from a separate process, so the server
+doesn't compete with the scraper for the GIL. Book pages are then scraped
+two ways. The baseline is the notebook's approach: a thread pool in which
+each thread fetches and parses. The other is Pipeline with 1, 2, 4 ... up
+to ``--max-processes`` parser processes.
+
+Usage: python benchmarks/pipeline.py [--pages 2000] [--backend bs4] [--max-processes N]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fixtures import FixtureServer, book_urls, books_site
+from scraping.batch import make_session
+from scraping.parsers import BOOK, compile_schema
+from scraping.pipeline import Pipeline
+
+
+class CountingSink:
+    def __init__(self):
+        self.count = 0
+
+    def write(self, record):
+        self.count += 1
+
+
+def serve(pages, urls):
+    with FixtureServer(books_site(pages)) as server:
+        urls.put(server.url)
+        threading.Event().wait()
+
+
+def threaded_baseline(urls, backend, workers):
+    extract = compile_schema(BOOK, backend)
+    local = threading.local()
+
+    def fetch_and_parse(url):
+        if not hasattr(local, 'session'):
+            local.session = make_session()
+        return extract(local.session.get(url, timeout=30).content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        records = sum(len(r) for r in executor.map(fetch_and_parse, urls))
+    return records, len(urls) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--backend', default='bs4', help='parser backend used by both modes')
+    parser.add_argument('--fetch-workers', type=int, default=16)
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    server_urls = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args.pages, server_urls), daemon=True)
+    server.start()
+    urls = book_urls(server_urls.get(), args.pages)
+    print(f'{os.cpu_count()} cores, {args.pages} pages, {args.backend} backend')
+
+    try:
+        records, rate = threaded_baseline(urls, args.backend, args.fetch_workers)
+        print(f'{"fetch+parse threads":>22}: {rate:8.1f} pages/s ({records} records)')
+
+        processes = 1
+        while processes <= args.max_processes:
+            pipeline = Pipeline(BOOK, fetch_workers=args.fetch_workers, processes=processes,
+                                backend=args.backend)
+            sink = CountingSink()
+            stats = pipeline.run(urls, sink)
+            label = f'pipeline, {processes} proc'
+            print(f'{label:>22}: {stats.as_dict()["pages_per_second"]:8.1f} pages/s ({sink.count} records)')
+            processes *= 2
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
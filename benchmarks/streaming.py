@@ -0,0 +1,98 @@
+"""Full-DOM parsing vs scraping.streaming on a large celebheights-style page.
+
+Serves a multi-megabyte listing page, trickled out in chunks like a slow
+download, and extracts the CELEB_HEIGHT records three ways, each in a
+fresh process: the notebook's BeautifulSoup path, lxml on the full body,
+and StreamExtractor on the response stream. It reports time to the first
+record, total time and peak RSS above the process baseline.
+
+Usage: python benchmarks/streaming.py [--people 50000] [--chunk-kb 16] [--delay-ms 2]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode, url, results):
+    import requests
+    from bs4 import BeautifulSoup
+    import lxml.html  # noqa: F401 - imported up front so it isn't counted below
+    from scraping.parsers import CELEB_HEIGHT, compile_schema
+    from scraping.streaming import StreamExtractor
+
+    session = requests.Session()
+    session.trust_env = False
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    first = None
+    count = 0
+
+    if mode == 'bs4 (notebook)':
+        res = session.get(url)
+        soup = BeautifulSoup(res.content, 'html.parser')
+        for div in soup.find_all('div', class_='sAZ2'):
+            parts = div.get_text('|').split('|')
+            record = {'Name': parts[1].strip(), 'Height': parts[2].strip()}
+            if first is None:
+                first = time.perf_counter() - start
+            count += bool(record)
+    elif mode == 'lxml full DOM':
+        res = session.get(url)
+        for record in compile_schema(CELEB_HEIGHT, 'lxml')(res.content):
+            if first is None:
+                first = time.perf_counter() - start
+            count += bool(record)
+    else:
+        extract = StreamExtractor(CELEB_HEIGHT)
+        with session.get(url, stream=True) as res:
+            for record in extract.stream(res):
+                if first is None:
+                    first = time.perf_counter() - start
+                count += bool(record)
+
+    results.put({
+        'mode': mode,
+        'records': count,
+        'first_record_ms': round(first * 1000, 1),
+        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+        'peak_rss_mb': round(peak_rss_mb() - baseline, 1),
+    })
+
+
+def main():
+    from fixtures import FixtureServer, celeb_heights_page, trickle
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--people', type=int, default=50000)
+    parser.add_argument('--chunk-kb', type=int, default=16)
+    parser.add_argument('--delay-ms', type=float, default=2.0, help='pause between chunks')
+    args = parser.parse_args()
+
+    body = celeb_heights_page(args.people)
+
+    def page(handler):
+        return (200, {}, body) if handler.path == '/s/allA.html' else None
+
+    print(f'page size: {len(body) / 2**20:.1f} MB')
+    context = multiprocessing.get_context('spawn')
+    with FixtureServer(trickle(page, args.chunk_kb * 1024, args.delay_ms / 1000)) as server:
+        for mode in ('bs4 (notebook)', 'lxml full DOM', 'streaming'):
+            results = context.Queue()
+            child = context.Process(target=measure, args=(mode, server.url + '/s/allA.html', results))
+            child.start()
+            print(results.get())
+            child.join()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
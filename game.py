@@ -1,12 +1,25 @@
-from flask import Flask, render_template, request, Response, session
+from flask import Flask, request, Response, g
+from functools import lru_cache
+from itsdangerous import BadSignature, TimestampSigner
 import base64
+import hashlib
+import hmac
+import os
 import secrets
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+# Every worker process must share the key, or each one rejects the others'
+# progress cookies; the random fallback only suits a single process
+app.secret_key = os.environ.get('GAME_SECRET_KEY') or secrets.token_hex(16)
 
-COMMON_STYLES = """
-<style>
+# Progress lives in a signed cookie holding just the completion bitmask, so
+# any worker can verify it without server-side state
+PROGRESS_COOKIE = 'progress'
+# Same setting and default as Game/config.py
+PROGRESS_TOKEN_MAX_AGE = int(os.environ.get('GAME_PROGRESS_TOKEN_MAX_AGE', 7 * 24 * 3600))
+progress_signer = TimestampSigner(app.secret_key, salt='game.progress')
+
+STYLESHEET = """
     body {
         font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
         max-width: 800px;
@@ -148,261 +161,285 @@ COMMON_STYLES = """
         text-align: center;
         margin: 20px 0;
     }
-</style>
 """
 
-def get_progress_bar(current_challenge=None):
-    completed = sum(session['progress'].values())
-    total = len(session['progress'])
+# Everything that doesn't depend on the visitor is built once at import time.
+# The stylesheet is served separately so browsers cache it instead of
+# receiving it inline with every page.
+STYLESHEET_BYTES = STYLESHEET.encode()
+STYLESHEET_ETAG = hashlib.sha256(STYLESHEET_BYTES).hexdigest()[:16]
+COMMON_HEAD = f'<link rel="stylesheet" href="/styles.css?v={STYLESHEET_ETAG}">\n'
+
+HINT_SCRIPT = """
+<script type="text/javascript">
+    function toggleHint(id) {
+        const hint = document.getElementById(id);
+        hint.style.display = hint.style.display === 'none' ? 'block' : 'none';
+    }
+</script>
+"""
+
+SECRET_MESSAGE = base64.b64encode("MASTER_SCRAPER_99".encode()).decode()
+
+HOME_BODY = """
+<div class="challenge-card">
+    <h1>Welcome to the Web Scraping Adventure! 🗺️</h1>
+    <p>Embark on a journey to find hidden treasures using your web scraping skills!</p>
+    <p>Rules:</p>
+    <ul>
+        <li>Each challenge requires different web scraping techniques</li>
+        <li>Find the secret code in each challenge to progress</li>
+        <li>Use tools like 'View Page Source' and your browser's developer tools</li>
+        <li>Need help? Click the hint buttons!</li>
+    </ul>
+    <div style="text-align: center; margin-top: 20px;">
+        <a href="/challenge1" style="text-decoration: none;">
+            <button>Start Adventure!</button>
+        </a>
+    </div>
+</div>
+""" + HINT_SCRIPT
+
+CHALLENGE1_BODY = """
+<div class="challenge-card">
+    <h1>Challenge 1: Hidden in Plain Sight 👀</h1>
+    <!-- Secret Code: PYTHON_EXPLORER_2024 -->
+    <p>Find the secret code hidden in this page's source code!</p>
+
+    <div class="hint-btn" onclick="toggleHint('hint1')">🔍 Need a hint?</div>
+    <p id="hint1" class="hint">
+        Hint 1: Right-click on the page and select "View Page Source"<br>
+        Hint 2: Look for HTML comments (they start with &lt;!-- and end with --&gt;)
+    </p>
+
+    <form class="code-form" method="POST">
+        <input type="text" name="code" class="code-input" placeholder="Enter the secret code">
+        <button type="submit">Submit</button>
+    </form>
+</div>
+""" + HINT_SCRIPT
+
+CHALLENGE2_BODY = """
+<div class="challenge-card">
+    <h1>Challenge 2: Headers and Metadata 🔍</h1>
+    <p>The secret code is hidden in the response headers!</p>
+
+    <div class="hint-btn" onclick="toggleHint('hint2')">🔍 Need a hint?</div>
+    <p id="hint2" class="hint">
+        Hint 1: Open Developer Tools (F12 or right-click -> Inspect)<br>
+        Hint 2: Go to the Network tab and refresh the page<br>
+        Hint 3: Look for a header starting with 'X-Secret'
+    </p>
+
+    <form class="code-form" method="POST">
+        <input type="text" name="code" class="code-input" placeholder="Enter the secret code">
+        <button type="submit">Submit</button>
+    </form>
+</div>
+""" + HINT_SCRIPT
+
+CHALLENGE3_BODY = f"""
+<div class="challenge-card">
+    <h1>Challenge 3: Encoding Secrets 🔐</h1>
+    <p>This secret code is encoded in base64. Decode it to proceed!</p>
+    <div class="secret" data-encoded="{SECRET_MESSAGE}"></div>
+
+    <div class="hint-btn" onclick="toggleHint('hint3')">🔍 Need a hint?</div>
+    <p id="hint3" class="hint">
+        Hint 1: Find the encoded data in the div's 'data-encoded' attribute<br>
+        Hint 2: Use an online base64 decoder<br>
+        Hint 3: The encoded value is: {SECRET_MESSAGE}
+    </p>
+
+    <form class="code-form" method="POST">
+        <input type="text" name="code" class="code-input" placeholder="Enter the decoded secret">
+        <button type="submit">Submit</button>
+    </form>
+</div>
+""" + HINT_SCRIPT
+
+def success_body(challenge_num, next_name, next_url):
+    return f"""
+<div class="challenge-card">
+    <div class="success-message">
+        <h2>✅ Challenge {challenge_num} Complete!</h2>
+        <p>Moving to {next_name}...</p>
+    </div>
+</div>
+<script>setTimeout(() => window.location.href = '{next_url}', 2000)</script>
+"""
+
+def error_body(challenge_num):
+    return f"""
+<div class="challenge-card">
+    <div class="error-message">❌ Incorrect code. Try again!</div>
+    <a href="/challenge{challenge_num}">Back to Challenge {challenge_num}</a>
+</div>
+"""
+
+# Each challenge is plain data; routes, answer checks and progress bits are
+# all derived from this list at import time
+CHALLENGES = [
+    {
+        'id': 1,
+        'answer_sha256': '33d2dce731556c07300252bf7069b2f004628286673229af4dd6f2acc84cc345',
+        'body': CHALLENGE1_BODY,
+    },
+    {
+        'id': 2,
+        'answer_sha256': '5405782cb4e58bb9a408c597b3755ff19d2de0ea1bf3ae1162c5e0e0259d3478',
+        'body': CHALLENGE2_BODY,
+        'headers': {'X-Secret-Code': 'HEADER_HUNTER_42'},
+    },
+    {
+        'id': 3,
+        'answer_sha256': '64b8fdcc8de265364efc1ec80ab3ec264b752edbaa5c76101f4f982306a7d3bb',
+        'body': CHALLENGE3_BODY,
+    },
+]
+
+FULL_MASK = 0
+for index, challenge in enumerate(CHALLENGES):
+    challenge['bit'] = 1 << (challenge['id'] - 1)
+    if index + 1 < len(CHALLENGES):
+        following = CHALLENGES[index + 1]['id']
+        challenge['success_body'] = success_body(challenge['id'], f'Challenge {following}', f'/challenge{following}')
+    else:
+        challenge['success_body'] = success_body(challenge['id'], 'Victory', '/victory')
+    challenge['error_body'] = error_body(challenge['id'])
+    FULL_MASK |= challenge['bit']
+
+VICTORY_LOCKED_BODY = """
+<div class="challenge-card">
+    <div class="error-message">
+        🚫 Nice try! But you need to complete all challenges first!
+    </div>
+    <div style="text-align: center; margin-top: 20px;">
+        <a href="/" style="text-decoration: none;">
+            <button>Start Over</button>
+        </a>
+    </div>
+</div>
+"""
+
+VICTORY_BODY = """
+<div class="challenge-card">
+    <h1>🎉 Congratulations, Web Scraping Master! 🎉</h1>
+    <p>You've successfully completed all challenges and demonstrated these web scraping skills:</p>
+    <ul>
+        <li>✅ Finding hidden HTML comments</li>
+        <li>✅ Inspecting HTTP headers</li>
+        <li>✅ Decoding base64 encoded content</li>
+    </ul>
+    <div style="text-align: center; margin-top: 20px;">
+        <a href="/" style="text-decoration: none;">
+            <button>Start Over</button>
+        </a>
+    </div>
+</div>
+"""
+
+@lru_cache(maxsize=1024)
+def render_progress_bar(mask):
+    # Progress is a bitmask of completed challenges; each bar is built once
+    completed = (mask & FULL_MASK).bit_count()
+    total = len(CHALLENGES)
     progress_percent = (completed / total) * 100
-    
-    challenges_status = ""
-    for i in range(1, total + 1):
-        challenge_key = f'challenge{i}'
-        is_complete = session['progress'][challenge_key]
-        is_current = current_challenge and current_challenge == i
-        
+
+    badges = []
+    for challenge in CHALLENGES:
+        is_complete = mask & challenge['bit']
         status_class = 'complete' if is_complete else 'incomplete'
         icon = '✅' if is_complete else '⏳'
-        
-        challenges_status += f"""
+        badges.append(f"""
         <div class="badge {status_class}">
-            {icon} Challenge {i}
-        </div>
-        """
+            {icon} Challenge {challenge['id']}
+        </div>""")
 
     return f"""
-    <div class="top-progress">
-        <div class="progress-container">
-            <div class="progress-stats">
-                Progress: {completed}/{total} Challenges Complete
-            </div>
-            <div class="progress-stats">
-                {progress_percent:.0f}% Complete
-            </div>
+<div class="top-progress">
+    <div class="progress-container">
+        <div class="progress-stats">
+            Progress: {completed}/{total} Challenges Complete
         </div>
-        <div class="progress-bar">
-            <div class="progress-fill" style="width: {progress_percent}%"></div>
-        </div>
-        <div class="challenge-badges">
-            {challenges_status}
+        <div class="progress-stats">
+            {progress_percent:.0f}% Complete
         </div>
     </div>
-    """
+    <div class="progress-bar">
+        <div class="progress-fill" style="width: {progress_percent}%"></div>
+    </div>
+    <div class="challenge-badges">{''.join(badges)}
+    </div>
+</div>
+"""
+
+def get_progress_bar():
+    return render_progress_bar(g.progress)
+
+def page(body):
+    return ''.join((COMMON_HEAD, get_progress_bar(), body))
+
+def load_progress(token):
+    try:
+        return int(progress_signer.unsign(token, max_age=PROGRESS_TOKEN_MAX_AGE), 16) & FULL_MASK
+    except (BadSignature, ValueError):
+        return 0
 
 @app.before_request
 def initialize_progress():
-    if 'progress' not in session:
-        session['progress'] = {'challenge1': False, 'challenge2': False, 'challenge3': False}
+    token = request.cookies.get(PROGRESS_COOKIE)
+    g.progress = load_progress(token) if token else 0
+    g.initial_progress = g.progress if token else None
+
+@app.after_request
+def save_progress(response):
+    progress = g.get('progress')
+    if progress is not None and progress != g.initial_progress:
+        response.set_cookie(PROGRESS_COOKIE, progress_signer.sign(format(progress, 'x')).decode(),
+                            max_age=PROGRESS_TOKEN_MAX_AGE, httponly=True, samesite='Lax')
+    return response
+
+@app.route("/styles.css")
+def stylesheet():
+    response = Response(STYLESHEET_BYTES, mimetype='text/css')
+    response.set_etag(STYLESHEET_ETAG)
+    # The URL carries the content hash, so it can be cached forever
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
 
 @app.route("/")
 def home():
-    session['progress'] = {'challenge1': False, 'challenge2': False, 'challenge3': False}
-    return f"""
-    {COMMON_STYLES}
-    {get_progress_bar()}
-    <div class="challenge-card">
-        <h1>Welcome to the Web Scraping Adventure! 🗺️</h1>
-        <p>Embark on a journey to find hidden treasures using your web scraping skills!</p>
-        <p>Rules:</p>
-        <ul>
-            <li>Each challenge requires different web scraping techniques</li>
-            <li>Find the secret code in each challenge to progress</li>
-            <li>Use tools like 'View Page Source' and your browser's developer tools</li>
-            <li>Need help? Click the hint buttons!</li>
-        </ul>
-        <div style="text-align: center; margin-top: 20px;">
-            <a href="/challenge1" style="text-decoration: none;">
-                <button>Start Adventure!</button>
-            </a>
-        </div>
-    </div>
-    <script type="text/javascript">
-        function toggleHint(id) {
-            const hint = document.getElementById(id);
-            hint.style.display = hint.style.display === 'none' ? 'block' : 'none';
-        }
-    </script>
-    """
-
-@app.route("/challenge1", methods=['GET', 'POST'])
-def challenge1():
-    if request.method == 'POST':
-        if request.form.get('code') == 'PYTHON_EXPLORER_2024':
-            session['progress']['challenge1'] = True
-            return f"""
-            {COMMON_STYLES}
-            {get_progress_bar(1)}
-            <div class="challenge-card">
-                <div class="success-message">
-                    <h2>✅ Challenge 1 Complete!</h2>
-                    <p>Moving to Challenge 2...</p>
-                </div>
-            </div>
-            <script>setTimeout(() => window.location.href = '/challenge2', 2000)</script>
-            """
-        return f"""
-        {COMMON_STYLES}
-        {get_progress_bar(1)}
-        <div class="challenge-card">
-            <div class="error-message">❌ Incorrect code. Try again!</div>
-            <a href="/challenge1">Back to Challenge 1</a>
-        </div>
-        """
+    g.progress = 0
+    return page(HOME_BODY)
 
-    return f"""
-    {COMMON_STYLES}
-    {get_progress_bar(1)}
-    <div class="challenge-card">
-        <h1>Challenge 1: Hidden in Plain Sight 👀</h1>
-        <!-- Secret Code: PYTHON_EXPLORER_2024 -->
-        <p>Find the secret code hidden in this page's source code!</p>
-        
-        <div class="hint-btn" onclick="toggleHint('hint1')">🔍 Need a hint?</div>
-        <p id="hint1" class="hint">
-            Hint 1: Right-click on the page and select "View Page Source"<br>
-            Hint 2: Look for HTML comments (they start with &lt;!-- and end with --&gt;)
-        </p>
-
-        <form class="code-form" method="POST">
-            <input type="text" name="code" class="code-input" placeholder="Enter the secret code">
-            <button type="submit">Submit</button>
-        </form>
-    </div>
-    """
-
-@app.route("/challenge2", methods=['GET', 'POST'])
-def challenge2():
-    if request.method == 'POST':
-        if request.form.get('code') == 'HEADER_HUNTER_42':
-            session['progress']['challenge2'] = True
-            return f"""
-            {COMMON_STYLES}
-            {get_progress_bar(2)}
-            <div class="challenge-card">
-                <div class="success-message">
-                    <h2>✅ Challenge 2 Complete!</h2>
-                    <p>Moving to Challenge 3...</p>
-                </div>
-            </div>
-            <script>setTimeout(() => window.location.href = '/challenge3', 2000)</script>
-            """
-        return f"""
-        {COMMON_STYLES}
-        {get_progress_bar(2)}
-        <div class="challenge-card">
-            <div class="error-message">❌ Incorrect code. Try again!</div>
-            <a href="/challenge2">Back to Challenge 2</a>
-        </div>
-        """
-
-    response = Response(f"""
-    {COMMON_STYLES}
-    {get_progress_bar(2)}
-    <div class="challenge-card">
-        <h1>Challenge 2: Headers and Metadata 🔍</h1>
-        <p>The secret code is hidden in the response headers!</p>
-        
-        <div class="hint-btn" onclick="toggleHint('hint2')">🔍 Need a hint?</div>
-        <p id="hint2" class="hint">
-            Hint 1: Open Developer Tools (F12 or right-click -> Inspect)<br>
-            Hint 2: Go to the Network tab and refresh the page<br>
-            Hint 3: Look for a header starting with 'X-Secret'
-        </p>
-
-        <form class="code-form" method="POST">
-            <input type="text" name="code" class="code-input" placeholder="Enter the secret code">
-            <button type="submit">Submit</button>
-        </form>
-    </div>
-    """)
-    response.headers['X-Secret-Code'] = 'HEADER_HUNTER_42'
-    return response
+def make_challenge_view(challenge):
+    def challenge_view():
+        if request.method == 'POST':
+            code = request.form.get('code') or ''
+            digest = hashlib.sha256(code.encode()).hexdigest()
+            if hmac.compare_digest(digest, challenge['answer_sha256']):
+                g.progress |= challenge['bit']
+                return page(challenge['success_body'])
+            return page(challenge['error_body'])
 
-@app.route("/challenge3", methods=['GET', 'POST'])
-def challenge3():
-    if request.method == 'POST':
-        if request.form.get('code') == 'MASTER_SCRAPER_99':
-            session['progress']['challenge3'] = True
-            return f"""
-            {COMMON_STYLES}
-            {get_progress_bar(3)}
-            <div class="challenge-card">
-                <div class="success-message">
-                    <h2>✅ Challenge 3 Complete!</h2>
-                    <p>Moving to Victory...</p>
-                </div>
-            </div>
-            <script>setTimeout(() => window.location.href = '/victory', 2000)</script>
-            """
-        return f"""
-        {COMMON_STYLES}
-        {get_progress_bar(3)}
-        <div class="challenge-card">
-            <div class="error-message">❌ Incorrect code. Try again!</div>
-            <a href="/challenge3">Back to Challenge 3</a>
-        </div>
-        """
+        response = Response(page(challenge['body']))
+        response.headers.update(challenge.get('headers', {}))
+        return response
+    return challenge_view
 
-    secret_message = base64.b64encode("MASTER_SCRAPER_99".encode()).decode()
-    return f"""
-    {COMMON_STYLES}
-    {get_progress_bar(3)}
-    <div class="challenge-card">
-        <h1>Challenge 3: Encoding Secrets 🔐</h1>
-        <p>This secret code is encoded in base64. Decode it to proceed!</p>
-        <div class="secret" data-encoded="{secret_message}"></div>
-        
-        <div class="hint-btn" onclick="toggleHint('hint3')">🔍 Need a hint?</div>
-        <p id="hint3" class="hint">
-            Hint 1: Find the encoded data in the div's 'data-encoded' attribute<br>
-            Hint 2: Use an online base64 decoder<br>
-            Hint 3: The encoded value is: {secret_message}
-        </p>
-
-        <form class="code-form" method="POST">
-            <input type="text" name="code" class="code-input" placeholder="Enter the decoded secret">
-            <button type="submit">Submit</button>
-        </form>
-    </div>
-    """
+for challenge in CHALLENGES:
+    app.add_url_rule(f"/challenge{challenge['id']}",
+                     endpoint=f"challenge{challenge['id']}",
+                     view_func=make_challenge_view(challenge),
+                     methods=['GET', 'POST'])
 
 @app.route("/victory")
 def victory():
-    if not all(session['progress'].values()):
-        return f"""
-        {COMMON_STYLES}
-        {get_progress_bar()}
-        <div class="challenge-card">
-            <div class="error-message">
-                🚫 Nice try! But you need to complete all challenges first!
-            </div>
-            <div style="text-align: center; margin-top: 20px;">
-                <a href="/" style="text-decoration: none;">
-                    <button>Start Over</button>
-                </a>
-            </div>
-        </div>
-        """
-    
-    return f"""
-    {COMMON_STYLES}
-    {get_progress_bar()}
-    <div class="challenge-card">
-        <h1>🎉 Congratulations, Web Scraping Master! 🎉</h1>
-        <p>You've successfully completed all challenges and demonstrated these web scraping skills:</p>
-        <ul>
-            <li>✅ Finding hidden HTML comments</li>
-            <li>✅ Inspecting HTTP headers</li>
-            <li>✅ Decoding base64 encoded content</li>
-        </ul>
-        <div style="text-align: center; margin-top: 20px;">
-            <a href="/" style="text-decoration: none;">
-                <button>Start Over</button>
-            </a>
-        </div>
-    </div>
-    """
+    if g.progress & FULL_MASK != FULL_MASK:
+        return page(VICTORY_LOCKED_BODY)
+
+    return page(VICTORY_BODY)
 
 if __name__ == "__main__":
     app.run(debug=True)
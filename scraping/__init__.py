@@ -0,0 +1,5 @@
+"""Reusable building blocks for the workshop's scraping exercises.
+
+The notebook walks through each technique one cell at a time; the modules
+here package the same crawls up so they can run against thousands of pages.
+"""
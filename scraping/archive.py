@@ -0,0 +1,342 @@
+"""Content-addressed, zstd-compressed archive of raw scraped pages.
+
+The notebook saves raw pages by hand (``open('enroz.html', 'w').write(res.text)``).
+That is one uncompressed file per fetch, and each new fetch overwrites the
+last. ``PageArchive`` keeps every fetch. Each distinct body is stored
+once, keyed by its SHA-256, as its own zstd frame appended to a single data
+file. A SQLite index maps every URL to its versions (fetch time, status,
+headers, body hash) and every body hash to its offset in the data file.
+Reading one page is one index lookup, one ``pread`` and one frame to
+decompress, however large the archive grows.
+
+Listing and product pages from one site are mostly the same template, so
+after the first ``train_after`` bodies the archive trains a zstd dictionary
+on them and compresses later bodies against it. Pages too small to
+compress well on their own then shrink to little more than their
+differences.
+
+    with PageArchive('books.archive') as archive:
+        archive.put_response(session.get(url))
+        html = archive.read(url)                # latest version
+        for record, body in archive.scan():     # offline parser re-runs
+            ...
+
+    python -m scraping.archive stats books.archive
+    python -m scraping.archive cat books.archive https://books.toscrape.com/
+
+Needs zstandard.
+"""
+import argparse
+from collections import namedtuple
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import zstandard as zstd
+except ImportError:  # pragma: no cover - optional dependency
+    zstd = None
+
+from .httpcache import normalize_url
+
+Record = namedtuple('Record', 'id url fetched_at status headers digest size')
+
+
+def _require_zstd():
+    if zstd is None:
+        raise ImportError('scraping.archive needs zstandard: pip install zstandard')
+
+
+class PageArchive:
+    """Append-only page archive in the directory ``path``.
+
+    Bodies are deduplicated by content hash, so fetching an unchanged page
+    again adds an index row and no data. Up to ``train_after`` bodies are
+    compressed without a dictionary and kept as training samples. Then a
+    ``dict_size``-byte dictionary is trained and used from then on; call
+    ``train`` to retrain once the site's templates change. The index is
+    committed every ``commit_every`` puts and on ``checkpoint()``. When an
+    archive is reopened, data appended after the last commit is cut off, so
+    a crash never leaves bodies the index doesn't know about. All methods
+    are thread-safe.
+    """
+
+    def __init__(self, path, level=9, dict_size=112 * 1024, train_after=200, commit_every=100):
+        _require_zstd()
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.level = level
+        self.dict_size = dict_size
+        self.train_after = train_after
+        self.commit_every = commit_every
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._samples = []
+        self._compressors = {}
+        self._decompressors = {}
+
+        self._db = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript('''
+        CREATE TABLE IF NOT EXISTS dictionaries (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS blobs (
+            id INTEGER PRIMARY KEY,
+            digest BLOB UNIQUE NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            dictionary INTEGER REFERENCES dictionaries (id)
+        );
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY,
+            url INTEGER NOT NULL REFERENCES urls (id),
+            fetched_at REAL NOT NULL,
+            status INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            blob INTEGER NOT NULL REFERENCES blobs (id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_records_url ON records (url, fetched_at);
+        ''')
+        self._db.commit()
+        row = self._db.execute('SELECT MAX(id) FROM dictionaries').fetchone()
+        self.dictionary = row[0]
+
+        data_path = os.path.join(path, 'pages.zst')
+        self._data = open(data_path, 'a+b')
+        end = self._db.execute('SELECT COALESCE(MAX(offset + length), 0) FROM blobs').fetchone()[0]
+        if os.path.getsize(data_path) > end:
+            # Frames written after the last index commit were never acknowledged
+            self._data.truncate(end)
+        self._end = end
+
+    # Compression
+
+    def _compressor(self, dictionary):
+        compressor = self._compressors.get(dictionary)
+        if compressor is None:
+            if dictionary is None:
+                compressor = zstd.ZstdCompressor(level=self.level)
+            else:
+                compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._dictionary_data(dictionary))
+            self._compressors[dictionary] = compressor
+        return compressor
+
+    def _decompressor(self, dictionary):
+        decompressor = self._decompressors.get(dictionary)
+        if decompressor is None:
+            if dictionary is None:
+                decompressor = zstd.ZstdDecompressor()
+            else:
+                decompressor = zstd.ZstdDecompressor(dict_data=self._dictionary_data(dictionary))
+            self._decompressors[dictionary] = decompressor
+        return decompressor
+
+    def _dictionary_data(self, dictionary):
+        data = self._db.execute('SELECT data FROM dictionaries WHERE id = ?', (dictionary,)).fetchone()[0]
+        return zstd.ZstdCompressionDict(data)
+
+    def train(self, samples=None):
+        """Train a new dictionary on ``samples`` (by default the most recently
+        stored bodies) and compress new bodies with it. Returns its id."""
+        with self._lock:
+            if samples is None:
+                samples = self._samples or [body for _, body in self._recent_bodies(self.train_after)]
+            if len(samples) < 8:
+                return self.dictionary
+            try:
+                trained = zstd.train_dictionary(self.dict_size, samples, level=self.level)
+            except zstd.ZstdError:
+                # Too little or too uniform sample data to build a dictionary from
+                return self.dictionary
+            cursor = self._db.execute('INSERT INTO dictionaries (data, created_at) VALUES (?, ?)',
+                                      (trained.as_bytes(), time.time()))
+            self.dictionary = cursor.lastrowid
+            self._samples = []
+            self.checkpoint()
+            return self.dictionary
+
+    def _recent_bodies(self, limit):
+        rows = self._db.execute('SELECT id FROM blobs ORDER BY offset DESC LIMIT ?', (limit,)).fetchall()
+        return [(blob, self._read_blob(blob)) for (blob,) in rows]
+
+    # Writing
+
+    def put(self, url, body, status=200, headers=None, fetched_at=None):
+        """Record a fetch of ``url``; returns the body's hex digest."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(body).digest()
+        url = normalize_url(url)
+        with self._lock:
+            row = self._db.execute('SELECT id FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            blob = row[0] if row else self._append(digest, body)
+            self._db.execute('INSERT OR IGNORE INTO urls (url) VALUES (?)', (url,))
+            self._db.execute('''
+            INSERT INTO records (url, fetched_at, status, headers, blob)
+            SELECT id, ?, ?, ?, ? FROM urls WHERE url = ?
+            ''', (fetched_at or time.time(), status, json.dumps(dict(headers or {})), blob, url))
+            self._changed()
+        return digest.hex()
+
+    def put_response(self, response, fetched_at=None):
+        """Record a ``requests`` response under its final URL."""
+        return self.put(response.url, response.content, response.status_code, response.headers, fetched_at)
+
+    def _append(self, digest, body):
+        frame = self._compressor(self.dictionary).compress(body)
+        self._data.seek(self._end)
+        self._data.write(frame)
+        cursor = self._db.execute('''
+        INSERT INTO blobs (digest, offset, length, size, dictionary) VALUES (?, ?, ?, ?, ?)
+        ''', (digest, self._end, len(frame), len(body), self.dictionary))
+        self._end += len(frame)
+        if self.dictionary is None and self.train_after:
+            self._samples.append(body)
+            if len(self._samples) >= self.train_after:
+                self.train()
+        return cursor.lastrowid
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        with self._lock:
+            # Data before index, so a committed row never points past the file
+            self._data.flush()
+            os.fsync(self._data.fileno())
+            self._db.commit()
+            self._pending = 0
+
+    # Reading
+
+    def _read_blob(self, blob=None, digest=None):
+        with self._lock:
+            if digest is None:
+                row = self._db.execute('SELECT offset, length, size, dictionary FROM blobs WHERE id = ?',
+                                       (blob,)).fetchone()
+            else:
+                row = self._db.execute('SELECT offset, length, size, dictionary FROM blobs WHERE digest = ?',
+                                       (digest,)).fetchone()
+            if row is None:
+                return None
+            offset, length, size, dictionary = row
+            self._data.flush()
+            decompressor = self._decompressor(dictionary)
+        frame = os.pread(self._data.fileno(), length, offset)
+        return decompressor.decompress(frame, max_output_size=size)
+
+    def get(self, digest):
+        """The body whose SHA-256 is ``digest`` (hex), or None."""
+        return self._read_blob(digest=bytes.fromhex(digest))
+
+    def _records(self, where='', params=()):
+        with self._lock:
+            rows = self._db.execute(f'''
+            SELECT r.id, u.url, r.fetched_at, r.status, r.headers, b.digest, b.size, b.id
+            FROM records r JOIN urls u ON u.id = r.url JOIN blobs b ON b.id = r.blob
+            {where}
+            ''', params).fetchall()
+        return [(Record(*row[:4], json.loads(row[4]), row[5].hex(), row[6]), row[7]) for row in rows]
+
+    def versions(self, url):
+        """Every recorded fetch of ``url``, oldest first."""
+        records = self._records('WHERE u.url = ? ORDER BY r.fetched_at, r.id', (normalize_url(url),))
+        return [record for record, _ in records]
+
+    def latest(self, url, before=None):
+        """The newest fetch of ``url`` (at or before ``before`` if given), or None."""
+        versions = [record for record in self.versions(url) if before is None or record.fetched_at <= before]
+        return versions[-1] if versions else None
+
+    def read(self, url, before=None):
+        """The body of the newest fetch of ``url``, or None."""
+        record = self.latest(url, before)
+        return None if record is None else self.get(record.digest)
+
+    def urls(self):
+        with self._lock:
+            return [url for (url,) in self._db.execute('SELECT url FROM urls ORDER BY url')]
+
+    def scan(self, latest_only=True):
+        """Yield ``(record, body)`` for every URL's newest fetch (or every
+        fetch), in data-file order so the archive is read sequentially."""
+        where = '''WHERE r.id = (SELECT id FROM records WHERE url = r.url
+                                ORDER BY fetched_at DESC, id DESC LIMIT 1)''' if latest_only else ''
+        for record, blob in self._records(where + ' ORDER BY b.offset, r.id'):
+            yield record, self._read_blob(blob)
+
+    def stats(self):
+        with self._lock:
+            records = self._db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+            urls = self._db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+            blobs, stored, raw = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            fetched = self._db.execute(
+                'SELECT COALESCE(SUM(b.size), 0) FROM records r JOIN blobs b ON b.id = r.blob').fetchone()[0]
+        return {
+            'records': records,
+            'urls': urls,
+            'blobs': blobs,
+            'fetched_bytes': fetched,
+            'unique_bytes': raw,
+            'stored_bytes': stored,
+            'ratio': round(fetched / stored, 1) if stored else 0.0,
+            'dictionary': self.dictionary,
+        }
+
+    def close(self):
+        self.checkpoint()
+        self._db.close()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect a page archive.')
+    parser.add_argument('command', choices=['stats', 'ls', 'versions', 'cat'])
+    parser.add_argument('archive')
+    parser.add_argument('url', nargs='?')
+    args = parser.parse_args(argv)
+    if args.command in ('versions', 'cat') and not args.url:
+        parser.error(f'{args.command} needs a URL')
+
+    with PageArchive(args.archive) as archive:
+        if args.command == 'stats':
+            for name, value in archive.stats().items():
+                print(f'{name}: {value}')
+        elif args.command == 'ls':
+            for url in archive.urls():
+                print(url)
+        elif args.command == 'versions':
+            for record in archive.versions(args.url):
+                fetched = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.fetched_at))
+                print(f'{fetched}  {record.status}  {record.size:>9}  {record.digest[:16]}')
+        else:
+            body = archive.read(args.url)
+            if body is None:
+                sys.exit(f'{args.url} is not in the archive')
+            sys.stdout.buffer.write(body)
+
+
+if __name__ == '__main__':
+    main()
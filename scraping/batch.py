@@ -0,0 +1,311 @@
+"""Bounded, streaming batch client for per-item APIs such as autocomplete.
+
+The notebook's autocomplete cell maps a thread pool over the string "Ram"
+(so it looks up "R", "a" and "m"), appends to a shared list without a lock
+and only writes ``categorical.json`` at the very end. ``BatchClient`` reads
+items lazily, keeps a fixed number of requests in flight, gives every
+worker thread its own pooled ``requests.Session`` and appends each result
+to a JSONL file as soon as it is ready. A checkpoint file lets an
+interrupted run pick up where it stopped.
+
+    python -m scraping.batch names.txt --out categorical.jsonl --checkpoint names.ckpt
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+AUTOCOMPLETE_URL = 'https://www.famousbirthdays.com/api/autocomplete'
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Checkpoint:
+    """Tracks which input positions are finished, without keeping them all.
+
+    Everything below ``watermark`` is done except the positions in
+    ``failed``, which the next run retries; ``done`` holds the finished
+    positions past it, which stays small because results complete roughly
+    in order. Failures advance the watermark like successes, so only they,
+    not everything after the first one, are kept. The file is replaced
+    atomically so a crash leaves either the old or the new state.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.watermark = 0
+        self.done = set()
+        self.failed = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.watermark = state['watermark']
+            self.done = set(state['done'])
+            self.failed = set(state.get('failed', ()))
+
+    def is_done(self, index):
+        if index < self.watermark:
+            return index not in self.failed
+        return index in self.done
+
+    def first_pending(self):
+        return min(self.failed, default=self.watermark)
+
+    def mark(self, index):
+        self.failed.discard(index)
+        if index < self.watermark:
+            return
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def mark_failed(self, index):
+        self.mark(index)
+        self.failed.add(index)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'watermark': self.watermark, 'done': sorted(self.done),
+                       'failed': sorted(self.failed)}, f)
+        os.replace(tmp_path, self.path)
+
+
+class BatchStats:
+    def __init__(self):
+        self.submitted = 0
+        self.succeeded = 0
+        self.empty = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        finished = self.succeeded + self.empty + self.failed
+        return {
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'empty': self.empty,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'elapsed_s': round(elapsed, 3),
+            'items_per_second': round(finished / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def make_session(pool_size=1, retries=2):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                          max_retries=Retry(total=retries, backoff_factor=0.3,
+                                            status_forcelist=(429, 500, 502, 503, 504)))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'Mozilla/5.0'
+    return session
+
+
+def fetch_autocomplete(session, name, api_url=AUTOCOMPLETE_URL, timeout=10):
+    response = session.get(api_url, params={'term': name}, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    suggestions = data.get('suggestions') if data else None
+    if not suggestions:
+        return None
+    return {'name': name, 'data': suggestions[0]['data'], 'value': suggestions[0]['value']}
+
+
+class BatchClient:
+    """Run ``fetch(session, item)`` over many items with bounded memory.
+
+    At most ``max_in_flight`` items are queued or running at any time. In
+    ``ordered`` mode results are written in input order, and an item's slot
+    is only freed once it has been written, so a slow item holds back at
+    most ``max_in_flight`` finished ones. ``rate`` caps requests per second.
+
+    Items whose fetch raised are written as ``{'name', 'error'}`` records
+    and kept in the checkpoint's retry list, so resuming retries them (and
+    the sink may then hold both the error and the result). The list holds
+    at most ``max_failed`` items: past that the API is taken to be down, no
+    more items are submitted and ``run`` raises ``RuntimeError`` so the run
+    can be resumed later. Likewise if the sink itself raises, ``run``
+    re-raises once the items in flight have finished.
+    """
+
+    def __init__(self, fetch, workers=32, max_in_flight=None, rate=None,
+                 ordered=False, checkpoint=None, checkpoint_every=100, max_failed=10000):
+        self.fetch = fetch
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        self.limiter = RateLimiter(rate) if rate else None
+        self.ordered = ordered
+        self.checkpoint = Checkpoint(checkpoint)
+        self.checkpoint_every = checkpoint_every
+        self.max_failed = max_failed
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = make_session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _call(self, item):
+        if self.limiter is not None:
+            self.limiter.wait()
+        try:
+            return self.fetch(self._session(), item), None
+        except Exception as e:
+            return None, e
+
+    def run(self, items, sink):
+        stats = BatchStats()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        lock = threading.Lock()
+        pending = {}
+        next_index = [self.checkpoint.first_pending()]
+        since_save = [0]
+
+        failure = []
+
+        def write(index, item, result, error):
+            if error is not None:
+                stats.failed += 1
+                sink.write({'name': item, 'error': repr(error)})
+                # Kept for the next run to retry
+                self.checkpoint.mark_failed(index)
+                if len(self.checkpoint.failed) > self.max_failed:
+                    raise RuntimeError(f'{len(self.checkpoint.failed)} items failed; '
+                                       f'stopping so the run can be resumed later')
+            elif result is None:
+                stats.empty += 1
+                self.checkpoint.mark(index)
+            else:
+                stats.succeeded += 1
+                sink.write(result)
+                self.checkpoint.mark(index)
+            since_save[0] += 1
+            if since_save[0] >= self.checkpoint_every:
+                self.checkpoint.save()
+                since_save[0] = 0
+
+        def on_done(index, item, future):
+            result, error = future.result()
+            with lock:
+                if failure:
+                    slots.release()
+                    return
+                try:
+                    if not self.ordered:
+                        try:
+                            write(index, item, result, error)
+                        finally:
+                            slots.release()
+                        return
+                    pending[index] = (item, result, error)
+                    while True:
+                        while self.checkpoint.is_done(next_index[0]) and next_index[0] not in pending:
+                            next_index[0] += 1
+                        if next_index[0] not in pending:
+                            break
+                        entry = pending.pop(next_index[0])
+                        try:
+                            write(next_index[0], *entry)
+                        finally:
+                            next_index[0] += 1
+                            slots.release()
+                except BaseException as e:
+                    # The sink failed or too many items did: stop submitting, free
+                    # the slots of results that will never be written and
+                    # re-raise from run()
+                    failure.append(e)
+                    for _ in pending:
+                        slots.release()
+                    pending.clear()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for index, item in enumerate(items):
+                    if self.checkpoint.is_done(index):
+                        stats.skipped += 1
+                        continue
+                    slots.acquire()
+                    if failure:
+                        slots.release()
+                        break
+                    stats.submitted += 1
+                    future = executor.submit(self._call, item)
+                    future.add_done_callback(lambda f, index=index, item=item: on_done(index, item, f))
+        finally:
+            # Runs after in-flight items have drained, even when interrupted
+            self.checkpoint.save()
+            for session in self._sessions:
+                session.close()
+        if failure:
+            raise failure[0]
+        return stats
+
+
+def read_items(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def main():
+    from .sinks import JsonlSink
+
+    parser = argparse.ArgumentParser(description='Look up names against the autocomplete API')
+    parser.add_argument('names', help='file with one name per line')
+    parser.add_argument('--out', default='categorical.jsonl')
+    parser.add_argument('--api-url', default=AUTOCOMPLETE_URL)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--max-in-flight', type=int)
+    parser.add_argument('--rate', type=float, help='max requests per second')
+    parser.add_argument('--ordered', action='store_true')
+    parser.add_argument('--checkpoint', help='resume file; defaults to <out>.ckpt')
+    args = parser.parse_args()
+
+    def fetch(session, name):
+        return fetch_autocomplete(session, name, api_url=args.api_url)
+
+    client = BatchClient(fetch, workers=args.workers, max_in_flight=args.max_in_flight,
+                         rate=args.rate, ordered=args.ordered,
+                         checkpoint=args.checkpoint or args.out + '.ckpt')
+    with JsonlSink(args.out) as sink:
+        stats = client.run(read_items(args.names), sink)
+    print(stats.as_dict())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""books.toscrape.com extraction, as built up step by step in the notebook.
+
+    python -m scraping.books --out books_data.csv
+"""
+import argparse
+from urllib.parse import urljoin
+
+from .parsers import BOOK, BOOK_LINKS, compile_schema
+
+HOME_LINK = 'https://books.toscrape.com/'
+BOOK_FIELDS = ['Title', 'Price', 'Rating', 'Description']
+
+# Compiled once for the fastest installed parser backend
+extract_book = compile_schema(BOOK)
+extract_catalogue = compile_schema(BOOK_LINKS)
+
+
+def parse_catalogue(base_url, body):
+    """Return the absolute URLs of the books listed on a catalogue page."""
+    return [urljoin(base_url, link['href']) for link in extract_catalogue(body) if link['href']]
+
+
+def parse_book(url, body):
+    record = extract_book(body)[0]
+    return record if record['Title'] else None
+
+
+def main():
+    import requests
+    from .crawler import Crawler
+    from .sinks import DedupSink
+
+    parser = argparse.ArgumentParser(description='Crawl books.toscrape.com')
+    parser.add_argument('--start', default=HOME_LINK)
+    parser.add_argument('--out', default='books_data.csv')
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    urls = parse_catalogue(args.start, requests.get(args.start, timeout=30).content)
+    # Reruns only append books that are new or whose details changed
+    with DedupSink(args.out, key='Title', fieldnames=BOOK_FIELDS) as sink:
+        crawler = Crawler(parse_book, sink=sink, concurrency=args.concurrency)
+        stats = crawler.run(urls)
+    print(stats.as_dict(), sink.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""Pool of warm headless Chrome drivers for JavaScript-rendered pages.
+
+The notebook's ``google_search()`` starts a new Chrome for every query,
+passes the options to ``Service`` (so ``--headless`` is silently ignored)
+and sleeps five seconds before quitting. ``BrowserPool`` starts ``size``
+drivers once and leases them to jobs. A driver is replaced after
+``max_pages`` jobs, to keep Chrome's memory growth in check, or as soon as
+it stops responding. Jobs wait on page state with explicit waits rather
+than fixed sleeps.
+
+    with BrowserPool(size=4) as pool:
+        for results in pool.map(google_search, queries):
+            print(results)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import queue
+import threading
+import time
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:  # pragma: no cover - optional dependency
+    webdriver = None
+
+GOOGLE_URL = 'https://www.google.com'
+
+
+def chrome_options(headless=True, images=False, arguments=()):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    if not images:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+    for argument in arguments:
+        options.add_argument(argument)
+    # Return from get() once the DOM is ready; jobs wait for what they need
+    options.page_load_strategy = 'eager'
+    return options
+
+
+def launch_chrome(headless=True, images=False, arguments=()):
+    if webdriver is None:
+        raise ImportError('scraping.browser needs selenium: pip install selenium')
+    return webdriver.Chrome(options=chrome_options(headless, images, arguments))
+
+
+def wait_for(driver, css, timeout=10, visible=False):
+    """Block until an element matching ``css`` exists (or is visible) and return it."""
+    condition = EC.visibility_of_element_located if visible else EC.presence_of_element_located
+    return WebDriverWait(driver, timeout).until(condition((By.CSS_SELECTOR, css)))
+
+
+class _Lease:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class PoolStats:
+    def __init__(self):
+        self.jobs = 0
+        self.failed = 0
+        self.launched = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.launch_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'jobs': self.jobs,
+            'failed': self.failed,
+            'launched': self.launched,
+            'recycled': self.recycled,
+            'crashed': self.crashed,
+            'launch_s': round(self.launch_seconds, 3),
+            'elapsed_s': round(elapsed, 3),
+            'pages_per_minute': round(self.jobs * 60 / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class BrowserPool:
+    """Lease warm WebDriver instances to jobs, one job per driver at a time.
+
+    ``launch()`` creates a driver (``launch_chrome`` by default). Drivers
+    are started up front unless ``warm=False``. A driver that has served
+    ``max_pages`` jobs is quit and replaced on its next return; one that
+    fails a liveness check after a job raised is treated as crashed and
+    replaced immediately.
+    """
+
+    def __init__(self, size=4, max_pages=50, launch=None, page_load_timeout=30, warm=True):
+        self.size = size
+        self.max_pages = max_pages
+        self.launch = launch or launch_chrome
+        self.page_load_timeout = page_load_timeout
+        self.stats = PoolStats()
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        if warm:
+            with ThreadPoolExecutor(max_workers=size) as executor:
+                futures = [executor.submit(self._new_lease) for _ in range(size)]
+            leases = [future.result() for future in futures if not future.exception()]
+            if len(leases) < size:
+                # Don't leave the browsers that did start running
+                for lease in leases:
+                    self._retire(lease)
+                next(future for future in futures if future.exception()).result()
+            for lease in leases:
+                self._idle.put(lease)
+        else:
+            for _ in range(size):
+                self._idle.put(None)
+
+    def _new_lease(self):
+        start = time.perf_counter()
+        driver = self.launch()
+        driver.set_page_load_timeout(self.page_load_timeout)
+        with self._lock:
+            self.stats.launched += 1
+            self.stats.launch_seconds += time.perf_counter() - start
+        return _Lease(driver)
+
+    def _retire(self, lease):
+        try:
+            lease.driver.quit()
+        except Exception:
+            pass
+
+    def _alive(self, driver):
+        try:
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Check out a driver for the duration of the ``with`` block."""
+        if self._closed:
+            raise RuntimeError('BrowserPool is closed')
+        lease = self._idle.get(timeout=timeout)
+        try:
+            if lease is None:
+                lease = self._new_lease()
+        except BaseException:
+            self._idle.put(None)
+            raise
+        try:
+            yield lease.driver
+        except BaseException:
+            if not self._alive(lease.driver):
+                with self._lock:
+                    self.stats.crashed += 1
+                self._retire(lease)
+                lease = None
+            raise
+        finally:
+            if lease is not None:
+                lease.pages += 1
+                if lease.pages >= self.max_pages:
+                    with self._lock:
+                        self.stats.recycled += 1
+                    self._retire(lease)
+                    lease = None
+                elif self._closed:
+                    self._retire(lease)
+                    lease = None
+            # Replacements start lazily on the next lease, off the returning job's clock
+            self._idle.put(lease)
+
+    def run(self, job, item):
+        """Call ``job(driver, item)`` on a leased driver."""
+        with self.lease() as driver:
+            try:
+                result = job(driver, item)
+            except Exception:
+                with self._lock:
+                    self.stats.failed += 1
+                raise
+        with self._lock:
+            self.stats.jobs += 1
+        return result
+
+    def map(self, job, items, return_exceptions=False):
+        """Run ``job(driver, item)`` for every item on all drivers at once,
+        yielding results in input order."""
+        def call(item):
+            try:
+                return self.run(job, item)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            yield from executor.map(call, items)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                lease = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if lease is not None:
+                self._retire(lease)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def google_search(driver, query, timeout=10):
+    """The notebook's search, as a pool job: returns the result titles."""
+    driver.get(GOOGLE_URL)
+    search_box = wait_for(driver, '[name="q"]', timeout)
+    search_box.send_keys(query)
+    search_box.send_keys(Keys.RETURN)
+    wait_for(driver, '#search', timeout)
+    return [element.text for element in driver.find_elements(By.CSS_SELECTOR, '#search h3')
+            if element.text]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run Google searches on a pool of headless browsers')
+    parser.add_argument('queries', nargs='+')
+    parser.add_argument('--size', type=int, default=2)
+    parser.add_argument('--max-pages', type=int, default=50)
+    args = parser.parse_args()
+
+    with BrowserPool(size=args.size, max_pages=args.max_pages) as pool:
+        for query, results in zip(args.queries, pool.map(google_search, args.queries,
+                                                         return_exceptions=True)):
+            print(f'{query}: {results}')
+        print(pool.stats.as_dict())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Typed, columnar versions of the scraped CSV files.
+
+``books_data.csv`` keeps prices as "£51.77" and ratings as words, and
+``heightdata.csv`` keeps heights as "6ft 7 ½ (202cm)" with stray leading
+spaces in names. This module parses those columns once, vectorized with
+pyarrow compute kernels, and writes Parquet, Arrow IPC (``.arrow``) or
+NumPy (``.npz``) files that analytics can load directly.
+
+    python -m scraping.columnar books books_data.csv books.parquet
+    python -m scraping.columnar heights heightdata.csv heights.arrow
+
+Needs pyarrow (and numpy for ``.npz`` output).
+"""
+import argparse
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+RATING_WORDS = ['One', 'Two', 'Three', 'Four', 'Five']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('scraping.columnar needs pyarrow: pip install pyarrow')
+
+
+PRICE_PATTERN = r'^\s*[^\d\s]*\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*$'
+
+
+def parse_price(prices):
+    """'£51.77' or 'Rs.18,499' -> float64; anything that isn't a price becomes null."""
+    matches = pc.extract_regex(prices, pattern=PRICE_PATTERN)
+    number = pc.replace_substring(pc.struct_field(matches, 'number'), pattern=',', replacement='')
+    return pc.cast(number, pa.float64())
+
+
+def parse_currency(prices):
+    """The non-numeric prefix of a price, e.g. '£' or 'Rs.'."""
+    matches = pc.extract_regex(prices, pattern=r'^\s*(?P<currency>[^\d]*?)\s*(?:\d|$)')
+    return pc.struct_field(matches, 'currency')
+
+
+def parse_rating(ratings):
+    """'One'..'Five' -> 1..5 (int8); unknown words become null."""
+    index = pc.index_in(ratings, value_set=pa.array(RATING_WORDS))
+    return pc.cast(pc.add(index, 1), pa.int8())
+
+
+def parse_height_cm(heights):
+    """'6ft 7 ½ (202cm)' -> 202.0 (float64), taken from the metric part."""
+    matches = pc.extract_regex(heights, pattern=r'\((?P<cm>\d+(?:\.\d+)?)\s*cm\)')
+    return pc.cast(pc.struct_field(matches, 'cm'), pa.float64())
+
+
+def read_csv(path):
+    _require_pyarrow()
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f))
+    # Every column comes in as text; the parsers above do the typing
+    options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in header},
+                                    strings_can_be_null=False)
+    return pa_csv.read_csv(path, convert_options=options)
+
+
+def books_table(table):
+    """Typed columns for the books crawl (Title, Price, Rating, Description)."""
+    _require_pyarrow()
+    return pa.table({
+        'title': pc.utf8_trim_whitespace(table['Title']),
+        'price': parse_price(table['Price']),
+        'currency': pc.dictionary_encode(parse_currency(table['Price'])),
+        'rating': parse_rating(table['Rating']),
+        'description': table['Description'],
+    })
+
+
+def heights_table(table):
+    """Typed columns for the celebheights crawl (Name, Height)."""
+    _require_pyarrow()
+    return pa.table({
+        'name': pc.utf8_trim_whitespace(table['Name']),
+        'height': pc.utf8_trim_whitespace(table['Height']),
+        'height_cm': parse_height_cm(table['Height']),
+    })
+
+
+CONVERTERS = {
+    'books': books_table,
+    'heights': heights_table,
+}
+
+
+def write_table(table, path):
+    """Write by extension: .parquet, .arrow/.feather or .npz."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression='zstd')
+    elif path.endswith(('.arrow', '.feather')):
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression='zstd')
+    elif path.endswith('.npz'):
+        import numpy as np
+        columns = {}
+        for name in table.column_names:
+            column = table[name]
+            if pa.types.is_dictionary(column.type):
+                column = column.cast(column.type.value_type)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                # NumPy has no integer null, so numeric columns become float with NaN
+                columns[name] = column.cast(pa.float64()).to_numpy()
+            else:
+                columns[name] = np.array(column.to_pylist(), dtype=object)
+        np.savez(path, **columns)
+    else:
+        raise ValueError(f'Unsupported output format: {path}')
+
+
+def convert(kind, source, destination):
+    table = CONVERTERS[kind](read_csv(source))
+    write_table(table, destination)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a scraped CSV into typed columnar output')
+    parser.add_argument('kind', choices=sorted(CONVERTERS))
+    parser.add_argument('source')
+    parser.add_argument('destination', help='.parquet, .arrow/.feather or .npz')
+    args = parser.parse_args()
+
+    table = convert(args.kind, args.source, args.destination)
+    print(f'{table.num_rows} rows written to {args.destination}')
+    print(table.schema)
+
+
+if __name__ == '__main__':
+    main()
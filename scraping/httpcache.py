@@ -0,0 +1,245 @@
+"""Disk-backed HTTP cache with conditional revalidation.
+
+The notebook fetches the same catalogue pages more than once and saves
+raw copies by hand (``open('enroz.html', 'w').write(res.text)``).
+``CachedSession`` keeps every successful GET in a size-bounded SQLite
+store with compressed bodies. Repeat requests are revalidated with
+``If-None-Match`` / ``If-Modified-Since``, so an unchanged page costs a
+304 instead of a full download. With ``offline=True`` everything is served
+from the cache and the network is never touched, which makes rerunning a
+notebook or parser instant.
+
+    session = CachedSession('.http-cache')
+    res = session.get('https://books.toscrape.com/')
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL isn't in the cache."""
+
+
+def normalize_url(url):
+    """Canonical form used for cache keys: lowercase host, no default port,
+    no fragment and sorted query parameters."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+class ResponseCache:
+    """SQLite store of compressed responses, evicted least recently used
+    first once the stored bodies exceed ``max_bytes``."""
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, vary=('Accept', 'Accept-Language'),
+                 compress_level=6):
+        os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.vary = tuple(vary)
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'responses.db'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            vary TEXT NOT NULL DEFAULT '{}'
+        )
+        ''')
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(responses)')}
+        if 'vary' not in columns:
+            # Caches written before the response's Vary header was honoured
+            self._db.execute("ALTER TABLE responses ADD COLUMN vary TEXT NOT NULL DEFAULT '{}'")
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+        self._db.commit()
+        self.total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def key(self, url, headers=None):
+        """Key for a GET of ``url`` (with its query string) sent with ``headers``,
+        which should include the session's defaults."""
+        headers = CaseInsensitiveDict(headers or {})
+        material = [normalize_url(url)]
+        material.extend(f'{name.lower()}={headers.get(name, "")}' for name in self.vary)
+        return hashlib.sha256('\n'.join(material).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT url, status, headers, body, stored_at, vary FROM responses '
+                                   'WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+        url, status, headers, body, stored_at, vary = row
+        return {
+            'url': url,
+            'status': status,
+            'headers': json.loads(headers),
+            'body': zlib.decompress(body),
+            'stored_at': stored_at,
+            'vary': json.loads(vary),
+        }
+
+    def put(self, key, url, status, headers, body, vary=None):
+        """Store a response. ``vary`` maps the request headers named in the
+        response's ``Vary`` header to the values they were sent with."""
+        compressed = zlib.compress(body, self.compress_level)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute('''
+            INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, stored_at, last_access, vary)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, url, status, json.dumps(dict(headers)), compressed, len(compressed), now, now,
+                  json.dumps(vary or {})))
+            self.total_bytes += len(compressed) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def touch(self, key):
+        # A 304 confirmed the stored copy, so treat it as freshly fetched
+        now = time.time()
+        with self._lock:
+            self._db.execute('UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?',
+                             (now, now, key))
+            self._db.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute('SELECT key, size FROM responses ORDER BY last_access LIMIT 64').fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {'entries': entries, 'bytes': self.total_bytes, 'hits': self.hits,
+                'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self):
+        self._db.close()
+
+
+def build_response(entry, request_url):
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response._content = entry['body']
+    response.url = entry['url'] or request_url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+class CachedSession:
+    """A ``requests``-style session whose GETs go through a ``ResponseCache``.
+
+    ``fresh_for`` is how many seconds a stored response is used without
+    asking the origin at all; after that it is revalidated. Responses
+    without an ``ETag`` or ``Last-Modified`` can't be revalidated and are
+    refetched once stale.
+
+    Entries are keyed on the request as it is actually sent: the URL with
+    ``params`` applied plus the session's default headers. A stored response
+    is only reused when the request headers named in its ``Vary`` header
+    match; ``Vary: *`` responses aren't stored. Arguments that give the GET
+    a body (``data``, ``json``, ``files``) aren't supported.
+    """
+
+    def __init__(self, directory='.http-cache', offline=False, fresh_for=0, session=None, **cache_options):
+        self.cache = ResponseCache(directory, **cache_options)
+        self.offline = offline
+        self.fresh_for = fresh_for
+        self.session = session or requests.Session()
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        unsupported = {'data', 'json', 'files'} & kwargs.keys()
+        if unsupported:
+            raise TypeError(f'CachedSession.get() does not support {", ".join(sorted(unsupported))}')
+        prepared = self.session.prepare_request(requests.Request(
+            'GET', url, headers=headers, params=params,
+            cookies=kwargs.get('cookies'), auth=kwargs.get('auth')))
+        key = self.cache.key(prepared.url, prepared.headers)
+        entry = self.cache.get(key)
+        if entry is not None and any(prepared.headers.get(name) != value
+                                     for name, value in entry['vary'].items()):
+            # Stored for a request the origin would have answered differently
+            entry = None
+
+        if self.offline:
+            if entry is None:
+                self.cache.misses += 1
+                raise CacheMiss(url)
+            self.cache.hits += 1
+            return build_response(entry, url)
+
+        if entry is not None and time.time() - entry['stored_at'] < self.fresh_for:
+            self.cache.hits += 1
+            return build_response(entry, url)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            stored = CaseInsensitiveDict(entry['headers'])
+            if 'ETag' in stored:
+                request_headers['If-None-Match'] = stored['ETag']
+            if 'Last-Modified' in stored:
+                request_headers['If-Modified-Since'] = stored['Last-Modified']
+
+        response = self.session.get(url, headers=request_headers, params=params, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key)
+            self.cache.revalidated += 1
+            return build_response(entry, url)
+
+        self.cache.misses += 1
+        response.from_cache = False
+        vary = [name.strip() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        if response.status_code == 200 and '*' not in vary:
+            # Bodies are stored decoded; drop the now-inaccurate transfer headers
+            stored_headers = {name: value for name, value in response.headers.items()
+                              if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+            self.cache.put(key, response.url, response.status_code, stored_headers, response.content,
+                           vary={name: prepared.headers.get(name) for name in vary})
+        return response
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,255 @@
+"""Schema-driven HTML extraction with interchangeable parser backends.
+
+Every notebook extraction builds a BeautifulSoup tree with ``html.parser``,
+the slowest option, and walks it with hand-written ``find`` calls. Here an
+extraction is described once as a ``Schema`` of CSS selectors and compiled
+for a backend:
+
+    extract = compile_schema(ENROZ_PRODUCT, backend='lxml')
+    products = extract(open('enroz.html', 'rb').read())
+
+Backends are ``'bs4'`` (BeautifulSoup + html.parser, always available),
+``'lxml'`` (needs lxml and cssselect) and ``'selectolax'`` (needs
+selectolax). All of them return the same records for the schemas below.
+Pages given as bytes are decoded as UTF-8 unless the lxml backend is
+compiled with another ``encoding``.
+"""
+from functools import partial
+import time
+
+BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+
+class Field:
+    """How to pull one value out of a record's element.
+
+    ``selector`` is relative to the record element (``None`` means the
+    element itself). By default the stripped text of the first match is
+    returned; ``attr`` returns an attribute instead, ``count`` the number of
+    matches, and ``sep`` joins the element's text nodes with a separator the
+    way ``get_text(sep)`` does. ``transform`` post-processes the value and
+    must be a module-level function (or ``functools.partial``) so schemas
+    can be sent to worker processes.
+    """
+
+    def __init__(self, selector=None, attr=None, count=False, sep=None, transform=None, default=''):
+        self.selector = selector
+        self.attr = attr
+        self.count = count
+        self.sep = sep
+        self.transform = transform
+        self.default = default
+
+
+class Schema:
+    """A set of named fields, extracted once per element matching ``item``.
+
+    With ``item=None`` the whole document is a single record.
+    """
+
+    def __init__(self, fields, item=None):
+        self.item = item
+        self.fields = {name: field if isinstance(field, Field) else Field(field)
+                       for name, field in fields.items()}
+
+
+def last_class(value):
+    # 'star-rating Three' -> 'Three'
+    return value.split()[-1] if value else ''
+
+
+def split_part(value, index, sep='|'):
+    parts = value.split(sep)
+    return parts[index].strip() if len(parts) > index else ''
+
+
+ENROZ_PRODUCT = Schema(item='div.p-2', fields={
+    'name': Field('h3 a'),
+    'url': Field('h3 a', attr='href'),
+    'image_url': Field('div.img-area img', attr='src'),
+    'price': Field('div.product-price'),
+    'rating': Field('ul.rate i.far.fa-star', count=True),
+})
+
+BOOK = Schema(fields={
+    'Title': Field('div.product_main h1'),
+    'Price': Field('div.product_main p.price_color'),
+    'Rating': Field('div.product_main p.star-rating', attr='class', transform=last_class),
+    'Description': Field('div#product_description + p'),
+})
+
+BOOK_LINKS = Schema(item='ol.row article.product_pod h3 a', fields={
+    'href': Field(attr='href'),
+})
+
+CELEB_HEIGHT = Schema(item='div.sAZ2', fields={
+    'Name': Field(sep='|', transform=partial(split_part, index=1)),
+    'Height': Field(sep='|', transform=partial(split_part, index=2)),
+})
+
+
+class _Backend:
+    def __init__(self, schema):
+        self.schema = schema
+        self.fields = [(name, field, self.compile_selector(field.selector) if field.selector else None)
+                       for name, field in schema.fields.items()]
+        self.item = self.compile_selector(schema.item) if schema.item else None
+
+    def __call__(self, html):
+        root = self.parse(html)
+        elements = self.select(root, self.item) if self.item is not None else [root]
+        return [self.record(element) for element in elements]
+
+    def record(self, element):
+        record = {}
+        for name, field, selector in self.fields:
+            if field.count:
+                value = len(self.select(element, selector))
+            else:
+                target = self.select_one(element, selector) if selector is not None else element
+                if target is None:
+                    value = field.default
+                elif field.attr:
+                    value = self.attr(target, field.attr) or field.default
+                else:
+                    value = self.text(target, field.sep)
+            if field.transform is not None:
+                value = field.transform(value)
+            record[name] = value
+        return record
+
+
+class Bs4Backend(_Backend):
+    def __init__(self, schema):
+        from bs4 import BeautifulSoup
+        import soupsieve
+        self._soup = BeautifulSoup
+        self._compile = soupsieve.compile
+        super().__init__(schema)
+
+    def compile_selector(self, selector):
+        return self._compile(selector)
+
+    def parse(self, html):
+        return self._soup(html, 'html.parser')
+
+    def select(self, element, selector):
+        return selector.select(element)
+
+    def select_one(self, element, selector):
+        return selector.select_one(element)
+
+    def attr(self, element, name):
+        value = element.get(name)
+        # bs4 splits multi-valued attributes such as class into lists
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def text(self, element, sep):
+        return element.get_text(sep) if sep is not None else element.get_text().strip()
+
+
+class LxmlBackend(_Backend):
+    def __init__(self, schema, encoding='utf-8'):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self.encoding = encoding
+        self._fromstring = lxml.html.fromstring
+        # Without an explicit encoding lxml decodes bytes as latin-1 unless
+        # the page has a <meta charset>, so '£29.49' would come out 'Â£29.49'
+        self._parser = lxml.html.HTMLParser(encoding=encoding)
+        self._css = CSSSelector
+        super().__init__(schema)
+
+    def compile_selector(self, selector):
+        # Translated to XPath once and reused for every page
+        return self._css(selector)
+
+    def parse(self, html):
+        if isinstance(html, str):
+            return self._fromstring(html)
+        return self._fromstring(html, parser=self._parser)
+
+    def select(self, element, selector):
+        return selector(element)
+
+    def select_one(self, element, selector):
+        matches = selector(element)
+        return matches[0] if matches else None
+
+    def attr(self, element, name):
+        return element.get(name)
+
+    def text(self, element, sep):
+        return sep.join(element.itertext()) if sep is not None else element.text_content().strip()
+
+
+class SelectolaxBackend(_Backend):
+    def __init__(self, schema):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+        super().__init__(schema)
+
+    def compile_selector(self, selector):
+        # lexbor caches parsed selectors internally; nothing to precompile
+        return selector
+
+    def parse(self, html):
+        return self._parser(html).root
+
+    def select(self, element, selector):
+        return element.css(selector)
+
+    def select_one(self, element, selector):
+        return element.css_first(selector)
+
+    def attr(self, element, name):
+        return element.attributes.get(name)
+
+    def text(self, element, sep):
+        if sep is not None:
+            return element.text(deep=True, separator=sep, strip=False)
+        return element.text(deep=True).strip()
+
+
+_BACKEND_CLASSES = {
+    'bs4': Bs4Backend,
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+}
+
+
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        try:
+            _BACKEND_CLASSES[name](Schema({}))
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def compile_schema(schema, backend=None):
+    """Return ``extract(html) -> [record, ...]`` for the schema.
+
+    ``backend=None`` picks the fastest installed backend.
+    """
+    if backend is None:
+        backend = available_backends()[0]
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f'Unknown parser backend: {backend}')
+    return _BACKEND_CLASSES[backend](schema)
+
+
+def extract_many(pages, schema, backend=None):
+    """Extract records from an iterable of HTML pages.
+
+    Returns ``(records, seconds)`` where ``seconds`` is the time spent
+    parsing and extracting.
+    """
+    extract = compile_schema(schema, backend)
+    records = []
+    start = time.perf_counter()
+    for html in pages:
+        records.extend(extract(html))
+    return records, time.perf_counter() - start
@@ -0,0 +1,230 @@
+"""Two-stage scrape pipeline: threaded fetching, multi-process parsing.
+
+In the notebook's ThreadPoolExecutor cell every thread both downloads and
+parses, and since BeautifulSoup holds the GIL while it parses, adding
+threads stops helping after a few. ``Pipeline`` splits the two stages.
+Fetch threads put raw response bytes on a bounded queue. Batches of pages
+go to a process pool, where each worker has compiled the extraction
+``Schema`` once, so parsing runs on every core. Workers send records back
+as plain tuples in schema field order, and field names are not repeated
+per record, which keeps pickling cheap.
+
+    pipeline = Pipeline(BOOK, fetch_workers=32, processes=8)
+    with CsvSink('books.csv', BOOK_FIELDS) as sink:
+        stats = pipeline.run(book_urls, sink)
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from .batch import make_session
+from .parsers import compile_schema
+
+_DONE = object()
+
+# Per-process extractor, built by the pool initializer
+_extract = None
+_fields = None
+
+
+def _init_worker(schema, backend):
+    global _extract, _fields
+    _extract = compile_schema(schema, backend)
+    _fields = tuple(schema.fields)
+
+
+def _parse_batch(pages):
+    """Parse ``[(url, body), ...]`` into ``[(url, [row, ...]), ...]``."""
+    results = []
+    for url, body in pages:
+        try:
+            rows = [tuple(record[name] for name in _fields) for record in _extract(body)]
+        except Exception as e:
+            rows = e
+        results.append((url, rows))
+    return results
+
+
+def fetch_bytes(session, url, timeout=30):
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+class PipelineStats:
+    def __init__(self):
+        self.fetched = 0
+        self.fetch_failed = 0
+        self.parse_failed = 0
+        self.records = 0
+        self.bytes = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'fetched': self.fetched,
+            'fetch_failed': self.fetch_failed,
+            'parse_failed': self.parse_failed,
+            'records': self.records,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'elapsed_s': round(elapsed, 3),
+            'pages_per_second': round(self.fetched / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """Fetch URLs on threads and extract ``schema`` records in worker processes.
+
+    ``fetch(session, url)`` returns the page body as bytes
+    (``fetch_bytes`` by default). At most ``queue_size`` fetched pages wait
+    for a parser, and at most two batches per process are in flight, so a
+    fast network can't outrun the parsers and fill memory. Records reach
+    ``sink.write`` as dicts, with ``url`` added under ``url_field`` if it
+    is set. Pages in a batch that fails as a whole (a crashed worker, say)
+    count towards ``parse_failed``. If the sink raises or the process pool
+    breaks, fetching stops, pages already fetched are dropped, and ``run``
+    re-raises the error at the end.
+    """
+
+    def __init__(self, schema, fetch=fetch_bytes, fetch_workers=16, processes=None, backend=None,
+                 batch_size=16, queue_size=256, url_field=None):
+        self.schema = schema
+        self.fields = tuple(schema.fields)
+        self.fetch = fetch
+        self.fetch_workers = fetch_workers
+        self.processes = processes or os.cpu_count() or 1
+        self.backend = backend
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.url_field = url_field
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = make_session(pool_size=1)
+        return session
+
+    def _fetch_all(self, urls, pages, stats, lock, stop):
+        slots = threading.BoundedSemaphore(self.fetch_workers * 2)
+
+        def fetch_one(url):
+            try:
+                body = self.fetch(self._session(), url)
+            except Exception:
+                with lock:
+                    stats.fetch_failed += 1
+            else:
+                with lock:
+                    stats.fetched += 1
+                    stats.bytes += len(body)
+                pages.put((url, body))
+            finally:
+                slots.release()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+                for url in urls:
+                    if stop.is_set():
+                        break
+                    slots.acquire()
+                    executor.submit(fetch_one, url)
+        finally:
+            pages.put(_DONE)
+
+    def run(self, urls, sink):
+        stats = PipelineStats()
+        lock = threading.Lock()
+        pages = queue.Queue(maxsize=self.queue_size)
+        in_flight = threading.BoundedSemaphore(self.processes * 2)
+
+        failure = []
+        stop = threading.Event()
+
+        def fail(error):
+            failure.append(error)
+            # Stop fetching; the main loop keeps draining pages until the fetcher is done
+            stop.set()
+
+        def write(future, size):
+            try:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # A worker crashed or the batch couldn't be pickled
+                    with lock:
+                        stats.batches += 1
+                        stats.parse_failed += size
+                    if isinstance(e, BrokenProcessPool):
+                        fail(e)
+                    return
+                with lock:
+                    stats.batches += 1
+                    if failure:
+                        return
+                    for url, rows in results:
+                        if isinstance(rows, Exception):
+                            stats.parse_failed += 1
+                            continue
+                        for row in rows:
+                            record = dict(zip(self.fields, row))
+                            if self.url_field:
+                                record[self.url_field] = url
+                            sink.write(record)
+                            stats.records += 1
+            except BaseException as e:
+                fail(e)
+            finally:
+                in_flight.release()
+
+        def submit(batch):
+            if failure:
+                # The sink or the pool is broken; drop what the fetchers still deliver
+                return
+            in_flight.acquire()
+            try:
+                future = executor.submit(_parse_batch, batch)
+            except BrokenProcessPool as e:
+                in_flight.release()
+                with lock:
+                    stats.parse_failed += len(batch)
+                fail(e)
+                return
+            future.add_done_callback(lambda future, size=len(batch): write(future, size))
+
+        fetcher = threading.Thread(target=self._fetch_all, args=(urls, pages, stats, lock, stop),
+                                   daemon=True)
+        # Workers are spawned, not forked: forking once the fetch threads are
+        # running can copy a lock one of them holds and deadlock the worker
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.schema, self.backend),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            fetcher.start()
+            batch = []
+            while True:
+                try:
+                    # Don't sit on a partial batch while the fetchers are slow
+                    page = pages.get(timeout=0.05 if batch else None)
+                except queue.Empty:
+                    submit(batch)
+                    batch = []
+                    continue
+                if page is _DONE:
+                    break
+                batch.append(page)
+                if len(batch) >= self.batch_size:
+                    submit(batch)
+                    batch = []
+            if batch:
+                submit(batch)
+        fetcher.join()
+        if failure:
+            raise failure[0]
+        return stats
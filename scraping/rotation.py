@@ -0,0 +1,198 @@
+"""Proxy and header rotation with per-proxy health scoring.
+
+The daraz cell sends every request through one hardcoded free proxy with
+one fixed set of headers, so a slow or dead proxy stalls the whole scrape.
+``RotationManager`` spreads requests over a pool of proxies and browser
+header profiles. Each proxy keeps exponentially weighted averages of its
+latency and error rate. Requests go to the healthier of two randomly
+sampled proxies. A proxy that fails is quarantined, and the quarantine
+doubles with each consecutive failure. Requests to the same host are also
+spaced out so rotating proxies doesn't turn into hammering one site.
+
+    manager = RotationManager(['http://8.219.97.248:80', 'http://10.0.0.2:3128', None])
+    res = manager.get('https://www.daraz.com.np/catalog/?q=mobile%20phones')
+
+``None`` in the proxy list means a direct connection.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from .batch import RateLimiter
+
+# Header sets of real browsers; Accept-Language etc. must match the User-Agent
+UA_PROFILES = [
+    {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    },
+    {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 '
+                      '(KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-GB,en;q=0.9',
+    },
+    {
+        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+    },
+]
+
+# Responses that mean "this proxy is blocked or broken", not "this page is missing"
+BLOCK_STATUSES = {403, 407, 429, 502, 503, 504}
+
+
+class NoProxyAvailable(Exception):
+    """Raised when every attempt for a URL failed."""
+
+
+class ProxyState:
+    def __init__(self, proxy, initial_latency=1.0):
+        self.proxy = proxy
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.failures = 0
+        self.quarantined_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self):
+        # Expected seconds per successful request; lower is better
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+    def as_dict(self):
+        return {
+            'latency_ms': round(self.latency * 1000, 1),
+            'error_rate': round(self.error_rate, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'quarantined_s': round(max(self.quarantined_until - time.monotonic(), 0.0), 1),
+        }
+
+
+class RotationManager:
+    """Route GETs through the healthiest proxies with rotating header profiles.
+
+    ``alpha`` is the EWMA weight given to each new observation. A failure
+    quarantines the proxy for ``quarantine`` seconds, doubling per
+    consecutive failure up to ``max_quarantine``. ``domain_rate`` caps
+    requests per second to any one host (``None`` disables it). A failed
+    request is retried on another proxy up to ``attempts`` times.
+    """
+
+    def __init__(self, proxies, profiles=None, alpha=0.3, quarantine=5.0, max_quarantine=300.0,
+                 domain_rate=2.0, attempts=3, timeout=10):
+        if not proxies:
+            raise ValueError('RotationManager needs at least one proxy (None for direct)')
+        self.states = [ProxyState(proxy) for proxy in proxies]
+        self.profiles = profiles or UA_PROFILES
+        self.alpha = alpha
+        self.quarantine = quarantine
+        self.max_quarantine = max_quarantine
+        self.domain_rate = domain_rate
+        self.attempts = attempts
+        self.timeout = timeout
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            # Only the proxies chosen here, never ones from the environment
+            session.trust_env = False
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _throttle(self, url):
+        if not self.domain_rate:
+            return
+        host = urlsplit(url).hostname
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = RateLimiter(self.domain_rate)
+        limiter.wait()
+
+    def choose(self, exclude=()):
+        """Pick a proxy: the better of two random healthy ones."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [s for s in self.states if s not in exclude] or self.states
+            healthy = [s for s in candidates if s.quarantined_until <= now]
+            if not healthy:
+                # Everything is quarantined; use whichever comes back first
+                return min(candidates, key=lambda s: s.quarantined_until)
+            if len(healthy) == 1:
+                return healthy[0]
+            a, b = random.sample(healthy, 2)
+            return a if a.score() <= b.score() else b
+
+    def record(self, state, latency, ok):
+        with self._lock:
+            state.requests += 1
+            state.latency += self.alpha * (latency - state.latency)
+            state.error_rate += self.alpha * ((0.0 if ok else 1.0) - state.error_rate)
+            if ok:
+                state.failures = 0
+                return
+            state.errors += 1
+            state.failures += 1
+            backoff = min(self.quarantine * 2 ** (state.failures - 1), self.max_quarantine)
+            state.quarantined_until = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+
+    def get(self, url, headers=None, **kwargs):
+        """GET ``url`` through a chosen proxy, retrying on others if it fails.
+
+        Returns the response, which may still be an error status that isn't
+        in ``BLOCK_STATUSES`` (a 404, say). Raises ``NoProxyAvailable`` once
+        every attempt was blocked or failed.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        tried = []
+        last_error = None
+        for _ in range(self.attempts):
+            state = self.choose(exclude=tried)
+            tried.append(state)
+            request_headers = dict(random.choice(self.profiles))
+            request_headers.update(headers or {})
+            proxies = {'http': state.proxy, 'https': state.proxy} if state.proxy else None
+
+            self._throttle(url)
+            start = time.monotonic()
+            try:
+                response = self._session().get(url, headers=request_headers, proxies=proxies, **kwargs)
+            except requests.RequestException as e:
+                self.record(state, time.monotonic() - start, ok=False)
+                last_error = e
+                continue
+            ok = response.status_code not in BLOCK_STATUSES
+            self.record(state, time.monotonic() - start, ok)
+            if ok:
+                response.proxy = state.proxy
+                return response
+            last_error = f'HTTP {response.status_code} via {state.proxy}'
+        raise NoProxyAvailable(f'{url}: {last_error}')
+
+    def stats(self):
+        with self._lock:
+            return {state.proxy or 'direct': state.as_dict() for state in self.states}
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
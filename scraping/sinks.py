@@ -0,0 +1,250 @@
+"""Writers that stream scraped records to disk as they arrive."""
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+
+
+class JsonlSink:
+    """Appends one JSON object per line and flushes after every record."""
+
+    def __init__(self, path, mode='a'):
+        self.path = path
+        self._file = open(path, mode, encoding='utf-8')
+        self.count = 0
+
+    def format(self, record):
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    def write_line(self, line):
+        self._file.write(line)
+        self._file.flush()
+        self.count += 1
+
+    def write(self, record):
+        self.write_line(self.format(record))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink:
+    """Writes records as CSV rows, emitting the header for new files only."""
+
+    def __init__(self, path, fieldnames, mode='a'):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._file = open(path, mode, newline='', encoding='utf-8')
+        self._buffer = io.StringIO()
+        self._formatter = csv.DictWriter(self._buffer, fieldnames=fieldnames, extrasaction='ignore')
+        if self._file.tell() == 0:
+            self._file.write(self.format(dict(zip(fieldnames, fieldnames))))
+        self.count = 0
+
+    def format(self, record):
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._formatter.writerow(record)
+        return self._buffer.getvalue()
+
+    def write_line(self, line):
+        self._file.write(line)
+        self._file.flush()
+        self.count += 1
+
+    def write(self, record):
+        self.write_line(self.format(record))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sink(path, fieldnames=None, mode='a'):
+    """Pick a sink from the file extension: ``.csv`` or anything else as JSONL."""
+    if path.endswith('.csv'):
+        if not fieldnames:
+            fieldnames = read_fieldnames(path)
+        if not fieldnames:
+            raise ValueError('CSV output needs fieldnames')
+        return CsvSink(path, fieldnames, mode=mode)
+    return JsonlSink(path, mode=mode)
+
+
+def read_fieldnames(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), None)
+
+
+def read_records(path):
+    """Yield the records stored in a CSV or JSONL file, one at a time."""
+    if not os.path.exists(path):
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def make_key(key):
+    """Turn a field name, a sequence of field names or a callable into a key function."""
+    if callable(key):
+        return key
+    fields = [key] if isinstance(key, str) else list(key)
+    return lambda record: '\x1f'.join(str(record.get(field, '')) for field in fields)
+
+
+class DedupSink:
+    """Append-only sink that skips records it has already written.
+
+    Records are identified by ``key`` (see ``make_key``). A SQLite index
+    next to the output file maps each key to a digest of the last version
+    written, so rerunning a crawl appends only records that are new or whose
+    content changed, and memory stays flat however big the dataset is.
+    Changed records are appended rather than rewritten in place;
+    ``compact()`` drops the superseded versions.
+
+    An output file without an index (such as an existing ``books_data.csv``)
+    is indexed on first use. The index is committed every ``commit_every``
+    writes along with the size of the output at that point. If the output is
+    a different size on open (deleted, truncated, edited, or appended to by
+    a run that crashed before its next commit), the index is rebuilt from
+    the file, so records are neither skipped nor appended twice.
+    """
+
+    def __init__(self, path, key, fieldnames=None, index_path=None, commit_every=500):
+        self.path = path
+        self.key = make_key(key)
+        self.index_path = index_path or path + '.idx'
+        self.commit_every = commit_every
+        self.written = 0
+        self.changed = 0
+        self.unchanged = 0
+        self._pending = 0
+
+        self._index = sqlite3.connect(self.index_path)
+        self._index.execute('PRAGMA journal_mode=WAL')
+        self._index.execute('PRAGMA synchronous=NORMAL')
+        self._index.execute('CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, digest BLOB NOT NULL) WITHOUT ROWID')
+        self._index.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value) WITHOUT ROWID')
+        row = self._index.execute("SELECT value FROM meta WHERE name = 'output_size'").fetchone()
+        self._sink = open_sink(path, fieldnames)
+        if row is None or row[0] != os.path.getsize(path):
+            self.rebuild_index()
+
+    def _digest(self, line):
+        return hashlib.blake2b(line.encode('utf-8'), digest_size=16).digest()
+
+    def rebuild_index(self):
+        self._index.execute('DELETE FROM records')
+        self._index.executemany(
+            'INSERT OR REPLACE INTO records (key, digest) VALUES (?, ?)',
+            ((self.key(record), self._digest(self._sink.format(record)))
+             for record in read_records(self.path)))
+        self._commit()
+
+    def _commit(self):
+        # Recorded with the keys, so the next open can tell whether the
+        # output still matches the index
+        self._index.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('output_size', ?)",
+                            (os.path.getsize(self.path),))
+        self._index.commit()
+        self._pending = 0
+
+    def write(self, record):
+        """Append ``record`` unless an identical version is already stored."""
+        line = self._sink.format(record)
+        key = self.key(record)
+        digest = self._digest(line)
+
+        row = self._index.execute('SELECT digest FROM records WHERE key = ?', (key,)).fetchone()
+        if row is not None and row[0] == digest:
+            self.unchanged += 1
+            return False
+
+        self._sink.write_line(line)
+        self._index.execute('INSERT OR REPLACE INTO records (key, digest) VALUES (?, ?)', (key, digest))
+        if row is None:
+            self.written += 1
+        else:
+            self.changed += 1
+
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._commit()
+        return True
+
+    def compact(self):
+        """Rewrite the output keeping only the latest version of each record."""
+        self._sink.close()
+
+        root, ext = os.path.splitext(self.path)
+        tmp_path = f'{root}.compact{ext}'
+        fieldnames = getattr(self._sink, 'fieldnames', None)
+        self._index.execute('CREATE TEMP TABLE emitted (key TEXT PRIMARY KEY) WITHOUT ROWID')
+        kept = 0
+        with open_sink(tmp_path, fieldnames, mode='w') as out:
+            for record in read_records(self.path):
+                line = out.format(record)
+                key = self.key(record)
+                row = self._index.execute('SELECT digest FROM records WHERE key = ?', (key,)).fetchone()
+                if row is None or row[0] != self._digest(line):
+                    continue
+                if self._index.execute('INSERT OR IGNORE INTO emitted (key) VALUES (?)', (key,)).rowcount:
+                    out.write_line(line)
+                    kept += 1
+        self._index.execute('DROP TABLE emitted')
+
+        os.replace(tmp_path, self.path)
+        self._sink = open_sink(self.path, fieldnames)
+        self._commit()
+        return kept
+
+    def stats(self):
+        return {'written': self.written, 'changed': self.changed, 'unchanged': self.unchanged}
+
+    def close(self):
+        self._sink.close()
+        self._commit()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Drop duplicate records from a CSV or JSONL file')
+    parser.add_argument('path')
+    parser.add_argument('--key', nargs='+', required=True, help='field(s) identifying a record')
+    args = parser.parse_args()
+
+    with DedupSink(args.path, args.key) as sink:
+        kept = sink.compact()
+    print(f'{kept} unique records kept in {args.path}')
+
+
+if __name__ == '__main__':
+    main()
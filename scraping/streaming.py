@@ -0,0 +1,142 @@
+"""Incremental extraction from HTML that is still downloading.
+
+The notebook reads each page whole (``res.content``) and builds a full
+BeautifulSoup tree before ``find_all('div', class_='sAZ2')`` runs. On the
+multi-megabyte celebheights index pages that means holding the body and
+its whole DOM in memory, and getting nothing back until the last byte has
+arrived. ``StreamExtractor`` feeds response chunks to lxml's pull parser.
+It extracts each record as soon as the closing tag of its item element has
+been parsed. Finished elements are then dropped from the tree, so memory
+is bounded by the largest single record rather than by the page.
+
+    extract = StreamExtractor(CELEB_HEIGHT)
+    for record in extract.stream(requests.get(url, stream=True)):
+        ...
+
+Item selectors may use descendant (`` ``) and child (``>``) combinators;
+sibling combinators can't be matched once earlier siblings are gone.
+Positional pseudo-classes (``:nth-child``, ``:first-child``,
+``:last-of-type``...) don't work either, in item or field selectors: they
+count siblings, and the siblings of a finished item have already been
+pruned from the tree. Other field selectors are evaluated within each item
+as usual.
+
+The body is decoded as the charset declared in the response's
+Content-Type, or UTF-8 when none is declared, the same as the lxml backend.
+"""
+import re
+
+from .parsers import LxmlBackend
+
+_COMBINATOR = re.compile(r'\s*(>)\s*|\s+')
+_TAG = re.compile(r'^[A-Za-z][\w-]*')
+
+
+def _self_matcher(selector):
+    """Compile ``selector`` into an XPath test of whether an element matches it,
+    looking only at the element and its ancestors."""
+    from cssselect import GenericTranslator
+    from lxml import etree
+
+    if any(c in selector for c in '+~,'):
+        raise ValueError(f'Unsupported selector for streaming: {selector!r}')
+    tokens = [token for token in _COMBINATOR.split(selector.strip()) if token]
+    parts = []
+    child = False
+    for token in tokens:
+        if token == '>':
+            child = True
+            continue
+        parts.append((child, token))
+        child = False
+
+    translate = GenericTranslator().css_to_xpath
+    predicate = None
+    for i, (_, compound) in enumerate(parts):
+        step = translate(compound, prefix='')
+        if predicate is not None:
+            step = f'{step}[{predicate}]'
+        if i == len(parts) - 1:
+            xpath = f'boolean(self::{step})'
+        else:
+            axis = 'parent' if parts[i + 1][0] else 'ancestor'
+            predicate = f'{axis}::{step}'
+
+    tag = _TAG.match(parts[-1][1])
+    return etree.XPath(xpath), tag.group(0).lower() if tag else None
+
+
+def declared_charset(response):
+    """The charset from the response's Content-Type header, if it has one.
+
+    ``response.encoding`` isn't used because requests reports ISO-8859-1
+    for any text/* response that doesn't declare a charset.
+    """
+    from requests.utils import _parse_content_type_header
+
+    _, params = _parse_content_type_header(response.headers.get('Content-Type', ''))
+    return params.get('charset')
+
+
+class StreamExtractor:
+    """Extract ``schema`` records from HTML fed in chunks.
+
+    Only schemas with an ``item`` selector can be streamed; a whole-document
+    schema needs the whole document anyway.
+    """
+
+    def __init__(self, schema, encoding='utf-8'):
+        if schema.item is None:
+            raise ValueError('Streaming needs a schema with an item selector')
+        self.backend = LxmlBackend(schema, encoding)
+        self._matches, self._tag = _self_matcher(schema.item)
+
+    def iter_records(self, chunks, encoding=None):
+        """Yield records from an iterable of ``bytes`` chunks as they complete."""
+        from lxml import etree
+        import lxml.html
+
+        encoding = encoding or self.backend.encoding
+        # Without an explicit encoding lxml falls back to latin-1 when the
+        # page has no <meta charset>, turning '½' into 'Â½'
+        parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        # Same element classes as lxml.html.fromstring, so fields behave alike
+        parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        matched = set()
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from self._drain(parser, matched)
+        parser.close()
+        yield from self._drain(parser, matched)
+
+    def _drain(self, parser, matched):
+        for event, element in parser.read_events():
+            if event == 'start':
+                if (self._tag is None or element.tag == self._tag) and self._matches(element):
+                    matched.add(element)
+                continue
+
+            if element in matched:
+                matched.discard(element)
+                yield self.backend.record(element)
+            if matched:
+                # Still inside an item that needs this element
+                continue
+            parent = element.getparent()
+            if parent is not None:
+                # Closed elements can't affect later matches; let them go
+                parent.remove(element)
+
+    def stream(self, response, chunk_size=64 * 1024, encoding=None):
+        """Yield records from a ``requests`` response opened with ``stream=True``.
+
+        ``encoding`` defaults to the charset the response declares.
+        """
+        encoding = encoding or declared_charset(response)
+        return self.iter_records(response.iter_content(chunk_size), encoding)
+
+    def __call__(self, html):
+        """Extract from a complete document, like the other backends."""
+        if isinstance(html, str):
+            return list(self.iter_records([html.encode('utf-8')], 'utf-8'))
+        return list(self.iter_records([html]))
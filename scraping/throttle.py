@@ -0,0 +1,229 @@
+"""Adaptive per-domain throttling: token bucket plus AIMD concurrency.
+
+The notebook either fetches as fast as one loop can go or fixes
+``max_workers=32`` and hopes the site copes; a 429 or 503 is just another
+failed row. ``AdaptiveThrottle`` gives every host its own token bucket,
+which is a hard ceiling on requests per second, and its own concurrency
+limit. That limit grows by about one request per round trip while latency
+stays near the best seen recently. It halves, at most once per round trip, when the
+host answers 429/503, fails, or gets clearly slower. A ``Retry-After``
+header pauses the whole host for as long as it asks, and throttled requests
+are retried afterwards. Connection errors are retried after an exponential
+backoff.
+
+    throttle = AdaptiveThrottle(rate=20)
+    response = throttle.get(session, url)
+"""
+from collections import deque
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value, default=1.0):
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AimdLimit:
+    """A concurrency limit with additive increase and multiplicative decrease.
+
+    Each successful request adds ``1 / limit``, so the limit grows by about
+    one per round trip. Throttling, failures, or latency above ``tolerance``
+    times the fastest of the last ``window`` round trips multiply it by
+    ``backoff``. The baseline is windowed so one unusually fast response
+    can't make every later one look congested. Decreases happen at most
+    once per round trip, so one burst of 429s halves it once, not once per
+    response.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5, tolerance=1.5, alpha=0.2,
+                 window=100):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.in_flight = 0
+        self.best_latency = None
+        self.latency = None
+        self._recent = deque(maxlen=window)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def cancel(self):
+        """Give back a slot without counting it as a round trip."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def release(self, latency=None, congested=False):
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None and not congested:
+                self._recent.append(latency)
+                self.best_latency = min(self._recent)
+                self.latency = latency if self.latency is None else \
+                    self.latency + self.alpha * (latency - self.latency)
+                congested = self.latency > self.tolerance * self.best_latency
+
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease > (self.latency or 0.0):
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class _Domain:
+    def __init__(self, bucket, limit):
+        self.bucket = bucket
+        self.limit = limit
+        self.paused_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+
+
+class AdaptiveThrottle:
+    """Per-host token buckets and AIMD concurrency limits for ``requests``.
+
+    ``rate`` (requests/second per host, ``None`` for no cap) and ``burst``
+    configure the buckets; the remaining options go to ``AimdLimit``.
+    ``get`` retries throttled requests up to ``retries`` times, waiting as
+    long as ``Retry-After`` says (capped at ``max_retry_after``), and
+    connection errors after ``retry_backoff`` seconds, doubling per attempt
+    with jitter.
+    """
+
+    def __init__(self, rate=None, burst=None, initial=4, max_concurrency=64, retries=3,
+                 max_retry_after=60.0, retry_backoff=0.5, **limit_options):
+        self.rate = rate
+        self.burst = burst
+        self.initial = initial
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.max_retry_after = max_retry_after
+        self.retry_backoff = retry_backoff
+        self.limit_options = limit_options
+        self._domains = {}
+        self._lock = threading.Lock()
+
+    def _domain(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            domain = self._domains.get(host)
+            if domain is None:
+                bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+                limit = AimdLimit(self.initial, maximum=self.max_concurrency, **self.limit_options)
+                domain = self._domains[host] = _Domain(bucket, limit)
+        return domain
+
+    def acquire(self, url):
+        """Wait until a request to ``url``'s host may start; returns its domain state."""
+        domain = self._domain(url)
+        while True:
+            wait = domain.paused_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            domain.limit.acquire()
+            if domain.bucket is not None:
+                domain.bucket.acquire()
+            # A Retry-After may have arrived while this request was queued
+            if domain.paused_until <= time.monotonic():
+                return domain
+            domain.limit.cancel()
+
+    def release(self, domain, latency, status=None, retry_after=None):
+        throttled = status in THROTTLE_STATUSES
+        failed = status is None or (status >= 500 and not throttled)
+        if throttled and retry_after is not None:
+            domain.paused_until = max(domain.paused_until,
+                                      time.monotonic() + min(retry_after, self.max_retry_after))
+        with self._lock:
+            domain.requests += 1
+            domain.throttled += throttled
+            domain.failed += failed
+        domain.limit.release(latency, congested=throttled or failed)
+
+    def get(self, session, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            domain = self.acquire(url)
+            start = time.monotonic()
+            try:
+                response = session.get(url, **kwargs)
+            except requests.RequestException:
+                self.release(domain, time.monotonic() - start)
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+                continue
+            status = response.status_code
+            retry_after = None
+            if status in THROTTLE_STATUSES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.release(domain, time.monotonic() - start, status, retry_after)
+            if status not in THROTTLE_STATUSES or attempt == self.retries:
+                return response
+        return response
+
+    def stats(self):
+        with self._lock:
+            domains = dict(self._domains)
+        return {host: {
+            'limit': round(domain.limit.limit, 1),
+            'in_flight': domain.limit.in_flight,
+            'latency_ms': round((domain.limit.latency or 0.0) * 1000, 1),
+            'best_latency_ms': round((domain.limit.best_latency or 0.0) * 1000, 1),
+            'requests': domain.requests,
+            'throttled': domain.throttled,
+            'failed': domain.failed,
+        } for host, domain in domains.items()}
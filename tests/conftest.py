@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# scraping is imported as a package; the Game app imports its modules flat,
+# and the benchmarks' fixture server doubles as the tests' test site
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'Game'), os.path.join(ROOT, 'benchmarks')]
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from scraping.batch import BatchClient
+
+
+class ListSink:
+    def __init__(self, fail_after=None):
+        self.records = []
+        self.fail_after = fail_after
+
+    def write(self, record):
+        if self.fail_after is not None and len(self.records) >= self.fail_after:
+            raise OSError('disk full')
+        self.records.append(record)
+
+
+def lookup(session, item):
+    return {'name': item}
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_failed_items_are_retried_on_resume(tmp_path, ordered):
+    checkpoint = str(tmp_path / 'run.ckpt')
+    items = [f'item{i}' for i in range(20)]
+
+    def flaky(session, item):
+        if int(item[4:]) % 3 == 0:
+            raise ConnectionError('API down')
+        return {'name': item}
+
+    sink = ListSink()
+    stats = BatchClient(flaky, workers=4, ordered=ordered, checkpoint=checkpoint).run(items, sink)
+    assert stats.failed == 7
+    assert sum('error' in record for record in sink.records) == 7
+
+    sink = ListSink()
+    stats = BatchClient(lookup, workers=4, ordered=ordered, checkpoint=checkpoint).run(items, sink)
+    assert stats.skipped == 13
+    assert sorted(record['name'] for record in sink.records) == sorted(items[::3])
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_sink_errors_are_raised_without_deadlock(tmp_path, ordered):
+    client = BatchClient(lookup, workers=2, max_in_flight=2, ordered=ordered,
+                         checkpoint=str(tmp_path / 'run.ckpt'))
+    sink = ListSink(fail_after=3)
+    with pytest.raises(OSError):
+        client.run((f'item{i}' for i in range(100)), sink)
+    assert len(sink.records) == 3
+    # Only what reached the sink is checkpointed
+    resumed = ListSink()
+    BatchClient(lookup, workers=2, checkpoint=str(tmp_path / 'run.ckpt')).run(
+        [f'item{i}' for i in range(100)], resumed)
+    assert len(sink.records) + len(resumed.records) == 100
+
+
+def test_early_failure_does_not_hold_back_the_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'run.ckpt')
+
+    def first_fails(session, item):
+        if item == 'item0':
+            raise ConnectionError('API down')
+        return {'name': item}
+
+    client = BatchClient(first_fails, workers=4, checkpoint=checkpoint)
+    client.run([f'item{i}' for i in range(500)], ListSink())
+    state = json.load(open(checkpoint))
+    assert state == {'watermark': 500, 'done': [], 'failed': [0]}
+
+    sink = ListSink()
+    stats = BatchClient(lookup, workers=4, ordered=True, checkpoint=checkpoint).run(
+        [f'item{i}' for i in range(500)], sink)
+    assert sink.records == [{'name': 'item0'}]
+    assert stats.skipped == 499
+    assert json.load(open(checkpoint))['failed'] == []
+
+
+def test_too_many_failures_stop_the_run(tmp_path):
+    def down(session, item):
+        raise ConnectionError('API down')
+
+    sink = ListSink()
+    client = BatchClient(down, workers=2, max_in_flight=2, max_failed=5, checkpoint=str(tmp_path / 'run.ckpt'))
+    with pytest.raises(RuntimeError, match='items failed'):
+        client.run((f'item{i}' for i in range(1000)), sink)
+    assert len(sink.records) < 20
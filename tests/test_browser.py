@@ -0,0 +1,56 @@
+import itertools
+import threading
+
+import pytest
+
+from scraping.browser import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def execute_script(self, script):
+        if self.quit_called:
+            raise RuntimeError('driver is gone')
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_failed_warm_start_quits_started_drivers():
+    started = []
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def launch():
+        with lock:
+            n = next(counter)
+        if n == 2:
+            raise RuntimeError('chrome failed to start')
+        driver = FakeDriver()
+        started.append(driver)
+        return driver
+
+    with pytest.raises(RuntimeError, match='chrome failed to start'):
+        BrowserPool(size=4, launch=launch)
+    assert len(started) == 3
+    assert all(driver.quit_called for driver in started)
+
+
+def test_drivers_are_recycled_after_max_pages():
+    drivers = []
+
+    def launch():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    with BrowserPool(size=1, max_pages=2, launch=launch) as pool:
+        assert list(pool.map(lambda driver, item: item * 2, range(5))) == [0, 2, 4, 6, 8]
+    assert len(drivers) == 3
+    assert pool.stats.recycled == 2
+    assert all(driver.quit_called for driver in drivers)
@@ -0,0 +1,68 @@
+import pytest
+
+from cache import ProgressCache
+from hashing import PasswordHasher
+from models import Database
+
+FAST_HASH = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cache.time.monotonic', lambda: now[0])
+    return now
+
+
+def make_db(path, cache):
+    db = Database(str(path), hasher=PasswordHasher(method=FAST_HASH, workers=0), progress_cache=cache)
+    assert db.register_user('ada', 'secret', 'ada@example.com')[0]
+    return db, db.login_user('ada', 'secret')[1]
+
+
+def test_hit_and_miss():
+    cache = ProgressCache()
+    assert cache.get(1) is None
+    cache.set(1, 0b101)
+    assert cache.get(1) == 0b101
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 1}
+
+
+def test_entries_expire_and_evict(clock):
+    cache = ProgressCache(maxsize=2, ttl=10)
+    cache.set(1, 1)
+    cache.set(2, 2)
+    cache.get(1)
+    cache.set(3, 3)
+    # 2 was least recently used
+    assert (cache.get(1), cache.get(2), cache.get(3)) == (1, None, 3)
+    clock[0] += 11
+    assert cache.get(1) is None
+
+
+def test_complete_challenge_updates_cached_mask(tmp_path):
+    cache = ProgressCache()
+    db, user_id = make_db(tmp_path / 'game.db', cache)
+    assert db.get_progress_mask(user_id) == 0
+    db.complete_challenge(user_id, 2)
+    assert cache.get(user_id) == 0b10
+    db.save_user_progress(user_id, {'challenge1': True})
+    assert cache.get(user_id) is None
+    assert db.get_progress_mask(user_id) == 0b11
+    db.pool.close()
+
+
+def test_stale_read_through_is_not_cached(tmp_path):
+    class CompletesBeforeSet(ProgressCache):
+        # A completion commits after the read-through queried the database
+        # but before it stores what it read
+        def set(self, user_id, progress, version=None):
+            db.complete_challenge(user_id, 1)
+            super().set(user_id, progress, version)
+
+    cache = CompletesBeforeSet()
+    db, user_id = make_db(tmp_path / 'game.db', cache)
+    assert db.get_progress_mask(user_id) == 0
+    assert cache.get(user_id) is None
+    assert db.get_progress_mask(user_id) == 1
+    db.pool.close()
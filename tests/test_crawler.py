@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from fixtures import FixtureServer, book_urls, books_site
+from scraping.books import BOOK_FIELDS, parse_book
+from scraping.crawler import Crawler
+from scraping.sinks import CsvSink, read_records
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class FullDisk:
+    def __init__(self, after):
+        self.after = after
+        self.written = 0
+
+    def write(self, record):
+        if self.written >= self.after:
+            raise OSError(28, 'No space left on device')
+        self.written += 1
+
+
+def test_crawls_fixture_site_to_csv(tmp_path):
+    path = str(tmp_path / 'books.csv')
+    with FixtureServer(books_site(30)) as server:
+        with CsvSink(path, BOOK_FIELDS) as sink:
+            stats = Crawler(parse_book, sink=sink, concurrency=4).run(book_urls(server.url, 30))
+    assert stats.as_dict()['fetched'] == 30
+    assert stats.failed == 0
+    assert len(list(read_records(path))) == stats.records == 30
+
+
+def test_parser_errors_are_counted_not_raised():
+    def parse(url, body):
+        if url.endswith('/index.html') and '/catalogue/' not in url:
+            raise ValueError('not a book page')
+        return parse_book(url, body)
+
+    sink = ListSink()
+    with FixtureServer(books_site(5)) as server:
+        urls = book_urls(server.url, 5) + [server.url + '/index.html', server.url + '/nowhere']
+        crawler = Crawler(parse, sink=sink, concurrency=2, retries=0)
+        stats = crawler.run(urls)
+    # /nowhere is a 404 and never reaches the parser
+    assert (stats.fetched, stats.failed, stats.records) == (6, 2, 5)
+    assert len(sink.records) == 5
+    assert sorted(str(e.status) for e in crawler.errors) == ['404', 'None']
+
+
+def test_sink_error_stops_the_crawl():
+    with FixtureServer(books_site(50)) as server:
+        crawler = Crawler(parse_book, sink=FullDisk(after=3), concurrency=4)
+        with pytest.raises(OSError, match='No space left'):
+            crawler.run(book_urls(server.url, 50))
+        assert server.requests < 50
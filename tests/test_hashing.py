@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import time
+
+from hashing import HasherBusy, PasswordHasher
+from models import Database
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Game')
+
+OLD_METHOD = 'pbkdf2:sha256:1000'
+NEW_METHOD = 'pbkdf2:sha256:2000'
+
+
+def test_pool_hashes_in_spawned_workers():
+    hasher = PasswordHasher(NEW_METHOD, workers=1).start()
+    try:
+        password_hash = hasher.hash('secret')
+        assert hasher.verify(password_hash, 'secret')
+        assert hasher._executor._mp_context.get_start_method() == 'spawn'
+        hasher._prefix_future.result(timeout=30)
+        assert not hasher.needs_rehash(password_hash)
+        assert hasher.needs_rehash(PasswordHasher(OLD_METHOD, workers=0).hash('secret'))
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_does_not_wait_for_the_prefix():
+    hasher = PasswordHasher(NEW_METHOD, workers=1)
+    try:
+        # Keep the only worker busy so the prefix can't have been computed yet
+        hasher._get_executor().submit(time.sleep, 1)
+        start = time.perf_counter()
+        assert not hasher.needs_rehash('anything$salt$hash')
+        assert time.perf_counter() - start < 0.5
+    finally:
+        hasher.shutdown()
+
+
+class BusyOnHash(PasswordHasher):
+    def hash(self, password):
+        raise HasherBusy(self.retry_after)
+
+
+def test_busy_rehash_does_not_fail_the_login(tmp_path):
+    db = Database(str(tmp_path / 'game.db'), hasher=PasswordHasher(OLD_METHOD, workers=0))
+    db.register_user('ada', 'secret', 'ada@example.com')
+    db.hasher = BusyOnHash(NEW_METHOD, workers=0)
+    success, user_id = db.login_user('ada', 'secret')
+    assert success
+    with db.get_connection() as conn:
+        stored = conn.execute('SELECT password_hash FROM users WHERE id = ?', (user_id,)).fetchone()[0]
+    assert stored.startswith(OLD_METHOD)
+    db.pool.close()
+
+
+def test_spawned_worker_import_builds_no_app_state(tmp_path):
+    # Spawn runs the parent's main script like this in every worker
+    script = ('import runpy, threading; '
+              f'ns = runpy.run_path({os.path.join(GAME_DIR, "app.py")!r}, run_name="__mp_main__"); '
+              'assert ns["db"] is None and ns["writer"] is None and ns["hasher"] is None; '
+              'assert threading.active_count() == 1')
+    path = tmp_path / 'game.db'
+    env = dict(os.environ, GAME_DATABASE_PATH=str(path), GAME_PASSWORD_HASH_WORKERS='2')
+    subprocess.run([sys.executable, '-c', script], cwd=GAME_DIR, env=env, check=True, timeout=60)
+    assert not path.exists()
@@ -0,0 +1,63 @@
+from flask import Flask, url_for
+import pytest
+
+from http_cache import HttpCache
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'static').mkdir()
+    (tmp_path / 'templates' / 'page.html').write_text(
+        '<link href="{{ url_for(\'static\', filename=\'style.css\') }}">{{ name }}')
+    (tmp_path / 'static' / 'style.css').write_text('body { color: red }')
+    return tmp_path
+
+
+def make_app(root):
+    app = Flask('site', root_path=str(root))
+    cache = HttpCache(app)
+
+    @app.route('/')
+    def page():
+        return cache.render('page.html', name='ada')
+
+    return app, cache
+
+
+def test_repeat_get_is_not_modified(site):
+    app, _ = make_app(site)
+    client = app.test_client()
+    first = client.get('/')
+    assert first.status_code == 200
+    assert b'style.css?v=' in first.data
+    again = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_context_changes_the_etag(site):
+    _, cache = make_app(site)
+    assert cache.page_etag('page.html', {'name': 'ada'}) != cache.page_etag('page.html', {'name': 'bob'})
+
+
+def test_static_changes_change_the_page_etag(site):
+    app, cache = make_app(site)
+    with app.test_request_context():
+        old_url = url_for('static', filename='style.css')
+    old_etag = cache.page_etag('page.html', {'name': 'ada'})
+
+    (site / 'static' / 'style.css').write_text('body { color: blue }')
+    app, cache = make_app(site)
+    with app.test_request_context():
+        assert url_for('static', filename='style.css') != old_url
+    assert cache.page_etag('page.html', {'name': 'ada'}) != old_etag
+
+
+def test_fingerprinted_static_files_are_immutable(site):
+    app, _ = make_app(site)
+    client = app.test_client()
+    with app.test_request_context():
+        url = url_for('static', filename='style.css')
+    response = client.get(url)
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 31536000
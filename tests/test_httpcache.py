@@ -0,0 +1,71 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from fixtures import FixtureServer, with_etags
+from scraping.httpcache import CacheMiss, CachedSession
+
+
+def echo_query(handler):
+    query = parse_qs(urlsplit(handler.path).query)
+    return 200, {}, f'term={query.get("term", [""])[0]}'.encode()
+
+
+def by_language(handler):
+    if not handler.path.startswith('/lang'):
+        return None
+    return 200, {'Vary': 'Accept-Language'}, handler.headers.get('Accept-Language', '').encode()
+
+
+@pytest.fixture
+def server():
+    with FixtureServer(with_etags(by_language), with_etags(echo_query)) as server:
+        yield server
+
+
+def test_params_are_part_of_the_key(server, tmp_path):
+    with CachedSession(str(tmp_path)) as session:
+        assert session.get(server.url + '/api', params={'term': 'Ram'}).text == 'term=Ram'
+        assert session.get(server.url + '/api', params={'term': 'Sita'}).text == 'term=Sita'
+    with CachedSession(str(tmp_path), offline=True) as session:
+        assert session.get(server.url + '/api', params={'term': 'Ram'}).text == 'term=Ram'
+        assert session.get(server.url + '/api?term=Sita').text == 'term=Sita'
+
+
+def test_session_headers_and_response_vary(server, tmp_path):
+    with CachedSession(str(tmp_path), fresh_for=60) as session:
+        session.session.headers['Accept-Language'] = 'ne'
+        assert session.get(server.url + '/lang').text == 'ne'
+        assert session.get(server.url + '/lang', headers={'Accept-Language': 'en'}).text == 'en'
+        assert session.get(server.url + '/lang').text == 'ne'
+
+
+def test_unchanged_pages_are_revalidated(server, tmp_path):
+    with CachedSession(str(tmp_path)) as session:
+        first = session.get(server.url + '/api?term=a')
+        requests_before = server.requests
+        second = session.get(server.url + '/api?term=a')
+        assert not first.from_cache and second.from_cache
+        assert second.text == 'term=a'
+        assert server.requests == requests_before + 1
+        assert session.cache.stats()['revalidated'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    with CachedSession(str(tmp_path), max_bytes=60, compress_level=0) as session:
+        for term in ('a', 'b', 'c'):
+            session.get(server.url + '/api', params={'term': term})
+        # 'a' is used again, so 'b' is now the least recently used
+        session.get(server.url + '/api', params={'term': 'a'})
+        session.get(server.url + '/api', params={'term': 'd'})
+        assert session.cache.total_bytes <= 60
+    with CachedSession(str(tmp_path), offline=True) as session:
+        assert session.get(server.url + '/api?term=a').text == 'term=a'
+        with pytest.raises(CacheMiss):
+            session.get(server.url + '/api?term=b')
+
+
+def test_request_bodies_are_rejected(tmp_path):
+    with CachedSession(str(tmp_path)) as session:
+        with pytest.raises(TypeError):
+            session.get('http://example.test/', data={'a': 1})
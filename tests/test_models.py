@@ -0,0 +1,152 @@
+import random
+import sqlite3
+
+import pytest
+
+from hashing import PasswordHasher
+from models import SCHEMA_VERSION, Database
+
+FAST_HASH = 'pbkdf2:sha256:1000'
+
+
+def make_db(path, **kwargs):
+    return Database(str(path), hasher=PasswordHasher(method=FAST_HASH, workers=0), **kwargs)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = make_db(tmp_path / 'game.db')
+    yield db
+    db.pool.close()
+
+
+def register(db, *names):
+    ids = []
+    for name in names:
+        assert db.register_user(name, 'secret', f'{name}@example.com') == (True, 'Registration successful')
+        ids.append(db.login_user(name, 'secret')[1])
+    return ids
+
+
+def snapshot(db):
+    # Solve times are julianday differences, so compare them to the millisecond.
+    # The triggers leave empty histogram buckets behind, which readers skip.
+    with db.get_connection() as conn:
+        tables = {table: [tuple(round(value, 3) if isinstance(value, float) else value for value in row)
+                          for row in conn.execute(f'SELECT * FROM {table} ORDER BY 1')]
+                  for table in ('user_stats', 'challenge_stats')}
+    tables['completion_histogram'] = db.get_completion_histogram()
+    return tables
+
+
+def insert_completions(db, completions):
+    with db.get_connection() as conn:
+        conn.executemany('INSERT OR IGNORE INTO challenge_progress (user_id, challenge_id, completed_at) '
+                         'VALUES (?, ?, ?)', completions)
+        conn.commit()
+
+
+def set_created_at(db, user_id, created_at):
+    with db.get_connection() as conn:
+        conn.execute('UPDATE users SET created_at = ? WHERE id = ?', (created_at, user_id))
+        conn.commit()
+
+
+def test_same_second_completions_match_rebuild(db):
+    user, = register(db, 'ada')
+    set_created_at(db, user, '2024-01-01 10:00:00')
+    # Inserted in the opposite order to the rebuild's (completed_at, challenge_id)
+    insert_completions(db, [(user, 3, '2024-01-01 10:00:02'), (user, 1, '2024-01-01 10:00:02')])
+
+    by_trigger = snapshot(db)
+    assert [row[:3] for row in by_trigger['challenge_stats']] == [(1, 1, 2.0), (3, 1, 2.0)]
+    db.rebuild_stats()
+    assert snapshot(db) == by_trigger
+
+
+def test_trigger_aggregates_match_rebuild(db):
+    rng = random.Random(0)
+    users = register(db, *[f'user{i}' for i in range(12)])
+    completions = []
+    for user in users:
+        set_created_at(db, user, '2024-01-01 09:00:00')
+        second = 0
+        for challenge_id in rng.sample(db.challenge_ids, rng.randrange(len(db.challenge_ids) + 1)):
+            # Repeat timestamps now and then to exercise ties
+            second += rng.choice([0, 0, 1, 30])
+            completions.append((user, challenge_id, f'2024-01-01 10:{second // 60:02d}:{second % 60:02d}'))
+    for user, challenge_id, completed_at in completions:
+        insert_completions(db, [(user, challenge_id, completed_at)])
+    # Completing twice doesn't count twice
+    db.complete_challenge(users[0], 1)
+
+    by_trigger = snapshot(db)
+    db.rebuild_stats()
+    assert snapshot(db) == by_trigger
+    assert sum(by_trigger['completion_histogram'].values()) == len(users)
+
+
+def test_leaderboard_ranks_by_completed_then_time(db):
+    ada, bob, cy = register(db, 'ada', 'bob', 'cy')
+    insert_completions(db, [(bob, 1, '2024-01-01 10:00:00'), (bob, 2, '2024-01-01 10:05:00'),
+                            (ada, 1, '2024-01-01 10:01:00'), (ada, 2, '2024-01-01 10:02:00'),
+                            (cy, 1, '2024-01-01 09:00:00')])
+    assert [row['username'] for row in db.get_leaderboard()] == ['ada', 'bob', 'cy']
+    assert db.get_completion_histogram() == {1: 1, 2: 2}
+
+
+def test_legacy_progress_json_is_migrated(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    # The users table as it was before challenge_progress existed
+    conn.execute('''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        progress TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.executemany('INSERT INTO users (username, password_hash, email, progress, created_at, updated_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', [
+                         ('ada', 'x', 'ada@example.com',
+                          '{"challenge1": true, "challenge2": true, "challenge3": false}',
+                          '2024-01-01 09:00:00', '2024-01-01 10:00:00'),
+                         ('bob', 'x', 'bob@example.com', '{"challenge9": true, "bonus": true}',
+                          '2024-01-01 09:00:00', '2024-01-01 10:00:00'),
+                         ('cy', 'x', 'cy@example.com', 'not json', '2024-01-01 09:00:00', '2024-01-01 10:00:00'),
+                         ('dee', 'x', 'dee@example.com', None, '2024-01-01 09:00:00', '2024-01-01 10:00:00'),
+                     ])
+    conn.commit()
+    conn.close()
+
+    db = make_db(path)
+    try:
+        assert db.get_user_progress(1) == {'challenge1': True, 'challenge2': True, 'challenge3': False}
+        for user_id in (2, 3, 4):
+            assert db.get_progress_mask(user_id) == 0
+        with db.get_connection() as conn:
+            assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+            completed_at = [row[0] for row in conn.execute('SELECT completed_at FROM challenge_progress')]
+        assert completed_at == ['2024-01-01 10:00:00'] * 2
+        # The aggregates are rebuilt from the migrated rows
+        assert db.get_completion_histogram() == {0: 3, 2: 1}
+        assert [row['completions'] for row in db.get_challenge_stats()] == [1, 1, 0]
+    finally:
+        db.pool.close()
+
+    # Opening again doesn't migrate twice
+    db = make_db(path)
+    assert db.get_completion_histogram() == {0: 3, 2: 1}
+    db.pool.close()
+
+
+def test_save_user_progress_validates_keys(db):
+    user, = register(db, 'ada')
+    db.save_user_progress(user, {'challenge1': True, 'challenge2': False})
+    assert db.get_progress_mask(user) == 0b001
+    with pytest.raises(ValueError, match='challenge9'):
+        db.save_user_progress(user, {'challenge3': True, 'challenge9': True})
+    assert db.get_progress_mask(user) == 0b001
@@ -0,0 +1,33 @@
+import pytest
+
+from scraping.parsers import BOOK, CELEB_HEIGHT, available_backends, compile_schema
+
+# UTF-8 with no <meta charset>, so nothing in the page says how to decode it
+BOOK_PAGE = """<html><body>
+<div class="product_main"><h1>Café Stories</h1>
+<p class="price_color">£29.49</p><p class="star-rating Three"></p></div>
+<div id="product_description"></div><p>Naïve, déjà vu.</p>
+</body></html>""".encode('utf-8')
+
+CELEB_PAGE = ('<html><body>'
+              '<div class="sAZ2"><span>1.</span><a> Zoë Example</a><span>6ft 8 ½ (204cm)</span></div>'
+              '</body></html>').encode('utf-8')
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backends_decode_utf8_without_meta_charset(backend):
+    assert compile_schema(BOOK, backend)(BOOK_PAGE) == [{
+        'Title': 'Café Stories',
+        'Price': '£29.49',
+        'Rating': 'Three',
+        'Description': 'Naïve, déjà vu.',
+    }]
+    assert compile_schema(CELEB_HEIGHT, backend)(CELEB_PAGE) == [
+        {'Name': 'Zoë Example', 'Height': '6ft 8 ½ (204cm)'},
+    ]
+
+
+def test_backends_agree_on_str_input():
+    html = BOOK_PAGE.decode('utf-8')
+    records = [compile_schema(BOOK, backend)(html) for backend in available_backends()]
+    assert all(r == records[0] for r in records)
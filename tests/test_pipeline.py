@@ -0,0 +1,91 @@
+from concurrent.futures.process import BrokenProcessPool
+import os
+
+import pytest
+
+from scraping import pipeline as pipeline_module
+from scraping.parsers import BOOK_LINKS
+from scraping.pipeline import Pipeline
+
+PAGE = (b'<ol class="row">'
+        + b''.join(b'<article class="product_pod"><h3><a href="b%d.html">B</a></h3></article>' % i
+                   for i in range(3))
+        + b'</ol>')
+
+
+class Unpicklable(bytes):
+    def __reduce__(self):
+        raise TypeError('cannot pickle')
+
+
+class ListSink:
+    def __init__(self, fail=False):
+        self.records = []
+        self.fail = fail
+
+    def write(self, record):
+        if self.fail:
+            raise OSError('disk full')
+        self.records.append(record)
+
+
+def fetch_page(session, url):
+    return PAGE
+
+
+def fetch_unpicklable(session, url):
+    return Unpicklable(PAGE) if url.endswith('bad') else PAGE
+
+
+def test_records_reach_the_sink():
+    sink = ListSink()
+    stats = Pipeline(BOOK_LINKS, fetch=fetch_page, fetch_workers=2, processes=1, batch_size=4,
+                     url_field='url').run([f'http://example.test/{i}' for i in range(10)], sink)
+    assert stats.records == len(sink.records) == 30
+    assert sink.records[0].keys() == {'href', 'url'}
+
+
+def test_failed_batches_count_as_parse_failures():
+    sink = ListSink()
+    urls = ['http://example.test/bad'] + [f'http://example.test/{i}' for i in range(7)]
+    stats = Pipeline(BOOK_LINKS, fetch=fetch_unpicklable, fetch_workers=1, processes=1,
+                     batch_size=8).run(urls, sink)
+    assert stats.fetched == 8
+    # The unpicklable page takes its whole batch down with it
+    assert stats.parse_failed + stats.records // 3 == 8
+    assert stats.parse_failed >= 1
+
+
+def test_sink_errors_are_raised():
+    with pytest.raises(OSError):
+        Pipeline(BOOK_LINKS, fetch=fetch_page, fetch_workers=2, processes=1, batch_size=2).run(
+            [f'http://example.test/{i}' for i in range(20)], ListSink(fail=True))
+
+
+class CrashingSchema:
+    """Kills the worker process as soon as it is unpickled there."""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def test_broken_pool_stops_the_fetcher():
+    pipeline = Pipeline(BOOK_LINKS, fetch=fetch_page, fetch_workers=2, processes=1, batch_size=2,
+                        queue_size=4)
+    pipeline.schema = CrashingSchema()
+    urls = (f'http://example.test/{i}' for i in range(10000))
+    with pytest.raises(BrokenProcessPool):
+        pipeline.run(urls, ListSink())
+
+
+def test_workers_are_spawned(monkeypatch):
+    contexts = []
+    original = pipeline_module.ProcessPoolExecutor
+
+    def recording(*args, **kwargs):
+        contexts.append(kwargs['mp_context'].get_start_method())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline_module, 'ProcessPoolExecutor', recording)
+    Pipeline(BOOK_LINKS, fetch=fetch_page, processes=1).run(['http://example.test/'], ListSink())
+    assert contexts == ['spawn']
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from models import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2, timeout=0.1)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool._opened == 1
+
+
+def test_integrity_error_keeps_the_connection(pool):
+    with pool.connection() as conn:
+        conn.execute('INSERT INTO t VALUES (1)')
+        conn.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        with pool.connection() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+    with pool.connection() as again:
+        assert again is conn
+        assert not again.in_transaction
+    assert pool._opened == 1
+
+
+def test_lock_timeout_keeps_the_connection(pool):
+    other = sqlite3.connect(pool.db_path)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.connection() as conn:
+                conn.execute('INSERT INTO t VALUES (2)')
+    finally:
+        other.rollback()
+        other.close()
+    with pool.connection() as again:
+        assert again is conn
+        again.execute('INSERT INTO t VALUES (2)')
+        again.commit()
+
+
+def test_closed_connection_is_discarded(pool):
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection() as conn:
+            conn.close()
+            conn.execute('SELECT 1')
+    assert pool._opened == 0
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        fresh.execute('SELECT 1')
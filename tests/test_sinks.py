@@ -0,0 +1,55 @@
+import os
+
+from scraping.sinks import DedupSink, read_records
+
+FIELDS = ['Title', 'Price']
+
+
+def write_all(path, records, **kwargs):
+    with DedupSink(path, 'Title', fieldnames=FIELDS, **kwargs) as sink:
+        for record in records:
+            sink.write(record)
+        return sink.stats()
+
+
+def books(n, price='£1.00'):
+    return [{'Title': f'Book {i}', 'Price': price} for i in range(n)]
+
+
+def test_rerun_appends_only_new_and_changed(tmp_path):
+    path = str(tmp_path / 'books.csv')
+    assert write_all(path, books(3)) == {'written': 3, 'changed': 0, 'unchanged': 0}
+    assert write_all(path, books(4)) == {'written': 1, 'changed': 0, 'unchanged': 3}
+    assert write_all(path, books(1, '£2.00')) == {'written': 0, 'changed': 1, 'unchanged': 0}
+    assert len(list(read_records(path))) == 5
+
+
+def test_deleted_output_is_reindexed(tmp_path):
+    path = str(tmp_path / 'books.csv')
+    write_all(path, books(3))
+    os.remove(path)
+    assert write_all(path, books(3))['written'] == 3
+    assert len(list(read_records(path))) == 3
+
+
+def test_crash_before_index_commit_does_not_duplicate(tmp_path):
+    path = str(tmp_path / 'books.csv')
+    sink = DedupSink(path, 'Title', fieldnames=FIELDS, commit_every=500)
+    for record in books(10):
+        sink.write(record)
+    # Simulate a crash: the rows are on disk but the index never committed
+    sink._sink.close()
+    sink._index.close()
+
+    assert write_all(path, books(10))['unchanged'] == 10
+    assert len(list(read_records(path))) == 10
+
+
+def test_compact_keeps_latest_versions(tmp_path):
+    path = str(tmp_path / 'books.csv')
+    write_all(path, books(3))
+    write_all(path, books(2, '£2.00'))
+    with DedupSink(path, 'Title', fieldnames=FIELDS) as sink:
+        assert sink.compact() == 3
+    assert write_all(path, books(2, '£2.00'))['unchanged'] == 2
+    assert [r['Price'] for r in read_records(path)] == ['£1.00', '£2.00', '£2.00']
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('lxml')
+pytest.importorskip('cssselect')
+
+from scraping.parsers import CELEB_HEIGHT, compile_schema  # noqa: E402
+from scraping.streaming import StreamExtractor  # noqa: E402
+
+PAGE = ('<html><body><div id="content">'
+        + ''.join(f'<div class="sAZ2"><span>{i}.</span><a> Zoë {i}</a><span>6ft 8 ½ (204cm)</span></div>'
+                  for i in range(50))
+        + '</div></body></html>').encode('utf-8')
+
+
+class Response:
+    def __init__(self, body, content_type):
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+def test_stream_matches_full_dom():
+    expected = compile_schema(CELEB_HEIGHT, 'lxml')(PAGE)
+    assert expected[0] == {'Name': 'Zoë 0', 'Height': '6ft 8 ½ (204cm)'}
+    # Small chunks split the multi-byte characters across feeds
+    records = list(StreamExtractor(CELEB_HEIGHT).stream(Response(PAGE, 'text/html'), chunk_size=7))
+    assert records == expected
+
+
+def test_stream_uses_declared_charset():
+    body = PAGE.decode('utf-8').encode('latin-1')
+    records = list(StreamExtractor(CELEB_HEIGHT).stream(Response(body, 'text/html; charset=ISO-8859-1')))
+    assert records[0] == {'Name': 'Zoë 0', 'Height': '6ft 8 ½ (204cm)'}
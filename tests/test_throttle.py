@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from scraping.throttle import AdaptiveThrottle, AimdLimit
+
+
+def run(limit, latencies):
+    for latency in latencies:
+        limit.acquire()
+        limit.release(latency)
+
+
+def test_limit_settles_under_steady_latency():
+    limit = AimdLimit(initial=4)
+    run(limit, [0.02] * 500)
+    assert limit.limit > 20
+
+
+def test_one_fast_outlier_does_not_pin_the_limit():
+    limit = AimdLimit(initial=4, window=50)
+    run(limit, [0.002] + [0.02] * 500)
+    # The outlier has left the window and the baseline is back at 20ms
+    assert limit.best_latency == 0.02
+    assert limit.limit > 10
+
+
+def test_queued_requests_honour_a_later_pause():
+    throttle = AdaptiveThrottle(initial=1)
+    domain = throttle.acquire('http://example.test/a')
+    started = []
+
+    def second():
+        throttle.acquire('http://example.test/b')
+        started.append(time.monotonic())
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    time.sleep(0.05)
+    # The first request is throttled while the second waits for its slot
+    throttle.release(domain, 0.01, status=429, retry_after=0.2)
+    paused_at = time.monotonic()
+    thread.join()
+    assert started[0] - paused_at >= 0.15
+
+
+class FailingSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(time.monotonic())
+        raise requests.ConnectionError('refused')
+
+
+def test_connection_errors_back_off():
+    session = FailingSession()
+    throttle = AdaptiveThrottle(retries=2, retry_backoff=0.05)
+    with pytest.raises(requests.ConnectionError):
+        throttle.get(session, 'http://example.test/')
+    assert len(session.calls) == 3
+    assert session.calls[1] - session.calls[0] >= 0.025
+    assert session.calls[2] - session.calls[1] >= 0.05
@@ -0,0 +1,91 @@
+import importlib
+import sys
+import time
+
+import pytest
+
+from tokens import ProgressTokens
+
+FAST_HASH = 'pbkdf2:sha256:1000'
+
+
+def test_round_trip():
+    tokens = ProgressTokens('secret')
+    token = tokens.dumps(42, 0b1011)
+    assert tokens.loads(token, 42) == 0b1011
+
+
+def test_rejected_for_another_user_or_key():
+    token = ProgressTokens('secret').dumps(42, 0b1011)
+    assert ProgressTokens('secret').loads(token, 43) is None
+    assert ProgressTokens('other secret').loads(token, 42) is None
+    assert ProgressTokens('secret').loads(token[:-1], 42) is None
+    assert ProgressTokens('secret').loads(None, 42) is None
+
+
+def test_expires_after_max_age(monkeypatch):
+    tokens = ProgressTokens('secret', max_age=60)
+    token = tokens.dumps(42, 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 59)
+    assert tokens.loads(token, 42) == 1
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert tokens.loads(token, 42) is None
+
+
+@pytest.fixture
+def app_client(tmp_path, monkeypatch):
+    # Config reads the environment when it is imported, so import a fresh app
+    monkeypatch.setenv('GAME_DATABASE_PATH', str(tmp_path / 'game.db'))
+    monkeypatch.setenv('GAME_PASSWORD_HASH_WORKERS', '0')
+    monkeypatch.setenv('GAME_PASSWORD_HASH_METHOD', FAST_HASH)
+    monkeypatch.setenv('GAME_STATELESS_PROGRESS', '1')
+    monkeypatch.setenv('GAME_PROGRESS_GROUP_COMMIT', '0')
+    for name in ('app', 'config'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    game = importlib.import_module('app')
+    client = game.app.test_client()
+    client.post('/register', data={'username': 'ada', 'password': 'secret', 'email': 'ada@example.com'})
+    client.post('/login', data={'username': 'ada', 'password': 'secret'})
+    with client.session_transaction() as session:
+        game.user_id = session['user_id']
+    yield game, client
+    game.db.pool.close()
+
+
+def progress_cookie(client):
+    cookie = client.get_cookie('progress')
+    return cookie.value if cookie is not None else None
+
+
+def test_completion_is_carried_in_the_cookie(app_client):
+    game, client = app_client
+    assert client.post('/challenge1', data={'code': 'PYTHON_EXPLORER_2024'}).status_code == 200
+    assert game.progress_tokens.loads(progress_cookie(client), game.user_id) == 0b1
+
+    # A valid token answers without touching the database or its cache
+    misses = game.progress_cache.stats()['misses']
+    assert client.get('/challenge2').status_code == 200
+    assert game.progress_cache.stats()['misses'] == misses
+
+
+def test_tampered_cookie_falls_back_to_the_database(app_client):
+    game, client = app_client
+    client.post('/challenge1', data={'code': 'PYTHON_EXPLORER_2024'})
+    forged = ProgressTokens('not the secret key').dumps(game.user_id, 0b1111111)
+    client.set_cookie('progress', forged)
+
+    game.progress_cache.clear()
+    misses = game.progress_cache.stats()['misses']
+    assert client.get('/').status_code == 200
+    assert game.progress_cache.stats()['misses'] == misses + 1
+    # The forged mask is replaced with the one in the database
+    assert game.progress_tokens.loads(progress_cookie(client), game.user_id) == 0b1
+
+
+def test_logout_clears_the_cookie(app_client):
+    game, client = app_client
+    client.post('/challenge1', data={'code': 'PYTHON_EXPLORER_2024'})
+    assert progress_cookie(client) is not None
+    client.get('/logout')
+    assert progress_cookie(client) is None
@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+
+import pytest
+
+from writer import ProgressWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'writer.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT NOT NULL)')
+    conn.close()
+    return path
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT id, value FROM t ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+
+def test_concurrent_writes_are_group_committed(db_path):
+    writer = ProgressWriter(db_path, flush_interval=0.05)
+    barrier = threading.Barrier(20)
+
+    def write(i):
+        barrier.wait()
+        assert writer.execute('INSERT INTO t (id, value) VALUES (?, ?)', (i, str(i))) == 1
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    # Every acknowledged write is visible to other connections
+    assert rows(db_path) == [(i, str(i)) for i in range(20)]
+    assert writer.writes == 20
+    assert writer.commits < 20
+    assert writer.flush_seconds > 0
+    with pytest.raises(RuntimeError):
+        writer.execute('INSERT INTO t (id, value) VALUES (?, ?)', (20, '20'))
+
+
+def test_failing_write_does_not_roll_back_the_batch(db_path):
+    writer = ProgressWriter(db_path, flush_interval=0.05)
+    results = {}
+
+    def write(i, value):
+        try:
+            results[i] = writer.execute('INSERT INTO t (id, value) VALUES (?, ?)', (i, value))
+        except sqlite3.IntegrityError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=write, args=(i, None if i == 1 else 'ok')) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert results[0] == results[2] == 1
+    assert rows(db_path) == [(0, 'ok'), (2, 'ok')]
+